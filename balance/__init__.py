@@ -0,0 +1,7 @@
+"""Headless balance sweeps: many seeded games over a grid of tuning values.
+
+Run from the repository root:
+
+    python -m balance --param enemy_speed=120:180:30 --param weapon_damage=10,20,30 \\
+        --seeds 16 --policy kite,wander --output sweep
+"""
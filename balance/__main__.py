@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import time
+
+# sprites are loaded from paths relative to the repository root
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+# SDL's SIGTERM handler (installed by pygame.init in every worker) would keep
+# the pool from terminating its workers
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+# one process per core already, keep numpy from starting thread pools in each
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+from balance.policies import POLICIES  # noqa: E402
+from balance.results import ColumnWriter  # noqa: E402
+from balance.sweep import PARAMS, build_grid, columns, parse_values, run_sweep  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m balance",
+        description="Play seeded headless games over a grid of tuning values.")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="sweep a parameter over VALUES (a,b,c or start:stop:step); "
+                             "repeat for a grid")
+    parser.add_argument("--seeds", type=int, default=4,
+                        help="games per grid point and policy")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--policy", default="kite",
+                        help="comma separated input policies: " + ", ".join(POLICIES))
+    parser.add_argument("--duration", type=float, default=300.0,
+                        help="game seconds a run lasts at most")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="update enemies on the NumPy engine")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--output", default="balance_results",
+                        help="results directory (one file per column)")
+    parser.add_argument("--list", action="store_true",
+                        help="list parameters and policies and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (default, description) in PARAMS.items():
+            print(f"{name:16} {default:>8g}  {description}")
+        for name, policy in POLICIES.items():
+            print(f"policy {name:9} {policy.__doc__.splitlines()[0]}")
+        return 0
+
+    sweep = {}
+    for spec in args.param:
+        name, _, values = spec.partition("=")
+        if name not in PARAMS:
+            parser.error(f"unknown parameter {name!r} (see --list)")
+        try:
+            sweep[name] = parse_values(values)
+        except ValueError:
+            parser.error(f"bad values for {name}: {values!r}")
+    policies = args.policy.split(",")
+    unknown = [name for name in policies if name not in POLICIES]
+    if unknown:
+        parser.error("unknown policy(s): " + ", ".join(unknown))
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    runs = build_grid(sweep, seeds, policies)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"{len(runs)} runs on {workers} workers", file=sys.stderr)
+
+    start = time.perf_counter()
+    done = 0
+    with ColumnWriter(args.output, columns(), {"policy": list(POLICIES)}) as writer:
+        for row in run_sweep(runs, args.duration, args.vectorized, workers):
+            writer.append(row)
+            done += 1
+            if done % 50 == 0 or done == len(runs):
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{len(runs)} runs, {done / elapsed:.2f} runs/s",
+                      file=sys.stderr)
+    print(f"results in {args.output}/", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
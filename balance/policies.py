@@ -0,0 +1,114 @@
+import math
+import random
+from typing import Callable, Dict
+
+from game.systems.input import InputState
+
+# An input policy plays the game in place of a human: built from a seed, it is
+# called as policy(tick, game) (the input_source of Game.run_headless) and
+# returns the per player input states of the tick. Policies draw from their
+# own random stream, so the game's stream stays the same as with real input.
+
+# the 8 compass directions, counterclockwise from east (y grows downwards)
+DIRECTIONS = [InputState(right=True), InputState(up=True, right=True),
+              InputState(up=True), InputState(up=True, left=True),
+              InputState(left=True), InputState(down=True, left=True),
+              InputState(down=True), InputState(down=True, right=True)]
+STILL = InputState()
+
+
+def to_input(dx: float, dy: float) -> InputState:
+    """Nearest of the 8 directions to (dx, dy), standing still for (0, 0)"""
+    if dx == 0 and dy == 0:
+        return STILL
+    octant = round(math.atan2(-dy, dx) / (math.pi / 4)) % 8
+    return DIRECTIONS[octant]
+
+
+def idle(seed: int) -> Callable:
+    """Players stand still"""
+    return lambda tick, game: {}
+
+
+def circle(seed: int) -> Callable:
+    """Players walk a slow circle through the 8 directions, like in benchmarks
+
+    The seed picks the first direction.
+    """
+    start = seed % 8
+
+    def policy(tick, game) -> Dict[int, InputState]:
+        state = DIRECTIONS[(start + tick // 45) % 8]
+        return {pid: state for pid in range(len(game.players))}
+    return policy
+
+
+def wander(seed: int, hold=(30, 120)) -> Callable:
+    """Players walk in random directions (or stand) for random stretches"""
+    rng = random.Random(seed)
+    states, until = {}, {}
+
+    def policy(tick, game) -> Dict[int, InputState]:
+        for pid in range(len(game.players)):
+            if until.get(pid, 0) <= tick:
+                states[pid] = rng.choice(DIRECTIONS + [STILL])
+                until[pid] = tick + rng.randint(*hold)
+        return dict(states)
+    return policy
+
+
+def kite(seed: int, radius: float = 250.0, lookahead: float = 80.0,
+         wall_weight: float = 4.0, interval: int = 6) -> Callable:
+    """Players keep away from the enemies around them.
+
+    Every interval ticks each player looks at the spot lookahead px away in
+    each of the 8 directions and walks toward the one with the least danger:
+    the sum of 1 / distance over the live enemies within radius, plus
+    wall_weight / distance for each wall. Standing still is a choice as well.
+    Ties are broken by a little seeded jitter.
+    """
+    rng = random.Random(seed)
+    steps = [(1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1)]
+    steps = [(dx / math.hypot(dx, dy), dy / math.hypot(dx, dy)) for dx, dy in steps]
+    states = {}
+
+    def danger(x, y, enemies, bounds) -> float:
+        # players can't leave the world, a step into a wall stays at the wall
+        x = min(max(x, bounds.left), bounds.right)
+        y = min(max(y, bounds.top), bounds.bottom)
+        total = 0.0
+        for ex, ey in enemies:
+            total += 1.0 / max(math.hypot(x - ex, y - ey), 1.0)
+        # walls count like a few enemies, so corners aren't a way out
+        for margin in (x - bounds.left, bounds.right - x, y - bounds.top, bounds.bottom - y):
+            total += wall_weight / max(margin, 1.0)
+        return total
+
+    def policy(tick, game) -> Dict[int, InputState]:
+        if tick % interval:
+            return states
+        bounds = game.world.get_boundaries()
+        for pid, player in enumerate(game.players):
+            x, y = player.pos.x, player.pos.y
+            enemies = [(enemy.pos.x, enemy.pos.y) for _, enemy in game.enemy_grid.query_radius(
+                (x, y), radius, lambda enemy: enemy.state != "dead")]
+            if not enemies:
+                states[pid] = STILL
+                continue
+            best, choice = danger(x, y, enemies, bounds), STILL
+            for state, (dx, dy) in zip(DIRECTIONS, steps):
+                score = danger(x + dx * lookahead, y + dy * lookahead, enemies, bounds)
+                score += rng.uniform(0.0, 1e-4)
+                if score < best:
+                    best, choice = score, state
+            states[pid] = choice
+        return states
+    return policy
+
+
+POLICIES = {
+    "idle": idle,
+    "circle": circle,
+    "wander": wander,
+    "kite": kite,
+}
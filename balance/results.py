@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+# A results directory holds one file per column with the values of all runs
+# appended as raw little-endian arrays (typecodes of the array module), and
+# columns.json with the column names, typecodes and the labels of categorical
+# columns (stored as the label's index). Rows are flushed in batches while a
+# sweep runs, so an interrupted sweep keeps its finished runs, and a single
+# column loads without touching the others, e.g. numpy.fromfile(path, "<f8").
+SCHEMA = "columns.json"
+EXTENSIONS = {"d": ".f8", "q": ".i8", "B": ".u1"}
+
+
+class ColumnWriter:
+    """Streams result rows (dicts) into a results directory, column by column"""
+
+    def __init__(self, path: str, columns: Sequence[Tuple[str, str]],
+                 categories: Dict[str, List[str]] = None, flush_every: int = 64):
+        self.path = path
+        self.columns = list(columns)  # (name, typecode)
+        self.categories = categories or {}
+        self.flush_every = flush_every
+        self.rows = 0
+        self.buffers = {name: array(typecode) for name, typecode in self.columns}
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, SCHEMA), "w") as f:
+            json.dump({"columns": [{"name": name, "type": typecode,
+                                    "file": name + EXTENSIONS[typecode]}
+                                   for name, typecode in self.columns],
+                       "categories": self.categories}, f, indent=2)
+        self.files = {name: open(os.path.join(path, name + EXTENSIONS[typecode]), "wb")
+                      for name, typecode in self.columns}
+
+    def append(self, row: dict) -> None:
+        for name, _ in self.columns:
+            value = row[name]
+            labels = self.categories.get(name)
+            if labels is not None:
+                value = labels.index(value)
+            self.buffers[name].append(value)
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        for name, buffer in self.buffers.items():
+            if sys.byteorder == "big":
+                buffer.byteswap()
+            buffer.tofile(self.files[name])
+            self.files[name].flush()
+            del buffer[:]
+
+    def close(self) -> None:
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+    def __enter__(self) -> "ColumnWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_columns(path: str) -> Dict[str, list]:
+    """Load a results directory as {column: values}, categories as labels.
+
+    Columns are cut to the rows all of them have, in case a sweep was
+    interrupted while flushing.
+    """
+    with open(os.path.join(path, SCHEMA)) as f:
+        schema = json.load(f)
+    columns = {}
+    for column in schema["columns"]:
+        values = array(column["type"])
+        with open(os.path.join(path, column["file"]), "rb") as f:
+            data = f.read()
+        values.frombytes(data[:len(data) - len(data) % values.itemsize])
+        if sys.byteorder == "big":
+            values.byteswap()
+        columns[column["name"]] = values
+    rows = min((len(values) for values in columns.values()), default=0)
+    result = {}
+    for name, values in columns.items():
+        labels = schema["categories"].get(name)
+        result[name] = ([labels[code] for code in values[:rows]] if labels is not None
+                        else values[:rows].tolist())
+    return result
@@ -0,0 +1,191 @@
+import itertools
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from game.game import Game
+from game.systems.waves import SpawnCurve
+from balance.policies import POLICIES
+from benchmarks.runner import percentiles
+
+# tunable -> (default, description); the defaults are the game's own values
+PARAMS = {
+    "wave_base": (3.0, "enemies in the first wave"),
+    "wave_growth": (2.0, "enemies added per wave"),
+    "wave_plateau": (50.0, "wave after which wave sizes stop growing"),
+    "wave_interval": (4.0, "seconds between two waves"),
+    "live_cap": (300.0, "most enemies alive at once"),
+    "enemy_speed": (150.0, "enemy walking speed, px/s"),
+    "enemy_health": (30.0, "health of a regular enemy"),
+    "enemy_damage": (1.0, "melee damage of a regular enemy"),
+    "weapons": (2.0, "starting weapons per player"),
+    "weapon_damage": (20.0, "damage per hit"),
+    "weapon_range": (300.0, "attack range, px (inf = unlimited)"),
+    "weapon_cooldown": (1.0, "seconds between two attacks"),
+    "player_health": (100.0, "player health"),
+    "player_speed": (300.0, "player walking speed, px/s"),
+}
+
+# metrics of a run, after the run index, seed, policy and parameter columns
+METRICS = [
+    ("survival_time", "d"),  # game seconds until game over or the time limit
+    ("survived", "B"),  # 1 if the players were still alive at the time limit
+    ("kills", "q"),
+    ("waves", "q"),
+    ("peak_enemies", "q"),  # most enemies alive at once
+    ("spawned", "q"),
+    ("ticks", "q"),
+    ("tick_ms_mean", "d"),  # wall clock cost of a simulation tick
+    ("tick_ms_p95", "d"),
+]
+
+
+def parse_values(text: str) -> List[float]:
+    """Values of a parameter: "a,b,c" or an inclusive range "start:stop:step"
+    (the two can be mixed, "10,20:40:10")"""
+    values = []
+    for part in text.split(","):
+        if part.count(":") == 2:
+            start, stop, step = (float(v) for v in part.split(":"))
+            if step <= 0:
+                raise ValueError(f"range step must be positive: {part!r}")
+            count = int(round((stop - start) / step, 9)) + 1
+            values.extend(round(start + i * step, 9) for i in range(max(count, 0)))
+        else:
+            values.append(float(part))
+    return values
+
+
+def build_grid(sweep: Dict[str, Sequence[float]], seeds: Sequence[int],
+               policies: Sequence[str]) -> List[dict]:
+    """All runs of a sweep: every combination of the swept values, each
+    played once per policy and seed; unswept parameters keep their default"""
+    names = list(sweep)
+    runs = []
+    for values in itertools.product(*(sweep[name] for name in names)):
+        params = {name: default for name, (default, _) in PARAMS.items()}
+        params.update(zip(names, values))
+        for policy in policies:
+            for seed in seeds:
+                runs.append({"run": len(runs), "seed": seed, "policy": policy,
+                             "params": params})
+    return runs
+
+
+def apply_params(game: Game, params: dict) -> None:
+    """Tune a freshly initialised game"""
+    director = game.wave_director
+    base, growth, plateau = params["wave_base"], params["wave_growth"], params["wave_plateau"]
+    director.size_curve = SpawnCurve([(0, base), (plateau, base + growth * plateau)])
+    director.interval_curve = SpawnCurve([(0, params["wave_interval"])])
+    director.live_cap = int(params["live_cap"])
+    director.enemy_speed = params["enemy_speed"]
+    director.enemy_health = params["enemy_health"]
+    director.enemy_damage = params["enemy_damage"]
+
+    weapon_range = params["weapon_range"]
+    for player in game.players:
+        player.health = params["player_health"]
+        player.speed = params["player_speed"]
+        manager = player.weapons
+        count = int(params["weapons"])
+        for weapon in manager.weapons.sprites()[count:]:
+            weapon.kill()
+        if count > len(manager.weapons):
+            manager.create_starting_weapons(player.starting_weapon,
+                                            count - len(manager.weapons))
+        manager.weapon_count = len(manager.weapons)
+        for weapon in manager.weapons:
+            weapon.damage = params["weapon_damage"]
+            weapon.range = None if weapon_range == float("inf") else weapon_range
+            weapon.cooldown_duration = params["weapon_cooldown"]
+
+
+def run_game(run: dict, duration: float = 300.0, vectorized: bool = False,
+             size=(1280, 720)) -> dict:
+    """Play one run headlessly until game over or duration game seconds,
+    returns its row of results"""
+    game = Game(size=size, headless=True, seed=run["seed"],
+                vectorized_enemies=vectorized)
+    game.init_pygame()
+    apply_params(game, run["params"])
+    policy = POLICIES[run["policy"]](run["seed"])
+    dt = 1.0 / game.tick_rate
+    samples = []
+    clock = time.perf_counter
+    for tick in range(int(round(duration * game.tick_rate))):
+        per_player_states = policy(tick, game)
+        start = clock()
+        game.step(per_player_states, dt)
+        samples.append((clock() - start) * 1000.0)
+        if game.game_over:
+            break
+
+    timing = percentiles(samples)
+    row = {"run": run["run"], "seed": run["seed"], "policy": run["policy"]}
+    row.update(run["params"])
+    row.update({
+        "survival_time": round(game.game_time, 6),
+        "survived": not game.game_over,
+        "kills": game.kill_counter,
+        "waves": game.wave_counter,
+        "peak_enemies": game.wave_director.peak_live,
+        "spawned": game.wave_director.spawned,
+        "ticks": len(samples),
+        "tick_ms_mean": timing["mean"],
+        "tick_ms_p95": timing["p95"],
+    })
+    return row
+
+
+def init_worker() -> None:
+    # gameplay prints (kills, deaths) would interleave from all workers
+    sys.stdout = open(os.devnull, "w")
+
+
+def run_task(task: tuple) -> dict:
+    run, duration, vectorized = task
+    return run_game(run, duration, vectorized)
+
+
+def run_sweep(runs: List[dict], duration: float = 300.0, vectorized: bool = False,
+              workers: Optional[int] = None) -> Iterator[dict]:
+    """Play all runs, yielding result rows as they finish (in any order).
+
+    Runs are independent games, so they are spread over a pool of worker
+    processes and throughput grows with the number of cores; workers=1 plays
+    them one after the other in this process.
+    """
+    tasks = [(run, duration, vectorized) for run in runs]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        stdout = sys.stdout
+        init_worker()
+        try:
+            for task in tasks:
+                yield run_task(task)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        return
+    # a few tasks per request keep the workers busy without one of them
+    # ending up with a long tail of runs
+    chunksize = max(1, len(tasks) // (workers * 8))
+    pool = Pool(workers, initializer=init_worker)
+    try:
+        yield from pool.imap_unordered(run_task, tasks, chunksize)
+    except BaseException:  # stopped early (interrupt, consumer gone)
+        pool.terminate()
+        raise
+    else:
+        pool.close()  # all runs are done, the workers exit on their own
+    finally:
+        pool.join()
+
+
+def columns() -> List[tuple]:
+    """(name, typecode) of the result columns"""
+    return ([("run", "q"), ("seed", "q"), ("policy", "B")]
+            + [(name, "d") for name in PARAMS] + METRICS)
@@ -0,0 +1,7 @@
+"""Headless performance benchmarks for the game's update and draw hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks --output bench.json
+    python -m benchmarks --compare bench.json
+"""
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import sys
+
+# sprites are loaded from paths relative to the repository root
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # keep stdout clean JSON
+
+from benchmarks.runner import compare, run_all  # noqa: E402
+from benchmarks.scenarios import SCENARIOS  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run headless frame-time benchmarks for named scenarios.")
+    parser.add_argument("scenarios", nargs="*",
+                        help="scenario names to run (default: all)")
+    parser.add_argument("--list", action="store_true",
+                        help="list available scenarios and exit")
+    parser.add_argument("--frames", type=int, default=300,
+                        help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30,
+                        help="unmeasured frames before timing starts")
+    parser.add_argument("--alloc-frames", type=int, default=60,
+                        help="frames for the allocation pass (0 disables it)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="flag regressions against a stored JSON report")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for scenario in SCENARIOS.values():
+            print(f"{scenario.name:26} {scenario.description}")
+        return 0
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error("unknown scenario(s): " + ", ".join(unknown))
+    selected = [SCENARIOS[name] for name in args.scenarios] or list(SCENARIOS.values())
+
+    # game code prints gameplay events; keep stdout for the report
+    log = lambda message: print(message, file=sys.stderr)  # noqa: E731
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        report = run_all(selected, args.frames, args.warmup, args.alloc_frames, log=log)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+        print("no regressions against " + args.compare, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
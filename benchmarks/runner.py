@@ -0,0 +1,165 @@
+import gc
+import platform
+import sys
+import time
+import tracemalloc
+from typing import List
+
+import pygame
+
+from game.systems.profiler import FrameProfiler
+from benchmarks.scenarios import Scenario, build_game, maintain_projectiles, scripted_input
+
+
+def percentiles(samples: List[float]) -> dict:
+    """p50/p95/p99/mean/max of samples (nearest rank)"""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def rank(p):
+        return round(ordered[min(last, int(p * len(ordered)))], 4)
+
+    return {
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def run_scenario(scenario: Scenario, frames: int = 300, warmup: int = 30,
+                 alloc_frames: int = 60) -> dict:
+    """Run one scenario headlessly and return its timing/allocation report"""
+    game = build_game(scenario)
+    dt = 1.0 / game.tick_rate
+    # the game's own phase profiler provides the per-system breakdown
+    profiler = FrameProfiler(history=frames, enabled=True)
+    game.profiler = profiler
+    tick = 0
+
+    def frame():
+        nonlocal tick
+        maintain_projectiles(game, scenario)
+        profiler.begin_frame()
+        game.step(scripted_input(tick), dt)
+        game.draw()
+        profiler.end_frame()
+        tick += 1
+
+    for _ in range(warmup):
+        frame()
+    profiler.reset()
+
+    frame_samples = []
+    enemy_counts = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        frame()
+        frame_samples.append((time.perf_counter() - start) * 1000.0)
+        enemy_counts.append(len(game.enemies))
+
+    enemies_mean = sum(enemy_counts) / len(enemy_counts)
+    systems = {phase: percentiles(list(samples))
+               for phase, samples in profiler.samples.items()
+               if phase not in ("input", "flip")}  # only in the interactive loop
+    report = {
+        "description": scenario.description,
+        "frames": frames,
+        "enemies_mean": round(enemies_mean, 1),
+        "frame_ms": percentiles(frame_samples),
+        "systems": systems,
+        # microseconds per enemy (p50), flat when a system scales linearly
+        "per_enemy_us": {
+            phase: round(systems[phase]["p50"] * 1000.0 / enemies_mean, 3)
+            for phase in ("crowd", "enemies")
+        } if enemies_mean else {},
+        # steady state should show few misses once the pools have warmed up
+        "pools": {"enemy": game.enemy_pool.stats(),
+                  "projectile": game.projectile_pool.stats()},
+        "waves": game.wave_director.stats(),
+    }
+    if alloc_frames:
+        report["alloc"] = measure_allocations(frame, alloc_frames)
+    return report
+
+
+def measure_allocations(frame, frames: int) -> dict:
+    """Per-frame allocation figures from a separate tracemalloc pass.
+
+    transient_bytes is the peak traced memory above the frame's starting point
+    (memory allocated and freed within the frame), net_blocks the change in
+    live allocated blocks, gc_collections the garbage collector runs per frame.
+    """
+    transient = []
+    net_bytes = []
+    net_blocks = []
+    gc_before = sum(stat["collections"] for stat in gc.get_stats())
+    tracemalloc.start()
+    try:
+        for _ in range(frames):
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            start_blocks = sys.getallocatedblocks()
+            frame()
+            current, peak = tracemalloc.get_traced_memory()
+            transient.append(peak - start_bytes)
+            net_bytes.append(current - start_bytes)
+            net_blocks.append(sys.getallocatedblocks() - start_blocks)
+    finally:
+        tracemalloc.stop()
+    gc_after = sum(stat["collections"] for stat in gc.get_stats())
+    return {
+        "transient_bytes": percentiles(transient),
+        "net_bytes_mean": round(sum(net_bytes) / frames, 1),
+        "net_blocks_mean": round(sum(net_blocks) / frames, 1),
+        "gc_collections_per_frame": round((gc_after - gc_before) / frames, 4),
+    }
+
+
+def run_all(scenarios: List[Scenario], frames: int = 300, warmup: int = 30,
+            alloc_frames: int = 60, log=print) -> dict:
+    results = {}
+    for scenario in scenarios:
+        log(f"running {scenario.name} ...")
+        results[scenario.name] = run_scenario(scenario, frames, warmup, alloc_frames)
+        frame_ms = results[scenario.name]["frame_ms"]
+        log(f"  p50 {frame_ms['p50']:.3f} ms  p95 {frame_ms['p95']:.3f} ms  "
+            f"p99 {frame_ms['p99']:.3f} ms")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "frames": frames,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.15,
+            min_delta_ms: float = 0.05) -> List[str]:
+    """Return a line per metric that regressed against the baseline.
+
+    A metric regresses when it is more than threshold (relative) slower and the
+    absolute difference exceeds min_delta_ms, so sub-noise jitter is ignored.
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        metrics = [("frame_ms." + key, result["frame_ms"][key], base["frame_ms"][key])
+                   for key in ("p50", "p95", "p99")]
+        for system, stats in result["systems"].items():
+            base_stats = base.get("systems", {}).get(system)
+            if base_stats:
+                metrics.append((f"systems.{system}.p50", stats["p50"], base_stats["p50"]))
+        for metric, value, base_value in metrics:
+            if value - base_value > min_delta_ms and value > base_value * (1 + threshold):
+                change = (value / base_value - 1) * 100 if base_value else float("inf")
+                regressions.append(
+                    f"{name}: {metric} {base_value:.3f} -> {value:.3f} ms (+{change:.0f}%)")
+    return regressions
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import pygame
+
+from game.game import Game
+from game.systems.input import InputState
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    enemies: int = 0
+    layout: str = "spread"  # "spread" over the world or "clustered" in one spot
+    weapons: int = 2
+    projectiles: int = 0  # projectiles kept in flight every frame
+    waves: int = 0  # spawn this many regular waves up front
+    size: Tuple[int, int] = (1280, 720)
+    vectorized: bool = False
+    render_mode: str = "full"
+    seed: int = 1
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in [
+    Scenario("idle", "player alone, baseline cost of a frame"),
+    Scenario("spread_200", "200 enemies spread over the world", enemies=200),
+    Scenario("clustered_200", "200 enemies stacked around one point",
+             enemies=200, layout="clustered"),
+    Scenario("spread_200_dirty", "200 spread enemies with dirty rect rendering",
+             enemies=200, render_mode="dirty"),
+    Scenario("spread_1000", "1000 enemies spread over the world", enemies=1000),
+    Scenario("spread_5000_vectorized", "5000 enemies on the NumPy engine",
+             enemies=5000, vectorized=True),
+    # same stack at growing sizes, crowd separation cost per enemy stays flat
+    Scenario("crowd_100", "100 stacked enemies on the NumPy engine",
+             enemies=100, layout="clustered", vectorized=True),
+    Scenario("crowd_1000", "1000 stacked enemies on the NumPy engine",
+             enemies=1000, layout="clustered", vectorized=True),
+    Scenario("crowd_5000", "5000 stacked enemies on the NumPy engine",
+             enemies=5000, layout="clustered", vectorized=True),
+    Scenario("weapons_32", "32 weapons on 300 enemies", enemies=300, weapons=32),
+    Scenario("projectile_storm", "400 projectiles in flight over 300 enemies",
+             enemies=300, projectiles=400),
+    Scenario("late_wave", "first 20 regular waves spawned", waves=20),
+    Scenario("small_world", "300 enemies in a 640x360 window",
+             enemies=300, size=(640, 360)),
+    Scenario("large_world", "300 enemies in a 1920x1080 window",
+             enemies=300, size=(1920, 1080)),
+]}
+
+
+def scripted_input(tick: int) -> Dict[int, InputState]:
+    """Player 1 walks in a slow circle through the 8 directions"""
+    step = (tick // 45) % 8
+    return {0: InputState(
+        up=step in (0, 1, 7),
+        right=step in (1, 2, 3),
+        down=step in (3, 4, 5),
+        left=step in (5, 6, 7),
+    )}
+
+
+def build_game(scenario: Scenario) -> Game:
+    """Create a headless game populated for the scenario"""
+    game = Game(size=scenario.size, headless=True, seed=scenario.seed,
+                vectorized_enemies=scenario.vectorized,
+                render_mode=scenario.render_mode)
+    game.init_pygame()
+    # scenarios control the population themselves
+    game.event_scheduler.clear()
+
+    for player in game.players:
+        player.health = 10 ** 9  # never die during a benchmark
+        missing = scenario.weapons - player.weapons.weapon_count
+        if missing > 0:
+            player.weapons.create_starting_weapons(player.starting_weapon, missing)
+
+    for _ in range(scenario.waves):
+        game.spawn_enemy_wave()
+    # spawn what fits under the live cap now instead of a few per frame
+    game.wave_director.flush()
+
+    world_rect = game.world.get_boundaries()
+    center = pygame.Vector2(world_rect.centerx + world_rect.width / 4,
+                            world_rect.centery)
+    for _ in range(scenario.enemies):
+        enemy = game.enemy_pool.acquire()
+        enemy.spawn(game.world)
+        if scenario.layout == "clustered":
+            enemy.pos = pygame.Vector2(center.x + game.rng.gauss(0, 40),
+                                       center.y + game.rng.gauss(0, 40))
+            enemy.rect.center = (int(enemy.pos.x), int(enemy.pos.y))
+        game.add_enemy(enemy)
+
+    # make sure spatial indexes are populated before the first frame
+    game.update_enemies(0.0)
+    return game
+
+
+def maintain_projectiles(game: Game, scenario: Scenario) -> None:
+    """Top up the number of projectiles in flight for projectile storms"""
+    if not scenario.projectiles:
+        return
+    weapons = [weapon for player in game.players
+               for weapon in player.weapons.weapons]
+    enemies = [enemy for enemy in game.enemies if enemy.state != "dead"]
+    if not weapons or not enemies:
+        return
+    in_flight = sum(len(weapon.attack.projectiles) for weapon in weapons)
+    for i in range(scenario.projectiles - in_flight):
+        weapon = weapons[i % len(weapons)]
+        weapon.attack.fire_projectile(enemies[game.rng.randrange(len(enemies))])
@@ -1,70 +1,83 @@
 import pygame
 import math
 
+from game.systems.assets import asset_cache
+from game.systems.enemy_engine import STATES, STATE_CODES
+
+ELITE_TINT = (160, 80, 255)  # purple
+
 
 class Enemy(pygame.sprite.Sprite):
     def __init__(self, game, event_scheduler, pos: pygame.Vector2 = None, speed: float = 150.0, width: int = 30, height: int = 30):
         super().__init__()
+        # EnemyEngine holding this enemy's simulation state (None = standalone)
+        self.engine = None
+        self.slot = -1
+        # network id, set when the game adds the enemy (Game.add_enemy)
+        self.uid = 0
         self.width = width
         self.height = height
         # Replace the simple rectangle with an animated sprite sheet
-        # Load slime sprite sheet (1 row x 5 cols, 80x14)
+        # Slime sprite sheet (1 row x 5 cols, 80x14), frames shared via the asset cache
+        self.slime_frame_count = 5
         try:
-            self.sprite_sheet = pygame.image.load(
-                "game/assets/grey_slime_walkin_sheet.png").convert_alpha()
+            self.variants = asset_cache.get_strip_variants(
+                "game/assets/grey_slime_walkin_sheet.png",
+                self.slime_frame_count, (self.width, self.height))
+            self.frames = self.variants.frames
         except Exception:
             # Fallback to a colored rectangle if the sprite can't be loaded
-            self.sprite_sheet = None
-
-        if self.sprite_sheet:
-            self.slime_frame_count = 5
-            sheet_w, sheet_h = self.sprite_sheet.get_size()
-            frame_w = sheet_w // self.slime_frame_count
-            frame_h = sheet_h
-            # Extract and scale frames to (width, height)
-            self.frames = []
-            for i in range(self.slime_frame_count):
-                frame = pygame.Surface((frame_w, frame_h), pygame.SRCALPHA)
-                frame.blit(self.sprite_sheet, (0, 0),
-                           (i * frame_w, 0, frame_w, frame_h))
-                scaled = pygame.transform.scale(
-                    frame, (self.width, self.height))
-                self.frames.append(scaled)
+            self.variants = None
+            self.frames = None
+
+        if self.frames:
+            self.animation_speed = 8.0  # frames per second for slime
+        else:
+            self.image = pygame.Surface((self.width, self.height))
+
+        self.is_melee = True
+        self.melee_attack_speed = 1.0  # attacks per second
 
+        self.event_scheduler = event_scheduler
+
+        self.rotation_speed = 1.5  # radians per second for turning
+
+        self.game = game
+        self.pool = None  # ObjectPool this enemy is returned to on kill
+        self.reset(pos, speed)
+
+    def reset(self, pos: pygame.Vector2 = None, speed: float = 150.0) -> None:
+        """(Re)initialise the per-life state; pooled enemies are reset on reuse"""
+        if self.frames:
             # Animation state
             self.current_frame = 0
-            self.animation_speed = 8.0  # frames per second for slime
             self.animation_timer = 0.0
 
             # Color filter state
             self.color_filter = None  # None = normal, (R,G,B) = tinted
+            self.facing_right = False  # frames are drawn facing left
 
-            self.image = self.frames[0]
-            self.rect = self.image.get_rect(
-                center=(pos.x, pos.y) if pos else (640, 360))
-            self.mask = pygame.mask.from_surface(self.image)
+            self.image, self.mask = self.variants.get(0)
         else:
             self.color = (0, 0, 255)  # blue
-            self.image = pygame.Surface((self.width, self.height))
             self.image.fill(self.color)
-            self.rect = self.image.get_rect(
-                center=(pos.x, pos.y) if pos else (640, 360))
             self.mask = pygame.mask.from_surface(self.image)
-            self.frames = None  # No sprite frames available
+        self.rect = self.image.get_rect(
+            center=(pos.x, pos.y) if pos else (640, 360))
+        # no render interpolation from where the previous life ended
+        self.prev_center = None
         self.pos = pos or pygame.Vector2(640, 360)
         self.speed = speed
-        self.is_melee = True
         self.melee_damage = 1
-        self.melee_attack_speed = 1.0  # attacks per second
         self.melee_last_attack_time = 0.0
 
-        self.event_scheduler = event_scheduler
-
         # Health system
         self.max_health = 30
         self.health = self.max_health
 
         self.target_current = None
+        # pending kill after death, cancelled if the enemy goes away earlier
+        self.despawn_timer = None
 
         self.state = "idle"
 
@@ -73,46 +86,124 @@ class Enemy(pygame.sprite.Sprite):
         self.direction = pygame.Vector2(1, 0)
         self.direction_to_player = pygame.Vector2(
             0, 0)  # target direction toward player
-        self.rotation_speed = 1.5  # radians per second for turning
-
-        self.game = game
+        # push away from nearby enemies this tick (set by Game.separate_crowd)
+        self.separation = pygame.Vector2(0, 0)
+
+    # Simulation state lives on the sprite, or in the EnemyEngine arrays while
+    # the enemy is attached to one (the sprite is then a thin view used for
+    # drawing and collision masks)
+    @property
+    def pos(self) -> pygame.Vector2:
+        if self.engine is not None:
+            # a copy; write back through the setter
+            x, y = self.engine.pos[self.slot]
+            return pygame.Vector2(float(x), float(y))
+        return self._pos
+
+    @pos.setter
+    def pos(self, value: pygame.Vector2) -> None:
+        self._pos = value
+        if self.engine is not None:
+            self.engine.pos[self.slot] = (value.x, value.y)
+
+    @property
+    def direction(self) -> pygame.Vector2:
+        if self.engine is not None:
+            x, y = self.engine.direction[self.slot]
+            return pygame.Vector2(float(x), float(y))
+        return self._direction
+
+    @direction.setter
+    def direction(self, value: pygame.Vector2) -> None:
+        self._direction = value
+        if self.engine is not None:
+            self.engine.direction[self.slot] = (value.x, value.y)
+
+    @property
+    def health(self) -> float:
+        if self.engine is not None:
+            return float(self.engine.health[self.slot])
+        return self._health
+
+    @health.setter
+    def health(self, value: float) -> None:
+        self._health = value
+        if self.engine is not None:
+            self.engine.health[self.slot] = value
+
+    @property
+    def state(self) -> str:
+        if self.engine is not None:
+            return STATES[self.engine.state[self.slot]]
+        return self._state
+
+    @state.setter
+    def state(self, value: str) -> None:
+        self._state = value
+        if self.engine is not None:
+            self.engine.state[self.slot] = STATE_CODES[value]
+
+    def attach_engine(self, engine, slot: int) -> None:
+        self.engine = engine
+        self.slot = slot
+
+    def detach_engine(self) -> None:
+        """Copy the engine's state back onto the sprite and detach from it"""
+        engine, slot = self.engine, self.slot
+        if engine is None:
+            return
+        self._pos = self.pos
+        self._direction = self.direction
+        self._health = self.health
+        self._state = self.state
+        self.melee_last_attack_time = float(engine.melee_last_attack[slot])
+        if self.frames:
+            self.animation_timer = float(engine.anim_timer[slot])
+        self.engine = None
+        self.slot = -1
+
+    def kill(self) -> None:
+        """Remove the enemy from all groups and the enemy engine, then hand it
+        back to its pool"""
+        if self.engine is not None:
+            self.engine.remove(self)
+        if self.despawn_timer is not None:
+            self.event_scheduler.cancel(self.despawn_timer)
+            self.despawn_timer = None
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
 
     def spawn(self, world) -> None:
         """Spawn enemy at random position within world boundaries"""
         world_rect = world.get_boundaries()
 
-        import random
-        x = random.randint(world_rect.left + self.width // 2,
-                           world_rect.right - self.width // 2)
-        y = random.randint(world_rect.top + self.height // 2,
-                           world_rect.bottom - self.height // 2)
+        # use the game's seeded random stream so runs are reproducible
+        rng = self.game.rng
+        x = rng.randint(world_rect.left + self.width // 2,
+                        world_rect.right - self.width // 2)
+        y = rng.randint(world_rect.top + self.height // 2,
+                        world_rect.bottom - self.height // 2)
 
         self.pos = pygame.Vector2(x, y)
         self.rect.center = (int(self.pos.x), int(self.pos.y))
-        print(f"Enemy spawned at ({x}, {y})")
-
-    def find_closest_player(self, players) -> pygame.Vector2:
-        """Find the closest player and return its position"""
-        closest_player = None
-        closest_distance = float('inf')
 
-        for player in players:
-            distance = self.pos.distance_to(player.pos)
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_player = player
-                self.target_current = closest_player
+    def make_elite(self, strength: int) -> None:
+        """Turn a fresh enemy into an elite worth strength regular ones"""
+        self.max_health *= strength
+        self.health = self.max_health
+        self.melee_damage *= strength
+        if self.frames:
+            self.apply_color_filter(ELITE_TINT)
 
     def update(self, world, dt: float, players) -> None:
         if self.state == "dead":
             return  # Do not update if dead
-        # Step 1: Get current direction to player
-        self.find_closest_player(players)
-        target_pos = self.target_current.pos if self.target_current else None
-        if target_pos:
-            self.direction_to_player = (target_pos - self.pos).normalize()
-        else:
-            self.direction_to_player = pygame.Vector2(0, 0)
+        # Step 1: Get current direction to the nearest player from the shared
+        # flow field (straight at the player unless obstacles are in the way)
+        self.direction_to_player, self.target_current = \
+            self.game.flow_field.sample(self.pos)
 
         # Step 2-5: Smoothly rotate current direction toward player direction
         self.update_direction(dt)
@@ -184,8 +275,8 @@ class Enemy(pygame.sprite.Sprite):
                 return pygame.Vector2(0, -1)  # Up (negative Y in pygame)
 
     def decide_action(self, dt: float, players, world) -> None:
-        # Calculate new position
-        new_pos = self.pos + self.direction * self.speed * dt
+        # Calculate new position, pushed away from the crowd around it
+        new_pos = self.pos + self.direction * self.speed * dt + self.separation
 
         # Check if this movement would cause collision with any player
         would_collide = self.check_collision_at_position(new_pos, players)
@@ -222,12 +313,8 @@ class Enemy(pygame.sprite.Sprite):
         temp_rect = pygame.Rect(0, 0, self.width, self.height)
         temp_rect.center = (int(new_pos.x), int(new_pos.y))
 
-        # Check collision with each player
-        for player in players:
-            # First do a quick rect check for performance
-            if not temp_rect.colliderect(player.rect):
-                continue
-
+        # Check collision with each player whose rect overlaps (grid query)
+        for player in self.game.player_grid.query_rect(temp_rect):
             # If rects overlap, do pixel-perfect collision check
             if hasattr(player, 'mask') and self.mask:
                 # Calculate offset between enemy at new position and player
@@ -256,15 +343,17 @@ class Enemy(pygame.sprite.Sprite):
             # Apply current color filter to new frame
             self.apply_color_filter(self.color_filter)
 
-            # Update rect to match new frame size/shape
-            old_center = self.rect.center
-            self.rect = self.image.get_rect()
-            self.rect.center = old_center
+            # Keep rect matching the frame size (all slime frames share one
+            # size, so this only does work if a frame set differs)
+            if self.rect.size != self.image.get_size():
+                old_center = self.rect.center
+                self.rect.size = self.image.get_size()
+                self.rect.center = old_center
 
     def attack_melee(self) -> None:
         """Perform melee attack when touching a player"""
         # check cooldown for melee attack
-        current_time = pygame.time.get_ticks() / 1000.0  # convert to seconds
+        current_time = self.game.game_time  # seconds of game time
         if current_time - self.melee_last_attack_time < 1.0 / self.melee_attack_speed:
             self.state = "idle"
             return  # still in cooldown
@@ -278,8 +367,10 @@ class Enemy(pygame.sprite.Sprite):
         """Handle taking damage from projectiles or other sources"""
         self.health -= damage
 
-        # Apply orange color filter when hit
-        self.apply_color_filter((255, 165, 0))  # Orange tint
+        # Apply orange color filter when hit; elites keep their tint, it is
+        # what tells them apart
+        if getattr(self, "color_filter", None) != ELITE_TINT:
+            self.apply_color_filter((255, 165, 0))  # Orange tint
 
         # Handle death
         if self.health <= 0:
@@ -287,14 +378,18 @@ class Enemy(pygame.sprite.Sprite):
 
     def on_death(self, source=None):
         """Handle enemy death"""
+        if self.state == "dead":
+            # already dying with its kill scheduled; a second kill would hit
+            # the enemy that reuses this object from the pool
+            return
         print(f"Enemy died! Source: {source}")
         # Visual effect when dying - apply red color filter
         self.apply_color_filter((255, 0, 0))  # Red tint
         self.game.kill_counter += 1
 
         self.state = "dead"
-        self.event_scheduler.schedule_event(
-            pygame.time.get_ticks() / 1000.0 + 1, self.kill)  # kill after 1s
+        self.despawn_timer = self.event_scheduler.schedule_event(
+            self.game.game_time + 1, self.kill)  # kill after 1s
         # Remove from all sprite groups
         # self.kill()
 
@@ -310,28 +405,12 @@ class Enemy(pygame.sprite.Sprite):
             self.mask = pygame.mask.from_surface(self.image)
             return
 
-        # Get the original frame
-        original_frame = self.frames[self.current_frame]
-
-        # Apply horizontal flipping based on direction
-        if self.direction.x > 0:  # Moving right
-            original_frame = pygame.transform.flip(original_frame, True, False)
-        # If direction.x <= 0, use original (faces left by default)
-
-        if color_filter is None:
-            # No filter, use original (possibly flipped)
-            self.image = original_frame.copy()
-        else:
-            # Apply color filter
-            self.image = original_frame.copy()
-            # Create a colored overlay
-            overlay = pygame.Surface(self.image.get_size(), pygame.SRCALPHA)
-            overlay.fill((*color_filter, 128))  # Semi-transparent color
-            self.image.blit(overlay, (0, 0),
-                            special_flags=pygame.BLEND_MULT)
-
-        # Update mask for new colored image
-        self.mask = pygame.mask.from_surface(self.image)
+        # Look up the flipped (facing right) and tinted frame with its mask;
+        # variants are built once and shared by all enemies. The facing only
+        # changes with the frame, so it is kept for snapshots.
+        self.facing_right = self.direction.x > 0
+        self.image, self.mask = self.variants.get(
+            self.current_frame, self.facing_right, color_filter)
 
         # Store current filter state
         self.color_filter = color_filter
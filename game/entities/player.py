@@ -1,5 +1,6 @@
 import pygame
 
+from game.systems.assets import asset_cache
 from game.systems.input import InputState
 from game.systems.weapons import WeaponManager
 
@@ -18,12 +19,6 @@ class Player(pygame.sprite.Sprite):
 
         pygame.sprite.Sprite.__init__(self)
 
-        # Load and setup sprite sheet
-        self.sprite_sheet = pygame.image.load(
-            "game/assets/char1/walk.png").convert_alpha()
-        self.frame_width = self.sprite_sheet.get_width() // 6  # 6 frames per row
-        self.frame_height = self.sprite_sheet.get_height() // 4  # 4 rows
-
         # Animation state
         self.current_frame = 0
         self.animation_speed = 10  # frames per second
@@ -31,35 +26,18 @@ class Player(pygame.sprite.Sprite):
         self.direction = 'down'  # default direction
         self.is_moving = False
 
-        # Extract all frames from sprite sheet
-        self.frames = {}
+        # Frames are cropped and scaled once per process by the asset cache
+        # walk.png is 6 frames per row, 4 rows (one per direction)
         directions = ['down', 'left', 'right', 'up']
-
-        # Calculate center offset to crop the character from each frame
-        crop_x = (self.frame_width - self.char_width) // 2
-        crop_y = (self.frame_height - self.char_height) // 2
-
-        for row, direction in enumerate(directions):
-            self.frames[direction] = []
-            for col in range(6):
-                # Extract the full frame first
-                full_frame = pygame.Surface(
-                    (self.frame_width, self.frame_height), pygame.SRCALPHA)
-                full_frame.blit(self.sprite_sheet, (0, 0),
-                                (col * self.frame_width, row * self.frame_height,
-                                self.frame_width, self.frame_height))
-
-                # Crop just the character part
-                cropped_char = pygame.Surface(
-                    (self.char_width, self.char_height), pygame.SRCALPHA)
-                cropped_char.blit(full_frame, (0, 0),
-                                  (crop_x, crop_y, self.char_width, self.char_height))
-
-                # Scale up the cropped character to fill the sprite size
-                scaled_char = pygame.transform.scale(
-                    cropped_char, (self.width, self.height))
-
-                self.frames[direction].append(scaled_char)
+        frame_rows = asset_cache.get_grid(
+            "game/assets/char1/walk.png", 6, 4,
+            (self.char_width, self.char_height), (self.width, self.height))
+        self.frames = dict(zip(directions, frame_rows))
+        # Collision masks and tight bounds per (direction, frame), built once
+        mask_rows = asset_cache.get_grid_masks(
+            "game/assets/char1/walk.png", 6, 4,
+            (self.char_width, self.char_height), (self.width, self.height))
+        self.masks = dict(zip(directions, mask_rows))
 
         # Set initial image
         self.image = self.frames['down'][0]
@@ -78,8 +56,8 @@ class Player(pygame.sprite.Sprite):
         self.weapons = WeaponManager(
             player=self, starting_weapon=self.starting_weapon)
 
-        # Create collision mask for pixel-perfect collision
-        self.mask = pygame.mask.from_surface(self.image)
+        # Collision mask for pixel-perfect collision
+        self.mask, self.tight_rect = self.masks['down'][0]
 
     def update(self, world, dt: float, input_state: InputState):
         # Get world boundaries
@@ -125,23 +103,13 @@ class Player(pygame.sprite.Sprite):
         self.rect.center = (int(self.pos.x), int(self.pos.y))
 
         self.enemies = self.game.enemies
-        self.weapons.update(dt)
-
-    def draw(self, world):
-        # Get world offset for proper positioning
-        world_offset = world.get_draw_offset()
 
-        # Draw the player sprite with offset
-        # Center the sprite image on the player's position
-        sprite_rect = self.image.get_rect()
-        sprite_rect.center = (
-            int(self.rect.centerx + world_offset[0]),
-            int(self.rect.centery + world_offset[1])
-        )
-        world.surface.blit(self.image, sprite_rect)
+    def queue_draw(self, batch):
+        """Queue the player sprite and its weapons for the frame's sprite batch"""
+        batch.add_sprite(self)
 
-        # Draw the player's weapons (they need offset too)
-        self.weapons.draw(world.surface, world_offset)
+        # Draw the player's weapons on top
+        self.weapons.queue_draw(batch)
 
     def take_damage(self, damage, source=None):
         """Handle taking damage from enemies or other sources"""
@@ -156,17 +124,9 @@ class Player(pygame.sprite.Sprite):
         """Return a list of the n closest enemies to the player"""
         if self.enemies == None:
             return []
-        # calculate distance to each enemy
-        enemies_with_distance = []
-        for enemy in self.enemies:
-            if enemy.state == "dead":
-                continue  # skip dead enemies
-            distance = self.pos.distance_to(enemy.pos)
-            enemies_with_distance.append((distance, enemy))
-
-        # sort by distance and return the n closest
-        enemies_with_distance.sort(key=lambda x: x[0])
-        return enemies_with_distance[:n]
+        # nearest live enemies from the spatial index (sorted by distance)
+        return self.game.enemy_grid.k_nearest(
+            self.pos, n, lambda enemy: enemy.state != "dead")
 
     def update_animation(self, dt):
         """Update sprite animation based on movement"""
@@ -186,8 +146,8 @@ class Player(pygame.sprite.Sprite):
         # Update the image based on direction and frame
         self.image = self.frames[self.direction][self.current_frame]
 
-        # Update collision mask when image changes
-        self.mask = pygame.mask.from_surface(self.image)
+        # Select the precomputed collision mask for the frame
+        self.mask, self.tight_rect = self.masks[self.direction][self.current_frame]
 
     def pixel_perfect_collision(self, other_sprite):
         """Check for pixel-perfect collision with another sprite that has a mask"""
@@ -204,15 +164,10 @@ class Player(pygame.sprite.Sprite):
 
     def get_collision_rect(self):
         """Get a tighter bounding rect based on the actual sprite content"""
-        # Get the bounding rect of non-transparent pixels
-        mask_rect = self.mask.get_bounding_rects()
-        if mask_rect:
-            # Use the first (and usually only) bounding rect
-            tight_rect = mask_rect[0]
+        # Bounding rect of non-transparent pixels, precomputed per frame
+        if self.tight_rect is not None:
             # Adjust position relative to sprite's world position
-            tight_rect.x += self.rect.x
-            tight_rect.y += self.rect.y
-            return tight_rect
+            return self.tight_rect.move(self.rect.x, self.rect.y)
         else:
             # Fallback to regular rect if no mask bounds found
             return self.rect
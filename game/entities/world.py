@@ -22,6 +22,8 @@ class World():
         self.playable_width = self.world_width - (self.margin * 2)
         self.playable_height = self.world_height - (self.margin * 2)
 
+        self.background = self.build_background()
+
     def update_world_size(self, new_size: Tuple[int, int]) -> None:
         self.screen_size = new_size
 
@@ -41,6 +43,17 @@ class World():
         self.playable_width = self.world_width - (self.margin * 2)
         self.playable_height = self.world_height - (self.margin * 2)
 
+        self.background = self.build_background()
+
+    def build_background(self) -> pygame.Surface:
+        """Pre-render the static world background (margin + playable area)"""
+        background = pygame.Surface(self.surface.get_size())
+        background.fill((100, 100, 100))  # margin color
+        playable_rect = pygame.Rect(self.margin, self.margin,
+                                    self.playable_width, self.playable_height)
+        pygame.draw.rect(background, (125, 125, 125), playable_rect)
+        return background
+
     def get_boundaries(self) -> pygame.Rect:
         """Returns the playable boundaries (excluding margin) for collision detection"""
         return pygame.Rect(0, 0, self.playable_width, self.playable_height)
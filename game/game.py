@@ -1,19 +1,65 @@
+import os
+import random
+import struct
+import zlib
 import pygame
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 import asyncio
 
 from game.entities.player import Player
 from game.entities.enemy import Enemy
 from game.systems.input import InputManager, InputState
 from game.entities.world import World
+from game.systems.assets import asset_cache
+from game.systems.atlas import load_atlas
+from game.systems.crowd import CrowdSeparation
+from game.systems.enemy_engine import DEAD, EnemyEngine
 from game.systems.event_scheduler import EventScheduler
 from game.systems.gui import GUI
+from game.systems.navigation import FlowField
+from game.systems.pool import ObjectPool
+from game.systems.profiler import FrameProfiler
+from game.systems.projectile import Projectile
+from game.systems.replay import RESIZE, RESTART, InputRecorder
+from game.systems.snapshot import restore_snapshot, take_snapshot
+from game.systems.renderer import DirtyRectRenderer, SpriteBatch
+from game.systems.spatial_grid import SpatialGrid
+from game.systems.targeting import TargetingService
+from game.systems.waves import WaveDirector
 
 
 class Game:
-    def __init__(self, size: Tuple[int, int] = (1280, 720), fps: int = 60) -> None:
+    def __init__(self, size: Tuple[int, int] = (1280, 720), fps: int = 60,
+                 vectorized_enemies: bool = False, headless: bool = False,
+                 seed: Optional[int] = None, tick_rate: int = 60,
+                 max_catchup_steps: int = 5, render_mode: str = "full",
+                 record_path: Optional[str] = None) -> None:
         self.screen_size = size
-        self.fps = fps
+        self.fps = fps  # display frame cap
+
+        # simulation runs at a fixed tick; rendering interpolates between
+        # the last two ticks (render_alpha = fraction of the next tick)
+        self.tick_rate = tick_rate
+        self.max_catchup_steps = max_catchup_steps
+        self.render_alpha = 1.0
+
+        # "full" redraws and flips the whole screen every frame, "dirty"
+        # only redraws and updates the areas that changed
+        self.background_color = (128, 0, 128)
+        self.renderer = (DirtyRectRenderer(self.background_color)
+                         if render_mode == "dirty" else None)
+        self.dirty_rects = None
+        # every sprite of the world layer is drawn with one blits call
+        self.sprite_batch = SpriteBatch()
+        # headless: dummy SDL video driver, no display flips, no frame cap
+        self.headless = headless
+
+        # single random stream for all gameplay randomness, so a seeded game
+        # can be reproduced exactly
+        if seed is None and record_path:
+            seed = random.randrange(2 ** 32)  # a recording needs a known seed
+        self.seed = seed
+        self.rng = random.Random(seed)
 
         # Pygame objects (initialized in init_pygame)
         self.screen: pygame.Surface | None = None
@@ -29,22 +75,72 @@ class Game:
 
         self.input_manager = InputManager()
 
+        # inputs of every tick are recorded to record_path for replays
+        self.record_path = record_path
+        self.recorder = InputRecorder({
+            "seed": seed,
+            "size": list(size),
+            "tick_rate": tick_rate,
+            "vectorized_enemies": vectorized_enemies,
+            "input_slots": len(self.input_manager.keymaps),
+        }) if record_path else None
+
         self.gui = None
 
+        # per phase frame timing, shown in the debug overlay (F3)
+        self.profiler = FrameProfiler()
+        self.show_debug = False
+
         # players
         self.player1 = None
         self.players = None
 
         self.enemies = None
+        # ids of enemies for network snapshots, unique among live enemies
+        self.next_enemy_uid = 1
+        # optional NumPy engine that updates all enemies in batched array ops
+        self.enemy_engine = EnemyEngine() if vectorized_enemies else None
+
+        # spatial indexes rebuilt every update for neighbourhood queries
+        self.enemy_grid = SpatialGrid(cell_size=64)
+        self.player_grid = SpatialGrid(cell_size=128)
+        # shared direction toward the nearest player, sampled by all enemies
+        self.flow_field = FlowField(cell_size=32)
+        # keeps enemies from stacking on the same pixels (needs numpy)
+        try:
+            self.crowd = CrowdSeparation()
+        except ImportError:
+            self.crowd = None
+        # shared nearest-enemy queries and weapon target assignment
+        self.targeting = TargetingService(self)
+        self.frame_counter = 0
+
+        # dead enemies and projectiles are recycled instead of reallocated
+        self.enemy_pool = ObjectPool(
+            lambda: Enemy(game=self, event_scheduler=self.event_scheduler),
+            capacity=512)
+        self.projectile_pool = ObjectPool(Projectile, capacity=1024)
 
         self.kill_counter = 0
 
         self.wave_counter = 0
+        # queues waves and spawns them a few enemies per frame under a live cap
+        self.wave_director = WaveDirector(self)
+
+        # state right after init_pygame, restart_game goes back to it
+        self.start_snapshot = None
 
     def init_pygame(self) -> None:
+        if self.headless:
+            # must be set before the display is initialized
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
         pygame.init()
         self.screen = pygame.display.set_mode(
             self.screen_size, pygame.RESIZABLE)
+        # frames come from the baked atlas if there is one, else from the PNGs
+        if asset_cache.atlas is None:
+            load_atlas()
 
         # Init enemies first
         self.enemies = pygame.sprite.Group()
@@ -54,8 +150,7 @@ class Game:
         self.players = pygame.sprite.Group()
         # lets think of this as multiplayer ready
         self.players.add(self.player1)
-        self.event_scheduler.schedule_event(
-            self.game_time + 1, self.spawn_enemy_wave)
+        self.wave_director.start(1.0)
 
         self.world = World(self.screen_size)
 
@@ -65,27 +160,56 @@ class Game:
         pygame.display.set_caption("Rougelite")
         self.clock = pygame.time.Clock()
         self.is_running = True
+        self.start_snapshot = self.snapshot()
 
     def handle_input_events(self, events) -> None:
         # Handle global events (quit, resize, etc.)
         for event in events:
             if event.type == pygame.VIDEORESIZE:
-                self.screen_size = event.size
-                self.screen = pygame.display.set_mode(
-                    self.screen_size, pygame.RESIZABLE)
-                self.world.update_world_size(self.screen_size)
-                self.gui.update_screen_size(self.screen_size)
+                self.resize(event.size)
             elif event.type == pygame.QUIT:
                 self.is_running = False
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.is_running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                # profiling only runs while the overlay is visible
+                self.show_debug = not self.show_debug
+                self.profiler.toggle()
             elif event.type == pygame.MOUSEBUTTONDOWN and self.game_over:
                 self.handle_game_over_clicks(event.pos)
 
+    def resize(self, size: Tuple[int, int]) -> None:
+        """Resize the window and the world to size"""
+        if self.recorder is not None:
+            self.recorder.record_event(RESIZE, *size)
+        self.screen_size = tuple(size)
+        self.screen = pygame.display.set_mode(
+            self.screen_size, pygame.RESIZABLE)
+        self.world.update_world_size(self.screen_size)
+        self.gui.update_screen_size(self.screen_size)
+        if self.renderer is not None:
+            self.renderer.invalidate()
+
     def update(self, per_player_states, dt: float) -> None:
         if self.game_over:
             return
-        # update players
+        self.frame_counter += 1
+        self.targeting.begin_frame(self.frame_counter)
+
+        # spawn queued enemies within the frame's spawn budget
+        self.wave_director.update()
+        self.profiler.lap("scheduler")
+
+        self.update_players(per_player_states, dt)
+        self.profiler.lap("players")
+        self.update_enemies(dt)
+        self.profiler.lap("enemies")
+        # update weapons once enemies have moved so targeting and
+        # projectile hits see this frame's positions
+        self.update_weapons(dt)
+        self.profiler.lap("weapons")
+
+    def update_players(self, per_player_states, dt: float) -> None:
         players_alive = False
         for pid, player in enumerate(self.players):
             input_state = per_player_states.get(pid, InputState())
@@ -94,98 +218,286 @@ class Game:
                 players_alive = True
         if not players_alive:
             self.set_game_over()
-
-        # update enemies
-        for enemy in self.enemies:
-            enemy.update(self.world, dt, self.players)
+        self.player_grid.rebuild(self.players)
+        self.flow_field.update(self.world, self.players)
+
+    def update_enemies(self, dt: float) -> None:
+        separation = self.separate_crowd(dt)
+        self.profiler.lap("crowd")
+        if self.enemy_engine is not None:
+            self.enemy_engine.update(self.world, dt, self.players,
+                                     self.game_time, self.flow_field, separation)
+            self.enemy_grid.load_cells(
+                self.enemy_engine.grid_cells(self.enemy_grid.cell_size),
+                len(self.enemy_engine), self.enemy_engine.max_extent())
+        else:
+            for enemy in self.enemies:
+                enemy.update(self.world, dt, self.players)
+            self.enemy_grid.rebuild(self.enemies)
+
+    def separate_crowd(self, dt: float):
+        """Separation push of every enemy for this tick, in one batched pass.
+
+        Returns the offsets for the enemy engine, or hands them to the enemy
+        sprites when they update themselves.
+        """
+        if self.crowd is None:
+            return None
+        engine = self.enemy_engine
+        if engine is not None:
+            n = len(engine)
+            return self.crowd.displacement(engine.pos[:n], engine.state[:n] != DEAD, dt)
+        enemies = self.enemies.sprites()
+        if not enemies:
+            return None
+        push = self.crowd.displacement(
+            [(enemy.pos.x, enemy.pos.y) for enemy in enemies],
+            [enemy.state != "dead" for enemy in enemies], dt)
+        for enemy, (x, y) in zip(enemies, push.tolist()):
+            enemy.separation = pygame.Vector2(x, y)
+        return None
+
+    def update_weapons(self, dt: float) -> None:
+        """Update weapons and their projectiles for all players"""
+        for player in self.players:
+            player.weapons.update(dt)
 
     def draw(self) -> None:
         assert self.screen is not None
-        self.screen.fill((128, 0, 128))
+        renderer = self.renderer
+        # the game over screen covers everything, so it always redraws fully
+        if renderer is not None and self.game_over:
+            renderer.invalidate()
+        full = renderer is None or renderer.needs_full_redraw
+
+        if full:
+            self.screen.fill(self.background_color)
 
         # draw world background first
+        world_rects = []
+        screen_rects = None
         if self.world:
-            # draw world surface
-            self.draw_world()
-
-            # Draw players with offset
-
-            self.draw_players()
+            # draw world surface (or only restore it under last frame's sprites)
+            if full:
+                self.draw_world()
+            else:
+                renderer.erase(self.world)
+            self.profiler.lap("world_draw")
 
-            # Draw enemies with offset
-            self.draw_enemies()
+            # Draw players, weapons, projectiles and enemies with offset
+            world_rects = self.draw_entities()
 
             # Blit world surface to screen
-            self.screen.blit(self.world.surface, self.world.world_position)
+            if full:
+                self.screen.blit(self.world.surface, self.world.world_position)
+            else:
+                screen_rects = renderer.restore_screen(
+                    self.screen, self.world, world_rects)
+            self.profiler.lap("entity_draw")
 
         # Draw GUI on top of everything
-        self.gui.draw(self.screen, self.players,
-                      self.game_time, self.game_over, self.kill_counter)
+        hud_rects = self.gui.draw(self.screen, self.players,
+                                  self.game_time, self.game_over, self.kill_counter)
+        if self.show_debug:
+            hud_rects += self.gui.draw_debug_info(
+                self.screen, self.clock.get_fps() if self.clock else 0.0,
+                len(self.enemies), self.profiler, self.count_projectiles(),
+                1000.0 / self.fps)
+        self.profiler.lap("gui")
+
+        self.dirty_rects = None
+        if renderer is not None:
+            self.dirty_rects = renderer.finish(
+                world_rects, hud_rects, screen_rects, self.screen_size)
+
+    def present(self) -> None:
+        """Push the frame to the display (only the dirty areas if known)"""
+        if self.headless:
+            return
+        if self.dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.dirty_rects)
 
     async def run(self) -> None:
         self.init_pygame()
         assert self.clock is not None
 
+        tick_dt = 1.0 / self.tick_rate
+        accumulator = 0.0
         while self.is_running:
-            # handle timing of internal game time
-            dt = self.clock.tick(self.fps) / 1000.0
-            dt = min(dt, 0.05)  # Cap at 50 ms (20 FPS worst case)
-            self.game_time += dt
+            # handle timing of internal game time; never try to catch up on
+            # more than max_catchup_steps ticks (avoids a spiral of death)
+            frame_dt = self.clock.tick(self.fps) / 1000.0
+            accumulator += min(frame_dt, tick_dt * self.max_catchup_steps)
+            self.profiler.begin_frame()
 
             # Get input states and events
             per_player_states, events = self.input_manager.poll()
 
             # Handle global events (quit, resize, keys etc.)
             self.handle_input_events(events)
-
-            # Run scheduled events
-            self.event_scheduler.run_pending(self.game_time)
-
-            # update all entities
-            self.update(per_player_states, dt)
+            self.profiler.lap("input")
+
+            # advance the simulation in fixed ticks
+            steps = 0
+            while accumulator >= tick_dt and steps < self.max_catchup_steps:
+                self.store_render_positions()
+                self.step(per_player_states, tick_dt)
+                accumulator -= tick_dt
+                steps += 1
+            if steps == self.max_catchup_steps:
+                # drop the backlog, the game slows down instead of stalling
+                accumulator = min(accumulator, tick_dt)
+            self.render_alpha = accumulator / tick_dt
 
             # draw everything
             self.draw()
 
-            pygame.display.flip()
+            self.present()
+            self.profiler.lap("flip")
+            self.profiler.end_frame()
             await asyncio.sleep(0)  # yield control to browser
+        if self.recorder is not None:
+            size = self.recorder.save(self.record_path, self)
+            print(f"Recorded {self.recorder.ticks} ticks to {self.record_path} "
+                  f"({size} bytes)")
         pygame.quit()
 
-    def spawn_enemy_wave(self) -> None:
-        # Spawn a wave of enemies
-        enemy_number = self.wave_counter * 2 + 3  # increase number each wave
-        self.wave_counter += 1
-        for _ in range(enemy_number):  # spawn 5 enemies
-            enemy = Enemy(game=self, event_scheduler=self.event_scheduler)
-            enemy.spawn(self.world)
-            self.enemies.add(enemy)
-
-        # Schedule next wave in 10 seconds
-        self.event_scheduler.schedule_event(
-            self.game_time + 4, self.spawn_enemy_wave)
-
-    def draw_players(self) -> None:
+    def store_render_positions(self) -> None:
+        """Remember where every drawn sprite is before the next tick moves it"""
         for player in self.players:
-            player.draw(self.world)
-
-    def draw_enemies(self) -> None:
-        world_offset = self.world.get_draw_offset()
+            player.prev_center = player.rect.center
+            for weapon in player.weapons.weapons:
+                weapon.prev_center = weapon.rect.center
+                for projectile in weapon.attack.projectiles:
+                    projectile.prev_center = projectile.rect.center
         for enemy in self.enemies:
-            offset_pos = (
-                int(enemy.rect.centerx + world_offset[0]),
-                int(enemy.rect.centery + world_offset[1])
-            )
-            draw_rect = enemy.rect.copy()
-            draw_rect.center = offset_pos
-            self.world.surface.blit(enemy.image, draw_rect)
+            enemy.prev_center = enemy.rect.center
+
+    def step(self, per_player_states, dt: float) -> None:
+        """Advance the simulation by one tick of dt seconds"""
+        if self.recorder is not None:
+            self.recorder.record(per_player_states)
+        self.game_time += dt
+
+        # Run scheduled events
+        self.event_scheduler.run_pending(self.game_time)
+        self.profiler.lap("scheduler")
+
+        # update all entities
+        self.update(per_player_states, dt)
+        if self.recorder is not None:
+            self.recorder.end_tick(self)
+
+    def run_headless(self, seconds: float, dt: Optional[float] = None,
+                     input_source: Optional[Callable] = None,
+                     draw: bool = False) -> dict:
+        """Simulate the game for a number of game seconds as fast as possible.
+
+        Uses a fixed timestep (1 / tick_rate unless dt is given). input_source is
+        called as input_source(tick, game) and returns the per player input
+        states for that tick; without it players stand still. Returns the final
+        state summary.
+        """
+        self.headless = True
+        if self.screen is None:
+            self.init_pygame()
+        dt = dt if dt is not None else 1.0 / self.tick_rate
+        ticks = int(round(seconds / dt))
+
+        for tick in range(ticks):
+            per_player_states = input_source(tick, self) if input_source else {}
+            self.step(per_player_states, dt)
+            if draw:
+                self.draw()
+            if self.game_over:
+                break
+        return self.summary()
+
+    def summary(self) -> dict:
+        """Final state of the simulation, e.g. to compare seeded runs"""
+        return {
+            "seed": self.seed,
+            "game_time": round(self.game_time, 6),
+            "frames": self.frame_counter,
+            "game_over": self.game_over,
+            "wave_counter": self.wave_counter,
+            "kill_counter": self.kill_counter,
+            "enemies_alive": len(self.enemies) if self.enemies else 0,
+            "players": [
+                {"health": player.health,
+                 "pos": (round(player.pos.x, 3), round(player.pos.y, 3))}
+                for player in self.players
+            ] if self.players else [],
+        }
+
+    def checksum(self) -> int:
+        """CRC32 over the exact simulation state, for verifying replays"""
+        values = [self.game_time, self.frame_counter, self.wave_counter,
+                  self.kill_counter, self.game_over]
+        for player in self.players or ():
+            values += (player.pos.x, player.pos.y, player.health)
+        for enemy in self.enemies or ():
+            pos = enemy.pos
+            values += (pos.x, pos.y, enemy.health)
+        return zlib.crc32(struct.pack(f"<{len(values)}d", *values))
+
+    def snapshot(self) -> bytes:
+        """Simulation state as a compact binary buffer (see snapshot.py)"""
+        return take_snapshot(self)
+
+    def restore(self, data: bytes) -> None:
+        """Go back to the state of a snapshot taken from this game"""
+        restore_snapshot(self, data)
+
+    def spawn_enemy_wave(self) -> None:
+        """Queue the next wave, the wave director spawns it over the next frames"""
+        self.wave_director.queue_wave()
+
+    def count_projectiles(self) -> int:
+        return sum(len(weapon.attack.projectiles)
+                   for player in self.players
+                   for weapon in player.weapons.weapons)
+
+    def add_player(self) -> Player:
+        """Add another player (multiplayer), next to where the first one starts"""
+        start = self.player1.rect.center
+        player = Player(self, pos=pygame.Vector2(start[0] + 60 * len(self.players), start[1]),
+                        enemies=self.enemies)
+        self.players.add(player)
+        return player
+
+    def remove_player(self, player: Player) -> None:
+        for weapon in player.weapons.weapons:
+            for projectile in weapon.attack.projectiles.sprites():
+                projectile.kill()
+        player.kill()
+
+    def add_enemy(self, enemy: Enemy) -> None:
+        """Register a spawned enemy with the game (and the enemy engine)"""
+        enemy.uid = self.next_enemy_uid
+        self.next_enemy_uid += 1
+        self.enemies.add(enemy)
+        if self.enemy_engine is not None:
+            self.enemy_engine.add(enemy)
+
+    def draw_entities(self) -> list:
+        """Draw all sprites of the world layer in one batch.
+
+        Returns the world surface areas drawn to when the dirty rect renderer
+        needs them, an empty list otherwise.
+        """
+        batch = self.sprite_batch
+        batch.begin(self.world.get_draw_offset(), self.render_alpha)
+        for player in self.players:
+            player.queue_draw(batch)
+        batch.add(self.enemies)
+        return batch.flush(self.world.surface, self.renderer is not None)
 
     def draw_world(self) -> None:
-        # Clear world surface and draw background
-        self.world.surface.fill((100, 100, 100))  # margin color
-        playable_rect = pygame.Rect(self.world.margin, self.world.margin,
-                                    self.world.playable_width, self.world.playable_height)
-        pygame.draw.rect(self.world.surface,
-                         (125, 125, 125), playable_rect)
+        # Restore the pre-rendered background (margin + playable area)
+        self.world.surface.blit(self.world.background, (0, 0))
 
     def set_game_over(self) -> None:
         print("Game Over! All players have been defeated.")
@@ -205,21 +517,11 @@ class Game:
     def restart_game(self) -> None:
         """Restart the game to initial state"""
         print("Restarting game...")
-
-        # Reset game state
-        self.game_over = False
-        self.game_time = 0.0
-
-        # Reset player health and position
-        for player in self.players:
-            player.health = 100
-            player.pos = pygame.Vector2(640, 360)
-            player.rect.center = (int(player.pos.x), int(player.pos.y))
-
-        # Clear all enemies
-        self.enemies.empty()
-
-        # Clear event scheduler and schedule first wave
-        self.event_scheduler = EventScheduler()
-        self.event_scheduler.schedule_event(
-            self.game_time + 2, self.spawn_enemy_wave)
+        if self.recorder is not None:
+            self.recorder.record_event(RESTART)
+
+        # back to the state the game started in, but keep drawing from the
+        # random stream so the new run differs from the last one
+        rng_state = self.rng.getstate()
+        self.restore(self.start_snapshot)
+        self.rng.setstate(rng_state)
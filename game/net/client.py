@@ -0,0 +1,240 @@
+import asyncio
+import random
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from game.net.protocol import (
+    DeltaDecoder, FULL, HEADER, INPUT, INPUT_BODY, JOIN, JOIN_BODY, LEAVE, SNAPSHOT,
+    Snapshot, TINTS, VERSION, WELCOME, WELCOME_BODY, packet, packet_kind)
+from game.systems.enemy_engine import STATES
+from game.systems.input import InputState
+from game.systems.replay import pack_input
+
+
+class NetClient:
+    """UDP connection to a GameServer: sends inputs, decodes snapshots"""
+
+    def __init__(self, address: Tuple[str, int]):
+        self.server = address
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.decoder = DeltaDecoder()
+        self.player_index = None
+        self.tick_rate = 60
+        self.world_size = (1280, 720)
+        self.snapshot_rate = 20
+        self.input_sequence = 0
+        self.snapshot: Optional[Snapshot] = None
+        self.bytes_received = 0
+        self.snapshots_received = 0
+
+    def join(self, timeout: float = 5.0) -> None:
+        """Ask the server for a player, retrying until it answers"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.socket.sendto(packet(JOIN, JOIN_BODY.pack(VERSION)), self.server)
+            retry = time.monotonic() + 0.25
+            while time.monotonic() < retry:
+                for data in self.receive_datagrams():
+                    kind = packet_kind(data)
+                    if kind == FULL:
+                        raise ConnectionRefusedError("server is full")
+                    if kind == WELCOME and len(data) >= HEADER.size + WELCOME_BODY.size:
+                        (self.player_index, self.tick_rate, width, height,
+                         self.snapshot_rate) = WELCOME_BODY.unpack_from(data, HEADER.size)
+                        self.world_size = (width, height)
+                        return
+                time.sleep(0.01)
+        raise TimeoutError(f"no answer from {self.server[0]}:{self.server[1]}")
+
+    def receive_datagrams(self) -> List[bytes]:
+        datagrams = []
+        while True:
+            try:
+                data, address = self.socket.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return datagrams
+            except ConnectionResetError:  # nothing listens on the server port
+                continue
+            if address == self.server:
+                datagrams.append(data)
+
+    def poll(self) -> Optional[Snapshot]:
+        """Decode the snapshots that arrived, returns the newest (or None)"""
+        newest = None
+        for data in self.receive_datagrams():
+            if packet_kind(data) != SNAPSHOT:
+                continue
+            self.bytes_received += len(data)
+            snapshot = self.decoder.decode(data)
+            if snapshot is not None:
+                self.snapshots_received += 1
+                newest = self.snapshot = snapshot
+        return newest
+
+    def send_input(self, state: InputState) -> None:
+        """Send the current input, which also acknowledges the newest snapshot"""
+        self.input_sequence += 1
+        self.socket.sendto(packet(INPUT, INPUT_BODY.pack(
+            self.input_sequence, pack_input(state), self.decoder.latest)), self.server)
+
+    def close(self) -> None:
+        try:
+            self.socket.sendto(packet(LEAVE), self.server)
+        finally:
+            self.socket.close()
+
+
+class RemoteView:
+    """Mirrors snapshots onto the sprites of a local Game that doesn't
+    simulate, so the game's renderer and HUD draw the server's world.
+
+    Movement between two snapshots is interpolated with the game's render
+    interpolation (prev_center and render_alpha), enemies are animated locally.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.enemies: Dict[int, object] = {}  # uid -> Enemy sprite
+        self.received_at = time.monotonic()
+        self.interval = 1.0 / 20
+
+    def apply(self, snapshot: Snapshot, interval: float) -> None:
+        game = self.game
+        self.received_at = time.monotonic()
+        self.interval = interval
+        game.store_render_positions()
+        game.game_time = snapshot.game_time
+        game.kill_counter = snapshot.kills
+        game.wave_counter = snapshot.waves
+        game.game_over = snapshot.game_over
+
+        players = game.players.sprites()
+        while len(players) < len(snapshot.players):
+            players.append(game.add_player())
+        for player in players[len(snapshot.players):]:
+            game.remove_player(player)
+        for player, (_, x, y, health, direction, moving) in zip(players, snapshot.players):
+            player.pos = pygame.Vector2(x, y)
+            player.rect.center = (x, y)
+            player.health = health
+            player.direction = direction
+            player.is_moving = moving
+
+        for uid in [uid for uid in self.enemies if uid not in snapshot.enemies]:
+            self.enemies.pop(uid).kill()
+        for uid in snapshot.updated:
+            x, y, health, flags = snapshot.enemies[uid]
+            enemy = self.enemies.get(uid)
+            if enemy is None:
+                enemy = game.enemy_pool.acquire()
+                enemy.uid = uid
+                game.enemies.add(enemy)
+                self.enemies[uid] = enemy
+                enemy.rect.center = (x, y)
+                enemy.prev_center = None
+            enemy.pos = pygame.Vector2(x, y)
+            enemy.rect.center = (x, y)
+            enemy.health = enemy.max_health * health / 255
+            enemy.state = STATES[flags & 3]
+            enemy.facing_right = bool(flags & 4)
+            enemy.color_filter = TINTS[flags >> 3 & 3]
+
+    def animate(self, dt: float) -> None:
+        """Advance local animations and the interpolation between snapshots"""
+        game = self.game
+        game.render_alpha = min(1.0, (time.monotonic() - self.received_at) / self.interval)
+        for player in game.players:
+            player.update_animation(dt)
+            for weapon in player.weapons.weapons:
+                weapon.update_position()
+        for enemy in self.enemies.values():
+            if enemy.frames:
+                enemy.animation_timer += dt
+                frames = len(enemy.frames)
+                enemy.current_frame = int(enemy.animation_timer * enemy.animation_speed
+                                          + enemy.uid) % frames
+                enemy.image, enemy.mask = enemy.variants.get(
+                    enemy.current_frame, enemy.facing_right, enemy.color_filter)
+
+
+async def play(address: Tuple[str, int], render_mode: str = "full") -> None:
+    """Join a server and play in a window, drawn from the server's snapshots"""
+    from game.game import Game
+
+    client = NetClient(address)
+    client.join()
+    print(f"joined {address[0]}:{address[1]} as player {client.player_index}")
+    game = Game(size=client.world_size, render_mode=render_mode)
+    game.init_pygame()
+    game.event_scheduler.clear()  # the server simulates, this game only draws
+    view = RemoteView(game)
+    interval = 1.0 / client.snapshot_rate
+    try:
+        while game.is_running:
+            dt = game.clock.tick(game.fps) / 1000.0
+            per_player_states, events = game.input_manager.poll()
+            for event in events:
+                if event.type == pygame.QUIT or (
+                        event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    game.is_running = False
+                elif event.type == pygame.VIDEORESIZE:
+                    game.resize(event.size)
+            # the first keymap steers this client's player
+            client.send_input(per_player_states.get(0, InputState()))
+            snapshot = client.poll()
+            if snapshot is not None:
+                view.apply(snapshot, interval)
+            view.animate(dt)
+            game.draw()
+            game.present()
+            await asyncio.sleep(0)
+    finally:
+        client.close()
+        pygame.quit()
+
+
+def run_bots(address: Tuple[str, int], count: int, seconds: float,
+             seed: int = 0) -> List[dict]:
+    """Connect count headless clients that walk around randomly for seconds
+    of wall time, returns what each of them received"""
+    rng = random.Random(seed)
+    bots = []
+    for _ in range(count):
+        bot = NetClient(address)
+        bot.join()
+        bots.append(bot)
+    directions = [InputState(up=True), InputState(down=True), InputState(left=True),
+                  InputState(right=True), InputState(up=True, left=True),
+                  InputState(down=True, right=True), InputState()]
+    inputs = [rng.choice(directions) for _ in bots]
+    start = time.monotonic()
+    frame = 1.0 / 60
+    try:
+        while time.monotonic() - start < seconds:
+            for index, bot in enumerate(bots):
+                if rng.random() < 0.02:
+                    inputs[index] = rng.choice(directions)
+                bot.send_input(inputs[index])
+                bot.poll()
+            time.sleep(frame)
+    finally:
+        elapsed = time.monotonic() - start
+        for bot in bots:
+            bot.close()
+
+    reports = []
+    for bot in bots:
+        snapshot = bot.snapshot
+        reports.append({
+            "player": bot.player_index,
+            "snapshots": bot.snapshots_received,
+            "bytes_per_second": round(bot.bytes_received / elapsed),
+            "mean_snapshot_bytes": round(bot.bytes_received / max(1, bot.snapshots_received), 1),
+            "enemies_known": len(snapshot.enemies) if snapshot else 0,
+            "enemies_on_server": snapshot.live_enemies if snapshot else 0,
+        })
+    return reports
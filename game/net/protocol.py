@@ -0,0 +1,348 @@
+import heapq
+import math
+import struct
+from typing import Dict, List, Optional
+
+from game.systems.enemy_engine import STATE_CODES
+from game.systems.replay import read_varint, write_varint
+
+# Datagrams between GameServer and NetClient (little endian), all starting
+# with magic and packet type:
+#   JOIN      client -> server  protocol version
+#   WELCOME   server -> client  player index, tick rate, world size, snapshot rate
+#   FULL      server -> client  no free player slot
+#   INPUT     client -> server  input sequence, input bits (replay.pack_input),
+#                               newest snapshot the client decoded (its ack)
+#   LEAVE     client -> server
+#   SNAPSHOT  server -> client  see DeltaEncoder
+MAGIC = b"RL"
+VERSION = 1
+JOIN, WELCOME, FULL, INPUT, LEAVE, SNAPSHOT = range(1, 7)
+
+HEADER = struct.Struct("<2sB")
+JOIN_BODY = struct.Struct("<H")
+# player index, tick rate, world width, world height, snapshots per second
+WELCOME_BODY = struct.Struct("<BHHHB")
+# input sequence, input bits, ack
+INPUT_BODY = struct.Struct("<IBI")
+# sequence, baseline (0 = none), tick, game time, kills, waves, game over,
+# live enemies on the server, players, index of the receiving client's player
+SNAPSHOT_HEAD = struct.Struct("<IIIfIH?HBB")
+# index, x, y, health, direction | moving << 2
+PLAYER = struct.Struct("<BHHhB")
+
+PLAYER_DIRECTIONS = ("down", "left", "right", "up")
+# enemy tints: none, elite, hit, dying (see Enemy.make_elite, take_damage, on_death)
+TINTS = (None, (160, 80, 255), (255, 165, 0), (255, 0, 0))
+TINT_CODES = {tint: code for code, tint in enumerate(TINTS)}
+
+# changed fields of an enemy record
+POS, HEALTH, FLAGS = 1, 2, 4
+# largest priority gain of an enemy per snapshot (px off in the client's view)
+ERROR_CAP = 32.0
+
+
+def packet(kind: int, body: bytes = b"") -> bytes:
+    return HEADER.pack(MAGIC, kind) + body
+
+
+def packet_kind(data: bytes) -> Optional[int]:
+    """Type of a datagram, None if it isn't one of ours"""
+    if len(data) < HEADER.size:
+        return None
+    magic, kind = HEADER.unpack_from(data)
+    return kind if magic == MAGIC else None
+
+
+def zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def varint_size(value: int) -> int:
+    return max(1, (value.bit_length() + 6) // 7)
+
+
+def quantize_enemies(game) -> Dict[int, tuple]:
+    """uid -> (x, y, health, flags) of every enemy, as small integers.
+
+    Positions are whole pixels, health is the fraction of max health in
+    0..255 and flags pack state (2 bits), facing (1 bit) and tint (2 bits).
+    Animation frames aren't sent, clients animate enemies themselves.
+    """
+    enemies = game.enemies.sprites()
+    engine = game.enemy_engine
+    if engine is not None and enemies:
+        # attached enemies are views of the engine's arrays, read them in bulk
+        slots = [enemy.slot for enemy in enemies]
+        positions = engine.pos[slots].round().astype(int).tolist()
+        healths = engine.health[slots].tolist()
+        states = engine.state[slots].tolist()
+    else:
+        positions = [(round(enemy.pos.x), round(enemy.pos.y)) for enemy in enemies]
+        healths = [enemy.health for enemy in enemies]
+        states = [STATE_CODES[enemy.state] for enemy in enemies]
+
+    result = {}
+    for enemy, (x, y), health, state in zip(enemies, positions, healths, states):
+        facing, tint = False, 0
+        if enemy.frames:
+            facing = enemy.facing_right
+            tint = TINT_CODES.get(enemy.color_filter, 0)
+        fraction = max(0, min(255, math.ceil(255 * health / enemy.max_health)))
+        result[enemy.uid] = (min(max(x, 0), 0xFFFF), min(max(y, 0), 0xFFFF), fraction,
+                             state | facing << 2 | tint << 3)
+    return result
+
+
+def player_records(game) -> List[tuple]:
+    """(index, x, y, health, direction | moving << 2) of every player"""
+    return [(index, min(max(round(player.pos.x), 0), 0xFFFF),
+             min(max(round(player.pos.y), 0), 0xFFFF),
+             max(-0x8000, min(0x7FFF, round(player.health))),
+             PLAYER_DIRECTIONS.index(player.direction) | player.is_moving << 2)
+            for index, player in enumerate(game.players)]
+
+
+class DeltaEncoder:
+    """Builds the snapshots of one client, delta compressed against the
+    newest snapshot it acknowledged and held to a byte budget.
+
+    Every snapshot describes a view of the enemies: the view of its baseline
+    (the acked snapshot, empty if there is none) with the removals and
+    updates the snapshot carries applied. Enemies are sent as the fields that
+    differ from the baseline, positions as small signed offsets. When more
+    changed than fits into budget bytes, the changes go out by priority:
+    every snapshot an enemy stays out of date it gains priority by how far
+    off the client's view of it is (weighted up near the client's player),
+    so the view converges everywhere while the surroundings of the player
+    stay fresh. Changes that went out after the baseline are sent again
+    first until a baseline has them, a snapshot built on an older baseline
+    would otherwise take them back. The size of a snapshot, and with it the
+    bandwidth per client, doesn't grow with the number of enemies.
+    """
+
+    def __init__(self, budget: int = 1200, history: int = 32, relevance: float = 400.0):
+        self.budget = budget  # bytes per snapshot datagram
+        self.history = history  # views kept for acks that are still on the way
+        self.relevance = relevance  # px around the player that gain priority faster
+        self.views: Dict[int, dict] = {}  # sequence -> enemy view
+        self.sequence = 0
+        self.acked = 0
+        self.priority: Dict[int, float] = {}
+        self.pending: Dict[int, int] = {}  # uid -> first update no baseline has
+
+    def ack(self, sequence: int) -> None:
+        if sequence > self.acked and sequence in self.views:
+            self.acked = sequence
+            for old in [seq for seq in self.views if seq < sequence]:
+                del self.views[old]
+
+    def encode(self, game, enemies: Dict[int, tuple], player=None) -> bytes:
+        """Next snapshot datagram; enemies from quantize_enemies, player the
+        client's own (its surroundings get priority)"""
+        self.sequence += 1
+        baseline = self.acked if self.acked in self.views else 0
+        base = self.views.get(baseline, {})
+        players = player_records(game)
+        own = 0xFF
+        focus = None
+        if player is not None:
+            own = game.players.sprites().index(player)
+            focus = (player.pos.x, player.pos.y)
+        out = bytearray(packet(SNAPSHOT, SNAPSHOT_HEAD.pack(
+            self.sequence, baseline, game.frame_counter, game.game_time,
+            game.kill_counter, min(game.wave_counter, 0xFFFF), game.game_over,
+            min(len(enemies), 0xFFFF), len(players), own)))
+        for record in players:
+            out += PLAYER.pack(*record)
+        room = self.budget - len(out) - 8  # the two counts
+
+        removed = []
+        for uid in sorted(base):
+            if uid not in enemies:
+                if varint_size(uid) > room:
+                    break
+                room -= varint_size(uid)
+                removed.append(uid)
+
+        updates = self.pick_updates(base, baseline, enemies, focus, room)
+        view = dict(base)
+        for uid in removed:
+            del view[uid]
+        write_varint(out, len(removed))
+        previous = 0
+        for uid in removed:
+            write_varint(out, uid - previous)
+            previous = uid
+        write_varint(out, len(updates))
+        previous = 0
+        for uid in updates:
+            state = enemies[uid]
+            old = base.get(uid)
+            write_varint(out, uid - previous)
+            previous = uid
+            if old is None:
+                out.append(POS | HEALTH | FLAGS)
+                out += struct.pack("<HHBB", *state)
+            else:
+                mask = ((POS if state[:2] != old[:2] else 0)
+                        | (HEALTH if state[2] != old[2] else 0)
+                        | (FLAGS if state[3] != old[3] else 0))
+                out.append(mask)
+                if mask & POS:
+                    write_varint(out, zigzag(state[0] - old[0]))
+                    write_varint(out, zigzag(state[1] - old[1]))
+                if mask & HEALTH:
+                    out.append(state[2])
+                if mask & FLAGS:
+                    out.append(state[3])
+            view[uid] = state
+
+        self.views[self.sequence] = view
+        for old in [seq for seq in self.views
+                    if seq <= self.sequence - self.history and seq != self.acked]:
+            del self.views[old]
+        return bytes(out)
+
+    def pick_updates(self, base, baseline: int, enemies, focus, room: int) -> List[int]:
+        """uids of the changed enemies that fit into room bytes, the ones
+        updated since the baseline first, then by priority"""
+        priority = self.priority
+        pending = self.pending
+        for uid in [uid for uid, seq in pending.items()
+                    if seq <= baseline or uid not in enemies]:
+            del pending[uid]
+        changed = []
+        for uid, state in enemies.items():
+            old = base.get(uid)
+            if old == state:
+                priority.pop(uid, None)
+                continue
+            # how wrong the client's view is, capped so priority grows with
+            # the time an enemy is out of date
+            if old is None:
+                error = 2 * ERROR_CAP  # not on the client's screen at all
+            else:
+                error = min(ERROR_CAP, abs(state[0] - old[0]) + abs(state[1] - old[1])
+                            + 8.0 * (state[2] != old[2]) + 16.0 * (state[3] != old[3]))
+            if focus is not None:
+                distance = math.hypot(state[0] - focus[0], state[1] - focus[1])
+                error *= 1.0 + 4.0 * max(0.0, 1.0 - distance / self.relevance)
+            priority[uid] = priority.get(uid, 0.0) + error
+            changed.append(uid)
+        for uid in [uid for uid in priority if uid not in enemies]:
+            del priority[uid]
+
+        picked = []
+        # sizes assume the worst case uid offset, the real ones are smaller
+        order = heapq.nlargest(len(changed), changed, key=lambda uid: (
+            uid in pending, priority[uid]))
+        for uid in order:
+            state, old = enemies[uid], base.get(uid)
+            size = varint_size(uid) + 1
+            if old is None:
+                size += 6
+            else:
+                if state[:2] != old[:2]:
+                    size += (varint_size(zigzag(state[0] - old[0]))
+                             + varint_size(zigzag(state[1] - old[1])))
+                size += (state[2] != old[2]) + (state[3] != old[3])
+            if size > room:
+                if room < 4:
+                    break
+                continue
+            room -= size
+            picked.append(uid)
+            priority[uid] = 0.0
+            pending.setdefault(uid, self.sequence)
+        picked.sort()
+        return picked
+
+
+class Snapshot:
+    """A decoded snapshot: header values, players and the enemy view"""
+
+    def __init__(self, sequence, tick, game_time, kills, waves, game_over,
+                 live_enemies, players, own, enemies, updated):
+        self.sequence = sequence
+        self.tick = tick
+        self.game_time = game_time
+        self.kills = kills
+        self.waves = waves
+        self.game_over = game_over
+        self.live_enemies = live_enemies  # on the server, the view may lag
+        self.players = players  # [(index, x, y, health, direction, moving)]
+        self.own = own  # index of this client's player (None for spectators)
+        self.enemies = enemies  # uid -> (x, y, health fraction, flags)
+        self.updated = updated  # uids updated or added by this snapshot
+
+
+class DeltaDecoder:
+    """Client side of DeltaEncoder: rebuilds the enemy views of snapshots"""
+
+    def __init__(self, history: int = 64):
+        self.history = history
+        self.views: Dict[int, dict] = {0: {}}
+        self.latest = 0  # newest decoded sequence, sent back as the ack
+
+    def decode(self, data: bytes) -> Optional[Snapshot]:
+        """Decode a snapshot datagram, None if it is stale or its baseline
+        is gone (the server falls back to an older baseline then)"""
+        offset = HEADER.size
+        (sequence, baseline, tick, game_time, kills, waves, game_over,
+         live_enemies, count, own) = SNAPSHOT_HEAD.unpack_from(data, offset)
+        if sequence <= self.latest or baseline not in self.views:
+            return None
+        offset += SNAPSHOT_HEAD.size
+        players = []
+        for _ in range(count):
+            index, x, y, health, bits = PLAYER.unpack_from(data, offset)
+            offset += PLAYER.size
+            players.append((index, x, y, health, PLAYER_DIRECTIONS[bits & 3], bool(bits & 4)))
+
+        view = dict(self.views[baseline])
+        count, offset = read_varint(data, offset)
+        uid = 0
+        for _ in range(count):
+            delta, offset = read_varint(data, offset)
+            uid += delta
+            view.pop(uid, None)
+        count, offset = read_varint(data, offset)
+        uid = 0
+        updated = []
+        for _ in range(count):
+            delta, offset = read_varint(data, offset)
+            uid += delta
+            mask = data[offset]
+            offset += 1
+            old = view.get(uid)
+            if old is None:
+                state = struct.unpack_from("<HHBB", data, offset)
+                offset += 6
+            else:
+                x, y, health, flags = old
+                if mask & POS:
+                    dx, offset = read_varint(data, offset)
+                    dy, offset = read_varint(data, offset)
+                    x += unzigzag(dx)
+                    y += unzigzag(dy)
+                if mask & HEALTH:
+                    health = data[offset]
+                    offset += 1
+                if mask & FLAGS:
+                    flags = data[offset]
+                    offset += 1
+                state = (x, y, health, flags)
+            view[uid] = state
+            updated.append(uid)
+
+        self.views[sequence] = view
+        self.latest = sequence
+        for old in [seq for seq in self.views if 0 < seq <= sequence - self.history]:
+            del self.views[old]
+        return Snapshot(sequence, tick, game_time, kills, waves, game_over,
+                        live_enemies, players, None if own == 0xFF else own, view, updated)
@@ -0,0 +1,182 @@
+import socket
+import time
+from typing import Dict, Optional, Tuple
+
+from game.game import Game
+from game.net.protocol import (
+    DeltaEncoder, FULL, INPUT, INPUT_BODY, JOIN, JOIN_BODY, LEAVE, VERSION, WELCOME,
+    WELCOME_BODY, HEADER, packet, packet_kind, quantize_enemies)
+from game.systems.enemy_engine import np
+from game.systems.input import InputState
+from game.systems.replay import unpack_input
+
+
+class RemoteClient:
+    """A connected client: its player, latest input and snapshot encoder"""
+
+    def __init__(self, address, player, budget: int):
+        self.address = address
+        self.player = player
+        self.input = InputState()
+        self.input_sequence = 0
+        self.last_heard = time.monotonic()
+        self.encoder = DeltaEncoder(budget)
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+
+
+class GameServer:
+    """Authoritative server: runs the simulation headlessly and plays the
+    inputs clients send over UDP.
+
+    Every client gets a player (the first one player1) and a snapshot every
+    tick_rate / snapshot_rate ticks, delta compressed against the last
+    snapshot it acknowledged and at most budget bytes large (see
+    protocol.DeltaEncoder). Clients that stay silent for timeout seconds are
+    dropped. When all players are dead the next game starts after
+    restart_delay seconds.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 7777, max_players: int = 4,
+                 snapshot_rate: int = 20, budget: int = 1200, timeout: float = 5.0,
+                 restart_delay: float = 3.0, seed: Optional[int] = None,
+                 vectorized_enemies: Optional[bool] = None):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.max_players = max_players
+        self.snapshot_rate = snapshot_rate
+        self.budget = budget
+        self.timeout = timeout
+        self.restart_delay = restart_delay
+        self.seed = seed
+        # thousands of enemies are only feasible on the NumPy engine
+        self.vectorized_enemies = np is not None if vectorized_enemies is None \
+            else vectorized_enemies
+        self.clients: Dict[Tuple[str, int], RemoteClient] = {}
+        self.ticks = 0
+        self.game = None
+        self.game_over_since = None
+        self.new_game()
+
+    def new_game(self) -> None:
+        game = Game(headless=True, seed=self.seed,
+                    vectorized_enemies=self.vectorized_enemies)
+        game.init_pygame()
+        # player1 waits for the first client, more players join with clients
+        for index, client in enumerate(self.clients.values()):
+            client.player = game.player1 if index == 0 else game.add_player()
+        self.game = game
+        self.game_over_since = None
+
+    def receive(self) -> None:
+        """Handle all datagrams waiting on the socket"""
+        while True:
+            try:
+                data, address = self.socket.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except ConnectionResetError:  # a client's port went away (Windows)
+                continue
+            kind = packet_kind(data)
+            client = self.clients.get(address)
+            if kind == JOIN and len(data) >= HEADER.size + JOIN_BODY.size:
+                self.join(address, data)
+            elif client is None:
+                continue
+            elif kind == INPUT and len(data) >= HEADER.size + INPUT_BODY.size:
+                sequence, bits, ack = INPUT_BODY.unpack_from(data, HEADER.size)
+                client.last_heard = time.monotonic()
+                if sequence > client.input_sequence:  # datagrams can be reordered
+                    client.input_sequence = sequence
+                    client.input = unpack_input(bits)
+                client.encoder.ack(ack)
+            elif kind == LEAVE:
+                self.drop(client)
+
+    def join(self, address, data: bytes) -> None:
+        (version,) = JOIN_BODY.unpack_from(data, HEADER.size)
+        client = self.clients.get(address)
+        if client is None:
+            if version != VERSION or len(self.clients) >= self.max_players:
+                self.socket.sendto(packet(FULL), address)
+                return
+            game = self.game
+            taken = {other.player for other in self.clients.values()}
+            player = game.player1 if game.player1 not in taken else game.add_player()
+            client = RemoteClient(address, player, self.budget)
+            self.clients[address] = client
+            print(f"client {address[0]}:{address[1]} joined as player "
+                  f"{self.player_index(client)}")
+        # answered again for a repeated JOIN, the first WELCOME may be lost
+        world = self.game.world
+        self.socket.sendto(packet(WELCOME, WELCOME_BODY.pack(
+            self.player_index(client), self.game.tick_rate, int(world.screen_size[0]),
+            int(world.screen_size[1]), self.snapshot_rate)), address)
+
+    def drop(self, client: RemoteClient) -> None:
+        del self.clients[client.address]
+        print(f"client {client.address[0]}:{client.address[1]} left")
+        if client.player is not self.game.player1:
+            self.game.remove_player(client.player)
+
+    def player_index(self, client: RemoteClient) -> int:
+        return self.game.players.sprites().index(client.player)
+
+    def tick(self) -> None:
+        """Receive inputs, advance the simulation a tick and send snapshots"""
+        self.receive()
+        now = time.monotonic()
+        for client in [c for c in self.clients.values() if now - c.last_heard > self.timeout]:
+            self.drop(client)
+
+        game = self.game
+        if game.game_over:
+            if self.game_over_since is None:
+                self.game_over_since = now
+            elif now - self.game_over_since >= self.restart_delay:
+                self.new_game()
+                game = self.game
+        if self.clients:
+            inputs = {client.player: client.input for client in self.clients.values()}
+            game.step({index: inputs[player] for index, player in enumerate(game.players)
+                       if player in inputs}, 1.0 / game.tick_rate)
+        self.ticks += 1
+        if self.clients and self.ticks % max(1, game.tick_rate // self.snapshot_rate) == 0:
+            self.send_snapshots()
+
+    def send_snapshots(self) -> None:
+        game = self.game
+        enemies = quantize_enemies(game)  # shared by all clients
+        for client in list(self.clients.values()):
+            data = client.encoder.encode(game, enemies, client.player)
+            try:
+                self.socket.sendto(data, client.address)
+            except OSError:
+                continue
+            client.bytes_sent += len(data)
+            client.snapshots_sent += 1
+
+    def serve(self, seconds: Optional[float] = None) -> None:
+        """Run ticks in real time, for seconds or until interrupted"""
+        tick_dt = 1.0 / self.game.tick_rate
+        start = next_tick = time.monotonic()
+        try:
+            while seconds is None or time.monotonic() - start < seconds:
+                self.tick()
+                next_tick += tick_dt
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -tick_dt * 5:
+                    next_tick = time.monotonic()  # fell behind, don't catch up
+        finally:
+            self.socket.close()
+
+    def stats(self) -> dict:
+        return {f"{address[0]}:{address[1]}": {
+            "snapshots": client.snapshots_sent,
+            "bytes": client.bytes_sent,
+            "mean_snapshot_bytes": round(client.bytes_sent / max(1, client.snapshots_sent), 1),
+        } for address, client in self.clients.items()}
@@ -0,0 +1,259 @@
+import pygame
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class FrameVariants:
+    """Flipped and tinted versions of a frame set together with their masks.
+
+    Variants are keyed by (frame index, flipped, tint) and built on first use,
+    so switching color filter or animation frame is a dictionary lookup.
+    Surfaces in baked (e.g. from the atlas) are used instead of flipping and
+    tinting, only their masks are built then.
+    """
+
+    def __init__(self, frames: Tuple[pygame.Surface, ...],
+                 baked: Optional[Dict[tuple, pygame.Surface]] = None):
+        self.frames = frames
+        self.baked = baked or {}
+        self.variants: Dict[tuple, Tuple[pygame.Surface, pygame.mask.Mask]] = {}
+
+    def get(self, index: int, flipped: bool = False,
+            tint: Optional[Tuple[int, int, int]] = None) -> Tuple[pygame.Surface, pygame.mask.Mask]:
+        """Return (surface, mask) for a frame, building it on first request"""
+        key = (index, flipped, tint)
+        variant = self.variants.get(key)
+        if variant is None:
+            variant = self.build(index, flipped, tint)
+            self.variants[key] = variant
+        return variant
+
+    def build(self, index: int, flipped: bool,
+              tint: Optional[Tuple[int, int, int]]) -> Tuple[pygame.Surface, pygame.mask.Mask]:
+        image = self.baked.get((index, flipped, tint))
+        if image is not None:
+            return image, pygame.mask.from_surface(image)
+        image = self.frames[index]
+        if flipped:
+            image = pygame.transform.flip(image, True, False)
+        else:
+            image = image.copy()
+        if tint is not None:
+            # Multiply by a semi-transparent color overlay
+            overlay = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+            overlay.fill((*tint, 128))
+            image.blit(overlay, (0, 0), special_flags=pygame.BLEND_MULT)
+        return image, pygame.mask.from_surface(image)
+
+    def prebuild(self, tints=(None,)) -> None:
+        """Build all variants for the given tints up front"""
+        for index in range(len(self.frames)):
+            for flipped in (False, True):
+                for tint in tints:
+                    self.get(index, flipped, tint)
+
+
+class RotationCache:
+    """Pre-rotated versions of an image together with their masks.
+
+    Angles are quantized to steps per full turn, so an object turning smoothly
+    reuses the same few surfaces instead of rotating its image every frame.
+    Steps in baked are used instead of rotating, only their masks are built.
+    """
+
+    def __init__(self, image: pygame.Surface, steps: int = 64,
+                 baked: Optional[Dict[int, pygame.Surface]] = None):
+        self.image = image
+        self.steps = steps
+        self.baked = baked or {}
+        self.rotations: Dict[int, Tuple[pygame.Surface, pygame.mask.Mask]] = {}
+
+    def index(self, angle: float) -> int:
+        """Quantized step for an angle in degrees (counterclockwise)"""
+        return round(angle * self.steps / 360.0) % self.steps
+
+    def get(self, angle: float) -> Tuple[pygame.Surface, pygame.mask.Mask]:
+        """Return (surface, mask) rotated to the nearest step of angle"""
+        index = self.index(angle)
+        rotation = self.rotations.get(index)
+        if rotation is None:
+            rotation = self.build(index)
+            self.rotations[index] = rotation
+        return rotation
+
+    def build(self, index: int) -> Tuple[pygame.Surface, pygame.mask.Mask]:
+        image = self.baked.get(index)
+        if image is None:
+            image = pygame.transform.rotate(self.image, index * 360.0 / self.steps)
+        return image, pygame.mask.from_surface(image)
+
+    def prebuild(self) -> None:
+        """Render every step up front"""
+        for index in range(self.steps):
+            if index not in self.rotations:
+                self.rotations[index] = self.build(index)
+
+
+class AssetCache:
+    """Process-wide registry of loaded and pre-scaled sprite frames.
+
+    Every frame set is built once per key (path, layout, target size) and then
+    shared by all entities asking for it, so the returned surfaces must be
+    treated as read-only. Frame sets are returned as tuples to make that clear.
+    """
+
+    def __init__(self):
+        self.assets: Dict[Hashable, object] = {}
+        # baked atlas the preloaded frames are subsurfaces of (see atlas.py)
+        self.atlas: Optional[pygame.Surface] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Hashable, build: Callable[[], object]):
+        """Return the cached asset for key, building it on the first request"""
+        asset = self.assets.get(key)
+        if asset is not None:
+            self.hits += 1
+            return asset
+        self.misses += 1
+        asset = build()
+        self.assets[key] = asset
+        return asset
+
+    def preload(self, assets: Dict[Hashable, object],
+                atlas: Optional[pygame.Surface] = None) -> None:
+        """Add prebuilt assets under their keys, keeping what is already cached"""
+        for key, asset in assets.items():
+            self.assets.setdefault(key, asset)
+        if atlas is not None:
+            self.atlas = atlas
+
+    def load_sheet(self, path: str) -> pygame.Surface:
+        """Load a sprite sheet once and keep it converted for fast blitting"""
+        return self._lookup(("sheet", path),
+                            lambda: pygame.image.load(path).convert_alpha())
+
+    def get_image(self, path: str, size: Tuple[int, int]) -> pygame.Surface:
+        """Single image scaled to size"""
+        key = ("image", path, tuple(size))
+        return self._lookup(key, lambda: pygame.transform.scale(
+            self.load_sheet(path), size))
+
+    def get_strip(self, path: str, frame_count: int,
+                  size: Tuple[int, int]) -> Tuple[pygame.Surface, ...]:
+        """Frames of a single row sprite sheet, each scaled to size"""
+        key = ("strip", path, frame_count, tuple(size))
+
+        def build():
+            sheet = self.load_sheet(path)
+            frame_w = sheet.get_width() // frame_count
+            frame_h = sheet.get_height()
+            return tuple(
+                pygame.transform.scale(
+                    sheet.subsurface((i * frame_w, 0, frame_w, frame_h)), size)
+                for i in range(frame_count))
+
+        return self._lookup(key, build)
+
+    def get_strip_variants(self, path: str, frame_count: int,
+                           size: Tuple[int, int]) -> FrameVariants:
+        """Flip/tint variant cache for a strip loaded with get_strip"""
+        key = ("strip_variants", path, frame_count, tuple(size))
+        return self._lookup(key, lambda: FrameVariants(
+            self.get_strip(path, frame_count, size)))
+
+    def get_rotations(self, path: str, size: Tuple[int, int],
+                      steps: int = 64) -> RotationCache:
+        """Rotation cache for an image loaded with get_image"""
+        key = ("rotations", path, tuple(size), steps)
+        return self._lookup(key, lambda: RotationCache(
+            self.get_image(path, size), steps))
+
+    def get_grid(self, path: str, cols: int, rows: int,
+                 crop_size: Tuple[int, int],
+                 size: Tuple[int, int]) -> Tuple[Tuple[pygame.Surface, ...], ...]:
+        """Frames of a cols x rows sprite sheet, one tuple per row.
+
+        Each cell is cropped to crop_size around its center before being scaled
+        to size.
+        """
+        key = ("grid", path, cols, rows, tuple(crop_size), tuple(size))
+
+        def build():
+            sheet = self.load_sheet(path)
+            frame_w = sheet.get_width() // cols
+            frame_h = sheet.get_height() // rows
+            crop_w, crop_h = crop_size
+            crop_x = (frame_w - crop_w) // 2
+            crop_y = (frame_h - crop_h) // 2
+            return tuple(
+                tuple(
+                    pygame.transform.scale(
+                        sheet.subsurface((col * frame_w + crop_x,
+                                          row * frame_h + crop_y,
+                                          crop_w, crop_h)), size)
+                    for col in range(cols))
+                for row in range(rows))
+
+        return self._lookup(key, build)
+
+    def get_grid_masks(self, path: str, cols: int, rows: int,
+                       crop_size: Tuple[int, int], size: Tuple[int, int]):
+        """(mask, tight rect) for every frame of get_grid, one tuple per row.
+
+        The tight rect is the first bounding rect of the mask relative to the
+        frame, or None for an empty frame.
+        """
+        key = ("grid_masks", path, cols, rows, tuple(crop_size), tuple(size))
+
+        def build():
+            masks = []
+            for row in self.get_grid(path, cols, rows, crop_size, size):
+                row_masks = []
+                for frame in row:
+                    mask = pygame.mask.from_surface(frame)
+                    bounds = mask.get_bounding_rects()
+                    row_masks.append((mask, bounds[0] if bounds else None))
+                masks.append(tuple(row_masks))
+            return tuple(masks)
+
+        return self._lookup(key, build)
+
+    def bytes_held(self) -> int:
+        """Approximate pixel memory held by all cached surfaces"""
+        total = 0
+        if self.atlas is not None:
+            total += self.atlas.get_pitch() * self.atlas.get_height()
+        stack = list(self.assets.values())
+        while stack:
+            asset = stack.pop()
+            if isinstance(asset, pygame.Surface):
+                if self.atlas is not None and asset.get_parent() is self.atlas:
+                    continue  # counted with the atlas
+                total += asset.get_pitch() * asset.get_height()
+            elif isinstance(asset, (tuple, list)):
+                stack.extend(asset)
+            elif isinstance(asset, FrameVariants):
+                stack.extend(image for image, _ in asset.variants.values())
+            elif isinstance(asset, RotationCache):
+                stack.extend(image for image, _ in asset.rotations.values())
+        return total
+
+    def stats(self) -> dict:
+        """Hit/miss counters and memory usage for debugging"""
+        return {
+            "entries": len(self.assets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self.bytes_held(),
+        }
+
+    def clear(self) -> None:
+        """Drop all cached assets (e.g. after the display mode changes)"""
+        self.assets.clear()
+        self.atlas = None
+        self.hits = 0
+        self.misses = 0
+
+
+# shared instance used by all entities
+asset_cache = AssetCache()
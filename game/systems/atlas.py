@@ -0,0 +1,292 @@
+import hashlib
+import json
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from game.systems.assets import AssetCache, FrameVariants, RotationCache, asset_cache
+
+try:
+    import mmap
+except ImportError:  # not every pygbag build has it
+    mmap = None
+
+# The atlas is every frame set the entities ask the asset cache for, baked
+# offline: cropped, scaled, flipped, tinted and rotated frames packed into one
+# image, stored as raw BGRA rows so it loads without decoding (and without
+# copying, memory mapped), plus an index that maps the asset cache keys to
+# rects of that image. Loading fills the cache with subsurfaces of the atlas;
+# whatever the index doesn't have is still built from the PNGs on demand.
+#
+# Index layout (little endian):
+#   header, sources of [path (u16 length + UTF-8), SHA-1 of the file]
+#   frames of [x, y, w, h] in the atlas (identical frames are stored once)
+#   entries of [cache key (u16 length + JSON), payload by key kind]:
+#     image          frame
+#     strip          count, frames
+#     grid           rows, cols, frames row by row
+#     grid_masks     rows, cols, tight rect per frame of the grid (w 0 = none)
+#     strip_variants count, [frame index, flipped, tinted, tint rgb, frame]
+#     rotations      count, [step, frame]
+# Masks are not stored: the player's are taken from the alpha of the atlas
+# frames at load, the variant and rotation caches build theirs on first use.
+ATLAS_PATH = "game/assets/atlas"  # .idx and .bgra
+MAGIC = b"RLAT"
+VERSION = 1
+
+# magic, version, atlas width, atlas height, sources, frames, entries
+HEADER = struct.Struct("<4sHHHIII")
+FRAME = struct.Struct("<4H")
+TIGHT_RECT = struct.Struct("<hhHH")
+VARIANT = struct.Struct("<H??3BI")
+ROTATION = struct.Struct("<HI")
+COUNT = struct.Struct("<I")
+SIZE = struct.Struct("<HH")
+LENGTH = struct.Struct("<H")
+
+# entry kinds in the order they are stored, frame sets before what refers to them
+KINDS = ("image", "strip", "grid", "grid_masks", "strip_variants", "rotations")
+# tints Enemy applies (elite, hit, dying), baked for every frame and facing
+ENEMY_TINTS = (None, (160, 80, 255), (255, 165, 0), (255, 0, 0))
+ATLAS_WIDTH = 1024
+
+
+def file_digest(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def as_tuples(value):
+    """JSON arrays back to the tuples cache keys are made of"""
+    if isinstance(value, list):
+        return tuple(as_tuples(item) for item in value)
+    return value
+
+
+def pack_frames(frames: List[pygame.Surface]) -> Tuple[List[tuple], int]:
+    """Shelf-pack frames tallest first, returns their rects and the height"""
+    rects: List[Optional[tuple]] = [None] * len(frames)
+    x = y = shelf = 0
+    for index in sorted(range(len(frames)), key=lambda i: -frames[i].get_height()):
+        w, h = frames[index].get_size()
+        if x + w > ATLAS_WIDTH:
+            x, y, shelf = 0, y + shelf, 0
+        rects[index] = (x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+    return rects, y + shelf
+
+
+def bake_atlas(path: str = ATLAS_PATH) -> dict:
+    """Build the frames of a player, an enemy and all weapons from the PNGs
+    and write them as an atlas (needs an initialised display)"""
+    from game.entities.enemy import Enemy
+    from game.entities.player import Player
+    from game.systems.weapons import weapon_registry
+
+    cache = asset_cache
+    cache.clear()  # bake from the PNGs, not from a previous atlas
+    game = _BakeGame()
+    Player(game)
+    enemy = Enemy(game, None)
+    if enemy.variants is not None:
+        enemy.variants.prebuild(ENEMY_TINTS)
+    for archetype in weapon_registry.load().values():
+        archetype.load_sprites()  # again, they may have been loaded before the clear
+    for key, asset in cache.assets.items():
+        if key[0] == "rotations":
+            asset.prebuild()
+
+    frames: List[pygame.Surface] = []
+    frame_ids: Dict[tuple, int] = {}  # (size, pixels) -> frame
+
+    def frame(surface: pygame.Surface) -> int:
+        pixels = (surface.get_size(), pygame.image.tobytes(surface, "BGRA"))
+        if pixels not in frame_ids:
+            frame_ids[pixels] = len(frames)
+            frames.append(surface)
+        return frame_ids[pixels]
+
+    entries = bytearray()
+    entry_count = 0
+    sources = {}
+    for key in sorted((key for key in cache.assets if key[0] in KINDS),
+                      key=lambda key: KINDS.index(key[0])):
+        kind, asset = key[0], cache.assets[key]
+        name = json.dumps(key).encode()
+        entries += LENGTH.pack(len(name)) + name
+        if kind == "image":
+            entries += COUNT.pack(frame(asset))
+        elif kind == "strip":
+            entries += COUNT.pack(len(asset))
+            entries += b"".join(COUNT.pack(frame(image)) for image in asset)
+        elif kind == "grid":
+            entries += SIZE.pack(len(asset), len(asset[0]))
+            entries += b"".join(COUNT.pack(frame(image)) for row in asset for image in row)
+        elif kind == "grid_masks":
+            entries += SIZE.pack(len(asset), len(asset[0]))
+            for row in asset:
+                for _, tight in row:
+                    entries += TIGHT_RECT.pack(*tight) if tight else TIGHT_RECT.pack(0, 0, 0, 0)
+        elif kind == "strip_variants":
+            entries += COUNT.pack(len(asset.variants))
+            for (index, flipped, tint), (image, _) in asset.variants.items():
+                entries += VARIANT.pack(index, flipped, tint is not None,
+                                        *(tint or (0, 0, 0)), frame(image))
+        elif kind == "rotations":
+            entries += COUNT.pack(len(asset.rotations))
+            for step, (image, _) in sorted(asset.rotations.items()):
+                entries += ROTATION.pack(step, frame(image))
+        entry_count += 1
+        sources[key[1]] = file_digest(key[1])
+
+    rects, height = pack_frames(frames)
+    pixels = bytearray(ATLAS_WIDTH * height * 4)
+    for surface, (x, y, w, h) in zip(frames, rects):
+        data = pygame.image.tobytes(surface, "BGRA")
+        for row in range(h):
+            start = ((y + row) * ATLAS_WIDTH + x) * 4
+            pixels[start:start + w * 4] = data[row * w * 4:(row + 1) * w * 4]
+
+    index = bytearray(HEADER.pack(MAGIC, VERSION, ATLAS_WIDTH, height,
+                                  len(sources), len(frames), entry_count))
+    for source, digest in sorted(sources.items()):
+        name = source.encode()
+        index += LENGTH.pack(len(name)) + name + digest
+    for rect in rects:
+        index += FRAME.pack(*rect)
+    index += entries
+    with open(path + ".bgra", "wb") as f:
+        f.write(pixels)
+    with open(path + ".idx", "wb") as f:
+        f.write(index)
+    cache.clear()
+    return {"frames": len(frames), "entries": entry_count,
+            "size": (ATLAS_WIDTH, height), "bytes": len(pixels) + len(index)}
+
+
+class _BakeGame:
+    """Just enough of a Game for entities to load their frames"""
+
+    def __init__(self):
+        self.enemies = pygame.sprite.Group()
+        self.players = pygame.sprite.Group()
+
+
+def map_pixels(path: str, size: int):
+    """The atlas pixels as a buffer: a private memory map where available
+    (pages are read on first use and shared until written to), else read"""
+    with open(path, "rb") as f:
+        if mmap is not None:
+            try:
+                return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY)
+            except (OSError, ValueError):
+                pass
+        return bytearray(f.read(size))
+
+
+def load_atlas(path: str = ATLAS_PATH, cache: AssetCache = asset_cache) -> bool:
+    """Fill cache from a baked atlas, False (and nothing loaded) if there is
+    none or it is older than the PNGs it was baked from"""
+    try:
+        with open(path + ".idx", "rb") as f:
+            index = f.read()
+    except OSError:
+        return False
+    if len(index) < HEADER.size:
+        return False
+    magic, version, width, height, source_count, frame_count, entry_count = \
+        HEADER.unpack_from(index)
+    if magic != MAGIC or version != VERSION:
+        return False
+    offset = HEADER.size
+    for _ in range(source_count):
+        (length,) = LENGTH.unpack_from(index, offset)
+        offset += LENGTH.size
+        source = index[offset:offset + length].decode()
+        digest = index[offset + length:offset + length + 20]
+        offset += length + 20
+        try:
+            if file_digest(source) != digest:
+                return False
+        except OSError:
+            pass  # shipped without the PNGs
+
+    try:
+        pixels = map_pixels(path + ".bgra", width * height * 4)
+    except (OSError, ValueError):
+        return False
+    atlas = pygame.image.frombuffer(pixels, (width, height), "BGRA")
+    probe = pygame.Surface((1, 1), pygame.SRCALPHA)
+    if pygame.display.get_surface() is not None:
+        probe = probe.convert_alpha()
+    if atlas.get_masks() != probe.get_masks():
+        atlas = atlas.convert_alpha()  # blits would convert every pixel otherwise
+
+    frames = []
+    for _ in range(frame_count):
+        frames.append(atlas.subsurface(FRAME.unpack_from(index, offset)))
+        offset += FRAME.size
+
+    def ids(count: int) -> List[int]:
+        return list(struct.unpack_from(f"<{count}I", index, offset))
+
+    assets = {}
+    grid_cells: Dict[tuple, List[int]] = {}  # frames of the grids, for their masks
+    for _ in range(entry_count):
+        (length,) = LENGTH.unpack_from(index, offset)
+        offset += LENGTH.size
+        key = as_tuples(json.loads(index[offset:offset + length]))
+        offset += length
+        kind = key[0]
+        if kind == "image":
+            (frame_id,) = COUNT.unpack_from(index, offset)
+            offset += COUNT.size
+            assets[key] = frames[frame_id]
+        elif kind == "strip":
+            (count,) = COUNT.unpack_from(index, offset)
+            offset += COUNT.size
+            assets[key] = tuple(frames[i] for i in ids(count))
+            offset += count * COUNT.size
+        elif kind == "grid":
+            rows, cols = SIZE.unpack_from(index, offset)
+            offset += SIZE.size
+            cells = ids(rows * cols)
+            offset += rows * cols * COUNT.size
+            assets[key] = tuple(tuple(frames[i] for i in cells[row * cols:(row + 1) * cols])
+                                for row in range(rows))
+            grid_cells[key[1:]] = cells
+        elif kind == "grid_masks":
+            rows, cols = SIZE.unpack_from(index, offset)
+            offset += SIZE.size
+            cells = grid_cells[key[1:]]
+            row_masks = []
+            for row in range(rows):
+                row_masks.append([])
+                for col in range(cols):
+                    x, y, w, h = TIGHT_RECT.unpack_from(index, offset)
+                    offset += TIGHT_RECT.size
+                    mask = pygame.mask.from_surface(frames[cells[row * cols + col]])
+                    row_masks[-1].append((mask, pygame.Rect(x, y, w, h) if w else None))
+            assets[key] = tuple(tuple(row) for row in row_masks)
+        elif kind == "strip_variants":
+            (count,) = COUNT.unpack_from(index, offset)
+            offset += COUNT.size
+            baked = {}
+            for _ in range(count):
+                frame, flipped, tinted, r, g, b, frame_id = VARIANT.unpack_from(index, offset)
+                offset += VARIANT.size
+                baked[(frame, flipped, (r, g, b) if tinted else None)] = frames[frame_id]
+            assets[key] = FrameVariants(assets[("strip",) + key[1:]], baked)
+        elif kind == "rotations":
+            (count,) = COUNT.unpack_from(index, offset)
+            offset += COUNT.size
+            baked = {}
+            for _ in range(count):
+                step, frame_id = ROTATION.unpack_from(index, offset)
+                offset += ROTATION.size
+                baked[step] = frames[frame_id]
+            assets[key] = RotationCache(assets[("image",) + key[1:3]], key[3], baked)
+    cache.preload(assets, atlas)
+    return True
@@ -4,6 +4,8 @@ from game.systems.projectile import Projectile
 
 
 class Attack:
+    __slots__ = ("weapon", "attack_counter", "timer", "attack_duration", "projectiles")
+
     def __init__(self, weapon):
         self.weapon = weapon
         self.attack_counter = 0
@@ -24,6 +26,11 @@ class Attack:
                 self.fire_projectile(enemy)
 
     def fire_projectile(self, target):
-        projectile = Projectile(self, self.weapon, target, self.weapon.damage)
+        if self.weapon.player:
+            # reuse dead projectiles through the game's pool
+            projectile = self.weapon.player.game.projectile_pool.acquire(
+                self, self.weapon, target, self.weapon.damage)
+        else:
+            projectile = Projectile(self, self.weapon, target, self.weapon.damage)
         self.projectiles.add(projectile)
         projectile.launch()
@@ -0,0 +1,116 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # Game runs without crowd separation then
+    np = None
+
+# turns the pair index into a direction for enemies stacked on the same pixel
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+class CrowdSeparation:
+    """Pushes enemies apart so they don't stack on the same pixels.
+
+    Boids-style separation: every enemy is pushed away from the enemies within
+    radius, each weighted by 1 / distance - 1 / radius. The neighbour query
+    is bounded: positions are hashed into cells of twice the radius and at
+    most max_neighbors / 4 candidates (the ones closest along x) are taken
+    from each cell of the 2x2 block around an enemy. The whole crowd is
+    handled in one batched NumPy pass, so the cost per enemy stays flat no
+    matter how many enemies pile up.
+    """
+
+    def __init__(self, radius: float = 28.0, max_neighbors: int = 16,
+                 strength: float = 120.0):
+        if np is None:
+            raise ImportError("CrowdSeparation requires numpy")
+        self.radius = radius
+        self.max_neighbors = max_neighbors
+        self.strength = strength  # px per second, also the largest push speed
+
+    def displacement(self, positions, active, dt: float):
+        """Separation offset of every enemy for a tick of dt seconds.
+
+        positions are (x, y) pairs, active flags which enemies take part
+        (dead ones neither push nor get pushed). Returns an (n, 2) array.
+        """
+        pos = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        push = np.zeros_like(pos)
+        index = np.flatnonzero(np.asarray(active, dtype=bool))
+        m = len(index)
+        if m < 2 or dt <= 0:
+            return push
+        radius = self.radius
+        per_cell = max(1, self.max_neighbors // 4)
+
+        # spatial hash with cells twice the radius: everything within radius
+        # lies in the 2x2 block of cells on the enemy's side of its own cell.
+        # A spare ring of cells around the occupied area keeps keys from
+        # wrapping.
+        scaled = pos[index] / (2 * radius)
+        cell = np.floor(scaled)
+        frac = scaled - cell  # [0, 1) inside the cell
+        cell = cell.astype(np.int64)
+        cell -= cell.min(axis=0) - 1
+        height = int(cell[:, 1].max()) + 2
+        cells = (int(cell[:, 0].max()) + 2) * height
+        key = cell[:, 0] * height + cell[:, 1]
+
+        # sort by cell, then by x inside the cell (y breaks ties, so the
+        # result doesn't depend on the input order); working on the sorted
+        # copy keeps the neighbour gathers on contiguous runs
+        order = np.lexsort((frac[:, 1], key + frac[:, 0] * 0.5))
+        key = key[order]
+        frac = frac[order]
+        x = pos[index[order], 0]
+        y = pos[index[order], 1]
+        first = np.zeros(cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key, minlength=cells), out=first[1:])
+
+        # per_cell entries of each cell of the block, the ones nearest along
+        # x: around the enemy's own x in its own column, the near end of the
+        # run in the neighbouring column
+        side_x = np.where(frac[:, 0] < 0.5, -1, 1)
+        side_y = np.where(frac[:, 1] < 0.5, -1, 1)
+        column = side_x * height
+        neighbour = np.stack((key, key + side_y, key + column, key + column + side_y), axis=1)
+        near_end = (side_x < 0).astype(np.float64)
+        where = np.stack((frac[:, 0], frac[:, 0], near_end, near_end), axis=1)
+        run_start = first[neighbour]
+        run_end = first[neighbour + 1]
+        spare = np.maximum(run_end - run_start - per_cell, 0)
+        start = run_start + np.rint(spare * where).astype(np.int64)
+        slots = start[:, :, None] + np.arange(per_cell)
+        valid = (slots < run_end[:, :, None]).reshape(m, -1)
+        candidate = np.minimum(slots, m - 1).reshape(m, -1)
+        valid &= candidate != np.arange(m)[:, None]
+
+        delta_x = x[:, None] - x[candidate]  # away from the neighbour
+        delta_y = y[:, None] - y[candidate]
+        dist_sq = delta_x * delta_x + delta_y * delta_y
+        valid &= dist_sq < radius * radius
+
+        # (1 - distance / radius) / distance: the overlap weight, also turning
+        # delta into a unit vector
+        inverse = 1.0 / np.sqrt(np.where(valid, np.maximum(dist_sq, 1e-18), np.inf))
+        weight = np.where(valid, inverse - 1.0 / radius, 0.0)
+        stacked = valid & (dist_sq == 0)
+        if stacked.any():
+            # same pixel: split the pair in opposite directions
+            rows, cols = np.nonzero(stacked)
+            other = candidate[rows, cols]
+            angle = GOLDEN_ANGLE * np.minimum(rows, other) + np.pi * (rows > other)
+            delta_x[rows, cols] = np.cos(angle)
+            delta_y[rows, cols] = np.sin(angle)
+            weight[rows, cols] = 1.0
+        force = np.empty((m, 2))
+        force[:, 0] = np.einsum("nc,nc->n", weight, delta_x)
+        force[:, 1] = np.einsum("nc,nc->n", weight, delta_y)
+        force *= self.strength
+
+        # never faster than strength, however many neighbours push
+        length = np.hypot(force[:, 0], force[:, 1])
+        scale = np.minimum(1.0, self.strength / np.maximum(length, 1e-12))
+        push[index[order]] = force * (scale * dt)[:, None]
+        return push
@@ -0,0 +1,390 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # the engine is optional, Game falls back to Enemy.update
+    np = None
+
+
+# enemy states as stored in the engine's state array
+STATES = ("idle", "move", "attack_melee", "dead")
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+IDLE, MOVE, ATTACK_MELEE, DEAD = range(len(STATES))
+
+
+class EnemyEngine:
+    """Struct-of-arrays simulation for enemies.
+
+    Position, direction, speed, health, state, melee cooldowns and animation
+    timers of every attached enemy live in contiguous NumPy arrays, and the
+    per-frame logic of Enemy.update (steering, rotation rate limiting,
+    cardinal snapping, boundary clamping, melee cooldowns) runs as batched
+    array operations. The Enemy sprites become thin views that are only
+    used for drawing and pixel-perfect collision.
+
+    The results match the per-object path up to floating point rounding:
+    NumPy and pygame's vectors round differently in the last bits, and
+    over a long game such a difference can tip a collision or a kill, so a
+    seeded game can end differently in the two modes. Compare benchmark and
+    balance results within one mode.
+    """
+
+    # name -> (dtype, row shape)
+    FIELDS = {
+        "pos": ("f8", (2,)),
+        "direction": ("f8", (2,)),
+        "speed": ("f8", ()),
+        "rotation_speed": ("f8", ()),
+        "half_size": ("f8", (2,)),
+        "size": ("i4", (2,)),
+        "health": ("f8", ()),
+        "state": ("i1", ()),
+        "is_melee": ("?", ()),
+        "melee_damage": ("f8", ()),
+        "melee_interval": ("f8", ()),
+        "melee_last_attack": ("f8", ()),
+        "anim_timer": ("f8", ()),
+        "anim_interval": ("f8", ()),
+        "anim_frame": ("i4", ()),
+        "frame_count": ("i4", ()),
+    }
+
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise ImportError("EnemyEngine requires numpy")
+        self.capacity = 0
+        self.count = 0
+        self.enemies = []  # slot -> Enemy
+        self.arrays = {}
+        self.grow(capacity)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def grow(self, capacity: int) -> None:
+        """Resize all arrays to hold at least capacity enemies"""
+        for name, (dtype, shape) in self.FIELDS.items():
+            new = np.zeros((capacity,) + shape, dtype=dtype)
+            old = self.arrays.get(name)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            self.arrays[name] = new
+            # also exposed as attributes (engine.pos, engine.health, ...)
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def add(self, enemy) -> int:
+        """Attach an enemy, copying its current state into the arrays"""
+        if self.count == self.capacity:
+            self.grow(self.capacity * 2)
+        slot = self.count
+        self.count += 1
+        self.enemies.append(enemy)
+
+        a = self.arrays
+        a["pos"][slot] = (enemy.pos.x, enemy.pos.y)
+        a["direction"][slot] = (enemy.direction.x, enemy.direction.y)
+        a["speed"][slot] = enemy.speed
+        a["rotation_speed"][slot] = enemy.rotation_speed
+        a["half_size"][slot] = (enemy.width / 2, enemy.height / 2)
+        a["size"][slot] = (enemy.width, enemy.height)
+        a["health"][slot] = enemy.health
+        a["state"][slot] = STATE_CODES[enemy.state]
+        a["is_melee"][slot] = enemy.is_melee
+        a["melee_damage"][slot] = enemy.melee_damage
+        a["melee_interval"][slot] = 1.0 / enemy.melee_attack_speed
+        a["melee_last_attack"][slot] = enemy.melee_last_attack_time
+        if enemy.frames:
+            a["anim_timer"][slot] = enemy.animation_timer
+            a["anim_interval"][slot] = 1.0 / enemy.animation_speed
+            a["anim_frame"][slot] = enemy.current_frame
+            a["frame_count"][slot] = len(enemy.frames)
+        else:
+            a["anim_interval"][slot] = math.inf
+            a["frame_count"][slot] = 1
+
+        enemy.attach_engine(self, slot)
+        return slot
+
+    def extend(self, enemies) -> None:
+        """Attach many enemies at once, same as add() for each of them in order"""
+        if not enemies:
+            return
+        start, end = self.count, self.count + len(enemies)
+        if end > self.capacity:
+            self.grow(max(end, self.capacity * 2))
+        self.count = end
+        self.enemies.extend(enemies)
+
+        a = self.arrays
+        animated = [bool(enemy.frames) for enemy in enemies]
+        a["pos"][start:end] = [(enemy.pos.x, enemy.pos.y) for enemy in enemies]
+        a["direction"][start:end] = [(enemy.direction.x, enemy.direction.y)
+                                     for enemy in enemies]
+        a["speed"][start:end] = [enemy.speed for enemy in enemies]
+        a["rotation_speed"][start:end] = [enemy.rotation_speed for enemy in enemies]
+        a["size"][start:end] = [(enemy.width, enemy.height) for enemy in enemies]
+        a["half_size"][start:end] = a["size"][start:end] / 2
+        a["health"][start:end] = [enemy.health for enemy in enemies]
+        a["state"][start:end] = [STATE_CODES[enemy.state] for enemy in enemies]
+        a["is_melee"][start:end] = [enemy.is_melee for enemy in enemies]
+        a["melee_damage"][start:end] = [enemy.melee_damage for enemy in enemies]
+        a["melee_interval"][start:end] = [1.0 / enemy.melee_attack_speed
+                                          for enemy in enemies]
+        a["melee_last_attack"][start:end] = [enemy.melee_last_attack_time
+                                             for enemy in enemies]
+        a["anim_timer"][start:end] = [enemy.animation_timer if frames else 0.0
+                                      for enemy, frames in zip(enemies, animated)]
+        a["anim_interval"][start:end] = [1.0 / enemy.animation_speed if frames else math.inf
+                                         for enemy, frames in zip(enemies, animated)]
+        a["anim_frame"][start:end] = [enemy.current_frame if frames else 0
+                                      for enemy, frames in zip(enemies, animated)]
+        a["frame_count"][start:end] = [len(enemy.frames) if frames else 1
+                                       for enemy, frames in zip(enemies, animated)]
+
+        for slot, enemy in enumerate(enemies, start):
+            enemy.attach_engine(self, slot)
+
+    def remove(self, enemy) -> None:
+        """Detach an enemy, moving the last one into its slot"""
+        slot = enemy.slot
+        if slot < 0 or slot >= self.count or self.enemies[slot] is not enemy:
+            return
+        enemy.detach_engine()
+
+        last = self.count - 1
+        if slot != last:
+            for array in self.arrays.values():
+                array[slot] = array[last]
+            moved = self.enemies[last]
+            self.enemies[slot] = moved
+            moved.slot = slot
+        self.enemies.pop()
+        self.count = last
+
+    def clear(self, copy_back: bool = True) -> None:
+        """Detach all enemies; without copy_back their sprites keep stale
+        state, for callers that overwrite it anyway"""
+        for enemy in self.enemies:
+            if copy_back:
+                enemy.detach_engine()
+            else:
+                enemy.attach_engine(None, -1)
+        self.enemies = []
+        self.count = 0
+
+    def update(self, world, dt: float, players, current_time: float,
+               flow_field=None, separation=None) -> None:
+        """Advance all attached enemies by dt.
+
+        With a flow_field (navigation.FlowField) the nearest player and the
+        walking direction are sampled from it per cell, otherwise the closest
+        player is searched for every enemy. separation is an optional (n, 2)
+        array of offsets added to every step (see crowd.CrowdSeparation).
+        """
+        n = self.count
+        if n == 0:
+            return
+        a = self.arrays
+        pos = a["pos"][:n]
+        direction = a["direction"][:n]
+        state = a["state"][:n]
+        alive = state != DEAD
+
+        # Step 1: direction to the closest player
+        players = list(players)
+        # players the target indices refer to
+        targets = players
+        target = np.full(n, -1)
+        to_player = np.zeros((n, 2))
+        if flow_field is not None:
+            targets = flow_field.players
+            if targets:
+                target, to_player = self.sample_field(flow_field, pos)
+        elif players:
+            player_pos = np.array([(p.pos.x, p.pos.y) for p in players])
+            delta = player_pos[None, :, :] - pos[:, None, :]
+            dist_sq = np.einsum("npk,npk->np", delta, delta)
+            target = np.argmin(dist_sq, axis=1)
+            to_player = delta[np.arange(n), target]
+            length = np.hypot(to_player[:, 0], to_player[:, 1])
+            has_dir = length > 0
+            to_player[has_dir] /= length[has_dir, None]
+            to_player[~has_dir] = 0.0
+
+        # Step 2-5: rotate current direction toward the player
+        self.steer(direction, to_player, a["rotation_speed"][:n], dt, alive)
+
+        # animation frames, only enemies whose frame changes touch Python
+        self.advance_animation(dt, alive)
+
+        # Step 6: move or attack depending on collision with a player
+        new_pos = pos + direction * (a["speed"][:n] * dt)[:, None]
+        if separation is not None:
+            new_pos += separation
+        collided = np.zeros(n, dtype=bool)
+        if players:
+            collided = self.collide_players(new_pos, players, alive)
+        attack = collided & a["is_melee"][:n] & alive
+        moving = alive & ~attack
+
+        if attack.any():
+            self.melee(np.flatnonzero(attack), target, targets, current_time)
+
+        # move and clamp to world boundaries
+        world_rect = world.get_boundaries()
+        half = a["half_size"][:n]
+        new_pos[:, 0] = np.clip(new_pos[:, 0], world_rect.left + half[:, 0],
+                                world_rect.right - half[:, 0])
+        new_pos[:, 1] = np.clip(new_pos[:, 1], world_rect.top + half[:, 1],
+                                world_rect.bottom - half[:, 1])
+        pos[moving] = new_pos[moving]
+        state[moving] = MOVE
+
+        self.sync_sprites()
+
+    @staticmethod
+    def sample_field(field, pos):
+        """Batched FlowField.sample: (target index, unit direction) per enemy"""
+        source, direct, flow = field.arrays()
+        size = field.cell_size
+        col = np.clip(((pos[:, 0] - field.left) // size).astype(np.int64), 0, field.cols - 1)
+        row = np.clip(((pos[:, 1] - field.top) // size).astype(np.int64), 0, field.rows - 1)
+        cell = row * field.cols + col
+        target = source[cell]
+        to_player = flow[cell]  # fancy indexing copies
+
+        # straight at the player's exact position from direct cells
+        straight = direct[cell] & (target >= 0)
+        if straight.any():
+            player_pos = np.array([(p.pos.x, p.pos.y) for p in field.players])
+            delta = player_pos[target[straight]] - pos[straight]
+            length = np.hypot(delta[:, 0], delta[:, 1])
+            has_dir = length > 0
+            delta[has_dir] /= length[has_dir, None]
+            delta[~has_dir] = 0.0
+            to_player[straight] = delta
+        to_player[target < 0] = 0.0
+        return target, to_player
+
+    @staticmethod
+    def steer(direction, to_player, rotation_speed, dt: float, alive) -> None:
+        """Batched Enemy.update_direction"""
+        has_target = alive & ((to_player[:, 0] != 0) | (to_player[:, 1] != 0))
+        dot = np.einsum("nk,nk->n", direction, to_player)
+
+        # player is behind: snap to the dominant cardinal direction
+        behind = has_target & (dot < 0)
+        if behind.any():
+            dx = to_player[behind, 0]
+            dy = to_player[behind, 1]
+            horizontal = np.abs(dx) > np.abs(dy)
+            snapped = np.zeros((len(dx), 2))
+            snapped[:, 0] = np.where(horizontal, np.where(dx > 0, 1.0, -1.0), 0.0)
+            snapped[:, 1] = np.where(horizontal, 0.0, np.where(dy > 0, 1.0, -1.0))
+            direction[behind] = snapped
+
+        # otherwise rotate with a limited turn rate
+        turn = has_target & (dot >= 0)
+        if turn.any():
+            current = np.arctan2(direction[turn, 1], direction[turn, 0])
+            wanted = np.arctan2(to_player[turn, 1], to_player[turn, 0])
+            diff = (wanted - current + np.pi) % (2 * np.pi) - np.pi
+            max_rotation = rotation_speed[turn] * dt
+            angle = np.where(np.abs(diff) <= max_rotation, wanted,
+                             current + np.copysign(max_rotation, diff))
+            direction[turn, 0] = np.cos(angle)
+            direction[turn, 1] = np.sin(angle)
+
+    def advance_animation(self, dt: float, alive) -> None:
+        n = self.count
+        a = self.arrays
+        timer = a["anim_timer"][:n]
+        timer[alive] += dt
+        advance = alive & (timer >= a["anim_interval"][:n])
+        if not advance.any():
+            return
+        timer[advance] = 0.0
+        frames = a["anim_frame"][:n]
+        frames[advance] = (frames[advance] + 1) % a["frame_count"][:n][advance]
+        for slot in np.flatnonzero(advance).tolist():
+            enemy = self.enemies[slot]
+            enemy.current_frame = int(frames[slot])
+            enemy.apply_color_filter(enemy.color_filter)
+
+    def collide_players(self, new_pos, players, alive):
+        """Rect overlap against all players, refined with the sprite masks"""
+        n = self.count
+        size = self.arrays["size"][:n]
+        # same integer rect as Enemy.check_collision_at_position
+        left = new_pos[:, 0].astype(np.int64) - size[:, 0] // 2
+        top = new_pos[:, 1].astype(np.int64) - size[:, 1] // 2
+        right = left + size[:, 0]
+        bottom = top + size[:, 1]
+
+        collided = np.zeros(n, dtype=bool)
+        for player in players:
+            rect = player.rect
+            overlap = (alive & (left < rect.right) & (rect.left < right)
+                       & (top < rect.bottom) & (rect.top < bottom))
+            for slot in np.flatnonzero(overlap & ~collided).tolist():
+                enemy = self.enemies[slot]
+                if not hasattr(player, 'mask') or not enemy.mask:
+                    collided[slot] = True
+                    continue
+                offset = (rect.x - int(left[slot]), rect.y - int(top[slot]))
+                if enemy.mask.overlap(player.mask, offset) is not None:
+                    collided[slot] = True
+        return collided
+
+    def melee(self, slots, target, players, current_time: float) -> None:
+        """Batched Enemy.attack_melee for the enemies touching a player"""
+        a = self.arrays
+        ready = (current_time - a["melee_last_attack"][slots]
+                 >= a["melee_interval"][slots])
+        a["state"][slots[~ready]] = IDLE
+        # like Enemy.attack_melee, nothing happens without a target player
+        attacking = slots[ready & (target[slots] >= 0)]
+        a["state"][attacking] = ATTACK_MELEE
+        a["melee_last_attack"][attacking] = current_time
+        for slot in attacking.tolist():
+            enemy = self.enemies[slot]
+            enemy.target_current = players[target[slot]]
+            enemy.target_current.take_damage(enemy.melee_damage)
+
+    def positions(self) -> list:
+        """[x, y] of every attached enemy, in slot order"""
+        return self.arrays["pos"][:self.count].tolist()
+
+    def grid_cells(self, cell_size: int) -> dict:
+        """Bucket attached enemies into grid cells for SpatialGrid.load_cells"""
+        n = self.count
+        if n == 0:
+            return {}
+        cell = np.floor_divide(self.arrays["pos"][:n], cell_size).astype(np.int64)
+        order = np.lexsort((cell[:, 1], cell[:, 0]))
+        cell = cell[order]
+        # start of every run of equal cells in the sorted order
+        starts = np.flatnonzero(np.any(np.diff(cell, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate(([0], starts))
+        ends = np.append(starts[1:], n)
+        enemies = self.enemies
+        order = order.tolist()
+        return {
+            (cx, cy): [enemies[i] for i in order[start:end]]
+            for (cx, cy), start, end in zip(cell[starts].tolist(),
+                                            starts.tolist(), ends.tolist())
+        }
+
+    def max_extent(self) -> int:
+        """Largest width or height of the attached enemies"""
+        if self.count == 0:
+            return 0
+        return int(self.arrays["size"][:self.count].max())
+
+    def sync_sprites(self) -> None:
+        """Copy positions back into the sprites' rects for drawing"""
+        n = self.count
+        centers = self.arrays["pos"][:n].astype(np.int64).tolist()
+        for enemy, center in zip(self.enemies, centers):
+            enemy.rect.center = center
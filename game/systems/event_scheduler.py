@@ -1,28 +1,217 @@
-import time
-import heapq
+from typing import Callable, Dict, List, Optional
 
-# create a eventschdeuler with a heap queue
+# Hierarchical timer wheel: game time is cut into ticks of `resolution`
+# seconds. Level 0 has one slot per tick for the next 256 ticks, every higher
+# level one slot per 256x as many ticks. A timer sits in the lowest level whose
+# span reaches it and is moved down (cascaded) as the clock gets closer, so
+# insert and cancel are O(1) no matter how many timers are pending.
+WHEEL_BITS = 8
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4  # 2**32 ticks, far beyond any session at 60 ticks per second
+
+
+class TimerHandle:
+    """A scheduled event; keep it to cancel the event later"""
+
+    __slots__ = ("time", "event", "interval", "seq", "tick", "bucket")
+
+    def __init__(self, time: float, event: Callable, interval: Optional[float], seq: int):
+        self.time = time          # game time the event is due
+        self.event = event
+        self.interval = interval  # seconds between repeats, None = one-shot
+        self.seq = seq            # breaks ties between equal times
+        self.tick = 0
+        self.bucket = None        # slot the handle sits in, None once done
+
+    @property
+    def active(self) -> bool:
+        return self.bucket is not None
 
 
 class EventScheduler:
-    def __init__(self):
-        # priority queue of (time, counter, event) tuples
-        self.event_queue = []
+    """Runs callables at given game times (seconds since the game started)"""
+
+    def __init__(self, resolution: float = 1.0 / 60):
+        self.resolution = resolution
+        self.wheels: List[List[Dict[TimerHandle, None]]] = [
+            [{} for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)]
+        # timers beyond the last level, re-placed when the top level wraps
+        self.overflow: Dict[TimerHandle, None] = {}
+        self.now_tick = 0  # ticks before this one have been fully run
+        self.count = 0
         self.counter = 0  # unique counter to break ties
+        self.running: Optional[TimerHandle] = None  # event being executed
+
+    def __len__(self) -> int:
+        return self.count
+
+    def tick_of(self, time: float) -> int:
+        return int(time // self.resolution)
 
-    def schedule_event(self, event_time: float, event: callable) -> None:
-        """Schedule an event to occur at a specific time (epoch seconds)"""
-        # Use counter to ensure unique ordering when times are equal
-        heapq.heappush(self.event_queue, (event_time, self.counter, event))
+    def schedule_event(self, event_time: float, event: Callable,
+                       interval: Optional[float] = None) -> TimerHandle:
+        """Schedule an event at a game time, repeating every interval seconds
+        if given. Returns a handle for cancel()."""
+        handle = TimerHandle(event_time, event, interval, self.counter)
         self.counter += 1
+        self.place(handle)
+        self.count += 1
+        return handle
+
+    def schedule_repeating(self, first_time: float, interval: float,
+                           event: Callable) -> TimerHandle:
+        """Run event at first_time and then every interval seconds"""
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        return self.schedule_event(first_time, event, interval)
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        """Unschedule an event, returns False if it was not pending.
 
-    def run_pending(self, game_time) -> None:
+        A repeating event may cancel itself from its own callback.
+        """
+        handle.interval = None  # no further repeats
+        if handle.bucket is None:
+            return False
+        del handle.bucket[handle]
+        handle.bucket = None
+        self.count -= 1
+        return True
+
+    def place(self, handle: TimerHandle) -> None:
+        """Put a handle into the slot matching its distance from now"""
+        # events in the past are due on the current tick
+        tick = max(self.tick_of(handle.time), self.now_tick)
+        handle.tick = tick
+        now = self.now_tick
+        for level in range(WHEEL_LEVELS):
+            shift = WHEEL_BITS * (level + 1)
+            # same block of the next level up: this level's slots cover it
+            if tick >> shift == now >> shift:
+                bucket = self.wheels[level][(tick >> (shift - WHEEL_BITS)) & WHEEL_MASK]
+                break
+        else:
+            bucket = self.overflow
+        bucket[handle] = None
+        handle.bucket = bucket
+
+    def cascade(self, tick: int) -> None:
+        """Move timers of the slots starting at tick down to lower levels"""
+        if tick & ((1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1) == 0:
+            self.replace_all(self.overflow)
+        for level in range(WHEEL_LEVELS - 1, 0, -1):
+            shift = WHEEL_BITS * level
+            if tick & ((1 << shift) - 1) == 0:
+                self.replace_all(self.wheels[level][(tick >> shift) & WHEEL_MASK])
+
+    def replace_all(self, bucket: Dict[TimerHandle, None]) -> None:
+        if not bucket:
+            return
+        handles = list(bucket)
+        bucket.clear()
+        for handle in handles:
+            self.place(handle)
+
+    def run_pending(self, game_time: float) -> None:
         """Run all events that are scheduled to occur up to the current time"""
-        current_time = game_time
-        while self.event_queue and self.event_queue[0][0] <= current_time:
-            event_time, counter, event = heapq.heappop(self.event_queue)
-            event()  # execute the event callable
-
-    def clear(self) -> None:
-        """Clear all scheduled events"""
-        self.event_queue = []
+        target = self.tick_of(game_time)
+        if not self.count:
+            # nothing to cascade, jump straight to the current tick
+            self.now_tick = max(self.now_tick, target)
+            return
+        level0 = self.wheels[0]
+        while True:
+            tick = self.now_tick
+            bucket = level0[tick & WHEEL_MASK]
+            if bucket:
+                self.drain(bucket, game_time if tick >= target else None)
+            if tick >= target or not self.count:
+                self.now_tick = max(tick, target)
+                return
+            # skip the empty ticks in between
+            tick = min(self.next_tick(tick + 1), target)
+            self.now_tick = tick
+            self.cascade(tick)
+
+    def next_tick(self, tick: int) -> int:
+        """First tick from tick on where a slot needs to run or cascade"""
+        for level in range(WHEEL_LEVELS):
+            shift = WHEEL_BITS * level
+            wheel = self.wheels[level]
+            # slots left in the current block of the next level up (the
+            # current slot of a higher level has already been cascaded)
+            for index in range((tick >> shift) & WHEEL_MASK, WHEEL_SIZE):
+                if wheel[index]:
+                    block = tick >> (shift + WHEEL_BITS) << (shift + WHEEL_BITS)
+                    return max(tick, block | (index << shift))
+        top = WHEEL_BITS * WHEEL_LEVELS
+        return ((tick >> top) + 1) << top
+
+    def drain(self, bucket: Dict[TimerHandle, None], game_time: Optional[float]) -> None:
+        """Run the due events of one tick in time order, as a batch.
+
+        game_time None runs everything in the slot (a tick in the past);
+        events scheduled by the batch for this tick run in a follow-up batch.
+        """
+        while bucket:
+            if game_time is None:
+                due = list(bucket)
+            else:
+                due = [handle for handle in bucket if handle.time <= game_time]
+                if not due:
+                    return
+            due.sort(key=lambda handle: (handle.time, handle.seq))
+            for handle in due:
+                if handle.bucket is not bucket:
+                    continue  # cancelled by an earlier event of the batch
+                del bucket[handle]
+                handle.bucket = None
+                self.count -= 1
+                self.running = handle
+                handle.event()  # execute the event callable
+                self.running = None
+                if handle.interval is not None:
+                    # repeating timer that was not cancelled by its own event
+                    handle.time += handle.interval
+                    self.place(handle)
+                    self.count += 1
+
+    def pending(self) -> List[TimerHandle]:
+        """All scheduled handles in the order they are due"""
+        handles = [handle for wheel in self.wheels for bucket in wheel
+                   for handle in bucket]
+        handles += self.overflow
+        handles.sort(key=lambda handle: (handle.time, handle.seq))
+        return handles
+
+    def restore(self, now_tick: int, counter: int, entries) -> List[TimerHandle]:
+        """Replace all scheduled events with (time, event, interval, seq)
+        entries taken from pending() earlier, returns their new handles"""
+        self.clear()
+        self.now_tick = now_tick
+        self.counter = counter
+        handles = []
+        for time, event, interval, seq in entries:
+            handle = TimerHandle(time, event, interval, seq)
+            self.place(handle)
+            handles.append(handle)
+        self.count = len(handles)
+        return handles
+
+    def clear(self, game_time: Optional[float] = None) -> None:
+        """Clear all scheduled events, restarting the clock at game_time if
+        given (for when game time is reset)"""
+        for wheel in self.wheels:
+            for bucket in wheel:
+                for handle in bucket:
+                    handle.bucket = None
+                bucket.clear()
+        for handle in self.overflow:
+            handle.bucket = None
+        self.overflow.clear()
+        if self.running is not None:
+            self.running.interval = None  # cleared from its own callback
+        self.count = 0
+        if game_time is not None:
+            self.now_tick = self.tick_of(game_time)
@@ -1,5 +1,23 @@
 import pygame
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
+
+
+class HudText:
+    """A HUD label that is only re-rendered when its text changes"""
+
+    def __init__(self, render):
+        self.render = render  # text -> surface
+        self.text: Optional[str] = None
+        self.surface: Optional[pygame.Surface] = None
+        self.rect: Optional[pygame.Rect] = None  # where it sits on the HUD layer
+
+    def set_text(self, text: str) -> bool:
+        """Re-render if the text changed, return True when it did"""
+        if text == self.text:
+            return False
+        self.text = text
+        self.surface = self.render(text)
+        return True
 
 
 class GUI:
@@ -11,6 +29,8 @@ class GUI:
         self.font = pygame.font.Font(None, 36)  # Default font, size 36
         # Smaller font for less important info
         self.small_font = pygame.font.Font(None, 24)
+        # Big font for the game over title
+        self.title_font = pygame.font.Font(None, 72)
 
         # Colors
         self.text_color = (255, 255, 255)  # White text
@@ -28,9 +48,25 @@ class GUI:
         self.button_hover_color = (96, 96, 96)  # Lighter gray
         self.button_text_color = (255, 255, 255)  # White text
 
+        # Retained HUD: widgets are rendered once into one transparent layer and
+        # only the areas they cover are copied to the screen each frame
+        self.widgets: Dict[tuple, HudText] = {}
+        self.button_surfaces: Dict[str, pygame.Surface] = {}
+        self.game_over_text = self.title_font.render(
+            "GAME OVER", True, (255, 0, 0))  # Red text
+        self.invalidate()
+
     def update_screen_size(self, new_size: Tuple[int, int]) -> None:
         """Update GUI when screen is resized"""
         self.screen_size = new_size
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop everything that depends on the screen size"""
+        self.hud_surface = pygame.Surface(self.screen_size, pygame.SRCALPHA)
+        self.overlay = None  # built on the first game over frame
+        for widget in self.widgets.values():
+            widget.rect = None
 
     def render_text_with_background(self, text: str, font: pygame.font.Font,
                                     text_color: Tuple[int, int, int],
@@ -49,114 +85,168 @@ class GUI:
 
         return bg_surface
 
-    def draw(self, screen: pygame.Surface, players, game_time: float, game_over: bool = False, kill_counter: int = 0) -> None:
-        """Draw all GUI elements"""
+    def widget(self, key: tuple, font: pygame.font.Font) -> HudText:
+        """Get or create the label stored under key"""
+        widget = self.widgets.get(key)
+        if widget is None:
+            widget = HudText(lambda text: self.render_text_with_background(
+                text, font, self.text_color, self.background_color))
+            self.widgets[key] = widget
+        return widget
+
+    def place(self, widget: HudText, rect: pygame.Rect) -> None:
+        """Move a widget's pixels on the HUD layer if it changed"""
+        if widget.rect is not None:
+            self.hud_surface.fill((0, 0, 0, 0), widget.rect)
+        # BLEND_RGBA_MAX onto the cleared area copies the pixels unblended, so
+        # compositing the layer later looks exactly like a direct blit
+        self.hud_surface.blit(widget.surface, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        widget.rect = rect
+
+    def draw_text(self, screen: pygame.Surface, key: tuple, text: str,
+                  font: pygame.font.Font, x: int, y: int,
+                  align_right: bool = False, layered: bool = True) -> pygame.Rect:
+        """Composite a retained label; it is only re-rendered when text changes.
+
+        Labels that overlap their neighbours (the debug lines) pass
+        layered=False and are blitted straight from their own surface.
+        """
+        widget = self.widget(key, font)
+        changed = widget.set_text(text)
+        rect = widget.surface.get_rect(topleft=(x, y))
+        if align_right:
+            rect.right = x
+        if not layered:
+            return screen.blit(widget.surface, rect)
+        if changed or widget.rect != rect:
+            self.place(widget, rect)
+        return screen.blit(self.hud_surface, rect, rect)
+
+    def draw(self, screen: pygame.Surface, players, game_time: float, game_over: bool = False, kill_counter: int = 0) -> List[pygame.Rect]:
+        """Draw all GUI elements and return the screen areas drawn to"""
         if game_over:
             self.draw_game_over(screen)
-        else:
-            self.draw_player_info(screen, players)
-            self.draw_game_info(screen, game_time, kill_counter)
+            return [screen.get_rect()]
+        return (self.draw_player_info(screen, players)
+                + self.draw_game_info(screen, game_time, kill_counter))
 
-    def draw_player_info(self, screen: pygame.Surface, players) -> None:
+    def draw_player_info(self, screen: pygame.Surface, players) -> List[pygame.Rect]:
         """Draw player health and other player-specific information"""
+        rects = []
         y_offset = self.margin
 
         for i, player in enumerate(players):
             # Player health
             health_text = f"Player {i + 1} Health: {int(player.health)}"
-            health_surface = self.render_text_with_background(
-                health_text, self.font, self.text_color, self.background_color
-            )
-            screen.blit(health_surface, (self.margin, y_offset))
+            rects.append(self.draw_text(screen, ("health", i), health_text,
+                                        self.font, self.margin, y_offset))
             y_offset += self.line_height
+        return rects
 
-    def draw_game_info(self, screen: pygame.Surface, game_time: float, kill_counter: int = 0) -> None:
+    def draw_game_info(self, screen: pygame.Surface, game_time: float, kill_counter: int = 0) -> List[pygame.Rect]:
         """Draw game-wide information like time, score, etc."""
         # Game time in top-right corner
-        time_text = f"Time: {int(game_time)}s"
-        time_surface = self.render_text_with_background(
-            time_text, self.font, self.text_color, self.background_color
-        )
-
-        # Position in top-right corner
-        time_x = self.screen_size[0] - time_surface.get_width() - self.margin
-        time_y = self.margin
-
-        screen.blit(time_surface, (time_x, time_y))
+        right = self.screen_size[0] - self.margin
+        time_rect = self.draw_text(screen, ("time",), f"Time: {int(game_time)}s",
+                                   self.font, right, self.margin, align_right=True)
 
         # Kill counter below the time
-        kill_text = f"Kills: {kill_counter}"
-        kill_surface = self.render_text_with_background(
-            kill_text, self.font, self.text_color, self.background_color
-        )
-
-        # Position below the time
-        kill_x = self.screen_size[0] - kill_surface.get_width() - self.margin
-        kill_y = self.margin + time_surface.get_height() + 5
-
-        screen.blit(kill_surface, (kill_x, kill_y))
-
-    def draw_debug_info(self, screen: pygame.Surface, fps: float, enemy_count: int) -> None:
+        kill_rect = self.draw_text(screen, ("kills",), f"Kills: {kill_counter}",
+                                   self.font, right, time_rect.bottom + 5,
+                                   align_right=True)
+        return [time_rect, kill_rect]
+
+    def draw_debug_info(self, screen: pygame.Surface, fps: float, enemy_count: int,
+                        profiler=None, projectile_count: int = 0,
+                        budget_ms: float = 1000.0 / 60) -> List[pygame.Rect]:
         """Draw debug information (optional, can be toggled)"""
-        debug_y = self.screen_size[1] - 60  # Bottom of screen
-
-        # FPS counter
-        fps_text = f"FPS: {int(fps)}"
-        fps_surface = self.render_text_with_background(
-            fps_text, self.small_font, self.text_color, self.background_color
-        )
-        screen.blit(fps_surface, (self.margin, debug_y))
-
-        # Enemy count
-        enemy_text = f"Enemies: {enemy_count}"
-        enemy_surface = self.render_text_with_background(
-            enemy_text, self.small_font, self.text_color, self.background_color
-        )
-        screen.blit(enemy_surface, (self.margin, debug_y + 25))
+        lines = [f"FPS: {int(fps)}",
+                 f"Enemies: {enemy_count}  Projectiles: {projectile_count}"]
+        stats = profiler.stats(budget_ms) if profiler else None
+        if stats:
+            # one line per phase: mean / p95 time and share of the frame budget
+            for phase in profiler.PHASES:
+                phase_stats = stats[phase]
+                lines.append(f"{phase:<12}{phase_stats['mean']:6.2f} ms  "
+                             f"p95 {phase_stats['p95']:6.2f}  "
+                             f"{phase_stats['budget'] * 100:5.1f}%")
+            frame = stats["frame"]
+            lines.append(f"{'frame':<12}{frame['mean']:6.2f} ms  "
+                         f"p95 {frame['p95']:6.2f}  {frame['budget'] * 100:5.1f}%")
+
+        # Bottom-left corner, growing upwards
+        rects = []
+        debug_y = self.screen_size[1] - self.margin - 25 * len(lines)
+        for i, line in enumerate(lines):
+            rects.append(self.draw_text(screen, ("debug", i), line,
+                                        self.small_font, self.margin, debug_y,
+                                        layered=False))
+            debug_y += 25
+
+        if stats and profiler.frame_samples:
+            rects.append(self.draw_frame_graph(
+                screen, profiler.frame_samples, budget_ms))
+        return rects
+
+    def draw_frame_graph(self, screen: pygame.Surface, frame_samples,
+                         budget_ms: float) -> pygame.Rect:
+        """Bar graph of recent frame times with a line at the frame budget"""
+        graph_height = 60
+        graph_rect = pygame.Rect(0, 0, len(frame_samples), graph_height)
+        graph_rect.bottomright = (self.screen_size[0] - self.margin,
+                                  self.screen_size[1] - self.margin)
+        pygame.draw.rect(screen, (0, 0, 0), graph_rect)
+
+        # the budget line sits at half the graph height
+        scale = graph_height / (2 * budget_ms)
+        for x, frame_ms in enumerate(frame_samples):
+            bar = min(graph_height, int(frame_ms * scale))
+            color = (0, 200, 0) if frame_ms <= budget_ms else (220, 40, 40)
+            pygame.draw.line(screen, color,
+                             (graph_rect.left + x, graph_rect.bottom - 1),
+                             (graph_rect.left + x, graph_rect.bottom - bar))
+        budget_y = graph_rect.bottom - int(budget_ms * scale)
+        pygame.draw.line(screen, self.text_color,
+                         (graph_rect.left, budget_y), (graph_rect.right - 1, budget_y))
+        return graph_rect
 
     def draw_game_over(self, screen: pygame.Surface) -> None:
         """Draw the game over screen with restart and quit buttons"""
         # Draw semi-transparent overlay
-        overlay = pygame.Surface(self.screen_size, pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Dark overlay
-        screen.blit(overlay, (0, 0))
+        if self.overlay is None:
+            self.overlay = pygame.Surface(self.screen_size, pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 180))  # Dark overlay
+        screen.blit(self.overlay, (0, 0))
 
         # Draw "GAME OVER" text
-        game_over_font = pygame.font.Font(None, 72)
-        game_over_text = game_over_font.render(
-            "GAME OVER", True, (255, 0, 0))  # Red text
-        game_over_rect = game_over_text.get_rect(
+        game_over_rect = self.game_over_text.get_rect(
             center=(self.screen_size[0] // 2, self.screen_size[1] // 2 - 100))
-        screen.blit(game_over_text, game_over_rect)
-
-        # Calculate button positions
-        center_x = self.screen_size[0] // 2
-        center_y = self.screen_size[1] // 2
-
-        # Draw restart button
-        restart_rect = self.draw_button(
-            screen, "RESTART", center_x - self.button_width // 2, center_y - 10)
+        screen.blit(self.game_over_text, game_over_rect)
 
-        # Draw quit button
-        quit_rect = self.draw_button(
-            screen, "QUIT", center_x - self.button_width // 2, center_y + 70)
+        # Draw restart and quit buttons
+        restart_rect, quit_rect = self.get_game_over_button_rects()
+        self.draw_button(screen, "RESTART", restart_rect.x, restart_rect.y)
+        self.draw_button(screen, "QUIT", quit_rect.x, quit_rect.y)
 
     def draw_button(self, screen: pygame.Surface, text: str, x: int, y: int) -> pygame.Rect:
         """Draw a button and return its rectangle for click detection"""
-        button_rect = pygame.Rect(x, y, self.button_width, self.button_height)
-
-        # Draw button background
-        pygame.draw.rect(screen, self.button_color, button_rect)
-        pygame.draw.rect(screen, self.button_text_color,
-                         button_rect, 2)  # White border
-
-        # Draw button text
-        button_font = pygame.font.Font(None, 36)
-        button_text = button_font.render(text, True, self.button_text_color)
-        text_rect = button_text.get_rect(center=button_rect.center)
-        screen.blit(button_text, text_rect)
-
-        return button_rect
+        button_surface = self.button_surfaces.get(text)
+        if button_surface is None:
+            button_surface = pygame.Surface((self.button_width, self.button_height))
+            button_rect = button_surface.get_rect()
+
+            # Draw button background
+            button_surface.fill(self.button_color)
+            pygame.draw.rect(button_surface, self.button_text_color,
+                             button_rect, 2)  # White border
+
+            # Draw button text
+            button_text = self.font.render(text, True, self.button_text_color)
+            text_rect = button_text.get_rect(center=button_rect.center)
+            button_surface.blit(button_text, text_rect)
+            self.button_surfaces[text] = button_surface
+
+        return screen.blit(button_surface, (x, y))
 
     def get_game_over_button_rects(self) -> Tuple[pygame.Rect, pygame.Rect]:
         """Get the rectangles for restart and quit buttons for click detection"""
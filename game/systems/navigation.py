@@ -0,0 +1,242 @@
+import heapq
+import math
+from typing import List, Optional, Tuple
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # only the EnemyEngine reads the field as arrays
+    np = None
+
+SQRT2 = math.sqrt(2)
+# (dx, dy, cost) of the 8 neighbours of a cell
+NEIGHBOURS = ((-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+              (-1, -1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (1, 1, SQRT2))
+
+
+class FlowField:
+    """Coarse navigation grid toward the nearest living player.
+
+    The playable area is cut into cell_size squares. For every cell the field
+    stores which player is nearest (source), the walking direction toward it
+    (flow) and whether that player can be walked to in a straight line
+    (direct). Enemies sample it in O(1) instead of searching for their nearest
+    player, and steer straight at the player's exact position from direct
+    cells. The field is only rebuilt when a player enters another cell, the
+    world is resized or obstacles change.
+
+    Without obstacles every cell is direct and the nearest player is found by
+    straight-line distance. Once cells are blocked with set_blocked, distances
+    come from an 8-connected Dijkstra search around the obstacles and flow
+    points to the neighbouring cell closest to the player.
+    """
+
+    def __init__(self, cell_size: int = 32):
+        self.cell_size = cell_size
+        self.left = self.top = 0
+        self.cols = self.rows = 0
+        self.blocked = set()  # (col, row) of cells enemies cannot enter
+
+        # per cell, indexed row * cols + col
+        self.distance: List[float] = []
+        self.source: List[int] = []  # index into players, -1 = unreachable
+        self.flow: List[Tuple[float, float]] = []
+        self.direct: List[bool] = []
+
+        self.players = []  # living players the sources refer to
+        self.key = None    # (bounds, player cells) the field was built for
+        self.rebuilds = 0
+        self._arrays = None
+        self._arrays_build = -1
+
+    def cell_of(self, x: float, y: float) -> int:
+        """Index of the cell containing a point, clamped to the grid"""
+        col = min(max(int((x - self.left) // self.cell_size), 0), self.cols - 1)
+        row = min(max(int((y - self.top) // self.cell_size), 0), self.rows - 1)
+        return row * self.cols + col
+
+    def set_blocked(self, rect: pygame.Rect, blocked: bool = True) -> None:
+        """Mark the cells under a world rect as obstacles (or clear them)"""
+        size = self.cell_size
+        for col in range((rect.left - self.left) // size,
+                         (rect.right - 1 - self.left) // size + 1):
+            for row in range((rect.top - self.top) // size,
+                             (rect.bottom - 1 - self.top) // size + 1):
+                if blocked:
+                    self.blocked.add((col, row))
+                else:
+                    self.blocked.discard((col, row))
+        self.key = None  # rebuild on the next update
+
+    def update(self, world, players) -> None:
+        """Rebuild the field if the world or the players' cells changed"""
+        bounds = world.get_boundaries()
+        living = [player for player in players if player.health > 0]
+        self.left, self.top = bounds.left, bounds.top
+        self.cols = max(1, math.ceil(bounds.width / self.cell_size))
+        self.rows = max(1, math.ceil(bounds.height / self.cell_size))
+
+        key = (tuple(bounds), tuple(self.cell_of(p.pos.x, p.pos.y) for p in living))
+        if key != self.key or living != self.players:
+            self.players = living
+            self.rebuild()
+            self.key = key
+
+    def rebuild(self) -> None:
+        sources = [self.cell_of(p.pos.x, p.pos.y) for p in self.players]
+        if self.blocked:
+            self.search(sources)
+        else:
+            self.open_field(sources)
+        self.rebuilds += 1
+
+    def open_field(self, sources: List[int]) -> None:
+        """No obstacles: nearest player by straight-line cell distance"""
+        cols = self.cols
+        count = cols * self.rows
+        positions = [(index % cols, index // cols) for index in sources]
+        self.distance = [0.0] * count
+        self.source = [-1] * count
+        self.flow = [(0.0, 0.0)] * count
+        self.direct = [True] * count
+        if not positions:
+            return
+        for index in range(count):
+            col, row = index % cols, index // cols
+            best = -1
+            best_dist = math.inf
+            for i, (pc, pr) in enumerate(positions):
+                dist = math.hypot(pc - col, pr - row)
+                if dist < best_dist:
+                    best, best_dist = i, dist
+            self.distance[index] = best_dist
+            self.source[index] = best
+            if best_dist > 0:
+                pc, pr = positions[best]
+                self.flow[index] = ((pc - col) / best_dist, (pr - row) / best_dist)
+
+    def search(self, sources: List[int]) -> None:
+        """Multi-source Dijkstra over the free cells"""
+        cols, rows = self.cols, self.rows
+        count = cols * rows
+        blocked = self.blocked
+        distance = [math.inf] * count
+        source = [-1] * count
+        heap = []
+        for i, index in enumerate(sources):
+            if (index % cols, index // cols) in blocked or distance[index] == 0:
+                continue
+            distance[index] = 0.0
+            source[index] = i
+            heap.append((0.0, index))
+        heapq.heapify(heap)
+
+        while heap:
+            dist, index = heapq.heappop(heap)
+            if dist > distance[index]:
+                continue
+            col, row = index % cols, index // cols
+            for dx, dy, cost in NEIGHBOURS:
+                ncol, nrow = col + dx, row + dy
+                if not (0 <= ncol < cols and 0 <= nrow < rows):
+                    continue
+                if (ncol, nrow) in blocked:
+                    continue
+                # no cutting corners past obstacles
+                if dx and dy and ((ncol, row) in blocked or (col, nrow) in blocked):
+                    continue
+                nindex = nrow * cols + ncol
+                ndist = dist + cost
+                if ndist < distance[nindex]:
+                    distance[nindex] = ndist
+                    source[nindex] = source[index]
+                    heapq.heappush(heap, (ndist, nindex))
+
+        flow = [(0.0, 0.0)] * count
+        direct = [False] * count
+        for index in range(count):
+            col, row = index % cols, index // cols
+            inside = (col, row) in blocked
+            if distance[index] == 0 or (source[index] < 0 and not inside):
+                direct[index] = source[index] >= 0
+                continue
+            # walk toward the neighbour closest to the player; sprites that
+            # overlap into a blocked cell leave it by the shortest way out
+            best = None
+            best_key = (math.inf, math.inf) if inside else distance[index]
+            for dx, dy, cost in NEIGHBOURS:
+                ncol, nrow = col + dx, row + dy
+                if not (0 <= ncol < cols and 0 <= nrow < rows):
+                    continue
+                if (not inside and dx and dy
+                        and ((ncol, row) in blocked or (col, nrow) in blocked)):
+                    continue
+                nindex = nrow * cols + ncol
+                if distance[nindex] == math.inf:
+                    continue
+                key = (cost, distance[nindex]) if inside else distance[nindex]
+                if key < best_key:
+                    best, best_key = (dx / cost, dy / cost), key
+                    if inside:
+                        source[index] = source[nindex]
+            if best is not None:
+                flow[index] = best
+            if inside or source[index] < 0:
+                continue
+            target = sources[source[index]]
+            direct[index] = self.line_clear(col, row, target % cols, target // cols)
+
+        self.distance = distance
+        self.source = source
+        self.flow = flow
+        self.direct = direct
+
+    def line_clear(self, col0: int, row0: int, col1: int, row1: int) -> bool:
+        """True if no blocked cell lies on the grid line between two cells"""
+        blocked = self.blocked
+        dx, dy = abs(col1 - col0), -abs(row1 - row0)
+        sx = 1 if col0 < col1 else -1
+        sy = 1 if row0 < row1 else -1
+        err = dx + dy
+        while True:
+            if (col0, row0) in blocked:
+                return False
+            if col0 == col1 and row0 == row1:
+                return True
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                col0 += sx
+            if e2 <= dx:
+                err += dx
+                row0 += sy
+
+    def sample(self, pos) -> Tuple[pygame.Vector2, Optional[object]]:
+        """(walking direction, nearest player) at a world position.
+
+        The direction is a unit vector, or zero when no player is reachable or
+        the enemy stands exactly on its player.
+        """
+        if not self.players:
+            return pygame.Vector2(0, 0), None
+        index = self.cell_of(pos.x, pos.y)
+        source = self.source[index]
+        if source < 0:
+            return pygame.Vector2(0, 0), None
+        player = self.players[source]
+        if self.direct[index]:
+            direction = player.pos - pos
+            if direction.length_squared() > 0:
+                direction.normalize_ip()
+            return direction, player
+        return pygame.Vector2(self.flow[index]), player
+
+    def arrays(self):
+        """(source, direct, flow) per cell as NumPy arrays for the engine"""
+        if self._arrays_build != self.rebuilds:
+            self._arrays = (np.array(self.source, dtype=np.int64),
+                            np.array(self.direct, dtype=bool),
+                            np.array(self.flow, dtype=np.float64).reshape(-1, 2))
+            self._arrays_build = self.rebuilds
+        return self._arrays
@@ -0,0 +1,60 @@
+from typing import Callable, List
+
+
+class ObjectPool:
+    """Fixed-capacity free list of reusable objects.
+
+    acquire(*args) hands out a released object after calling its
+    reset(*args), or builds a new one with factory(*args) when the free list is
+    empty (a miss). Pooled objects call release() once when they die; releases
+    beyond capacity are dropped and left to the garbage collector.
+    """
+
+    def __init__(self, factory: Callable, capacity: int = 256):
+        self.factory = factory
+        self.capacity = capacity
+        self.free: List[object] = []
+        self.in_use = 0
+        self.high_water = 0  # most objects in use at once
+        self.misses = 0      # acquires that had to build a new object
+        self.reuses = 0
+        self.dropped = 0     # releases that did not fit into the free list
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.reuses += 1
+        else:
+            obj = self.factory(*args, **kwargs)
+            self.misses += 1
+        obj.pool = self
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj) -> None:
+        """Return a dead object to the free list"""
+        self.in_use -= 1
+        obj.pool = None  # released exactly once
+        if len(self.free) < self.capacity:
+            self.free.append(obj)
+        else:
+            self.dropped += 1
+
+    def prefill(self, count: int, *args, **kwargs) -> None:
+        """Build objects up front so the first waves don't allocate"""
+        for _ in range(min(count, self.capacity) - len(self.free)):
+            self.free.append(self.factory(*args, **kwargs))
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "free": len(self.free),
+            "in_use": self.in_use,
+            "high_water": self.high_water,
+            "misses": self.misses,
+            "reuses": self.reuses,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,77 @@
+import time
+from collections import deque
+from typing import Dict
+
+
+class FrameProfiler:
+    """Lap timer for the phases of a frame with a rolling history per phase.
+
+    Game.run calls begin_frame(), then lap(phase) after each phase and
+    end_frame() once the frame is flipped. While disabled every call returns
+    right away, so the instrumentation can stay in the hot path.
+    """
+
+    PHASES = ("input", "scheduler", "players", "crowd", "enemies", "weapons",
+              "world_draw", "entity_draw", "gui", "flip")
+
+    def __init__(self, history: int = 240, enabled: bool = False):
+        self.enabled = enabled
+        self.history_size = history
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all collected samples"""
+        self.samples: Dict[str, deque] = {
+            phase: deque(maxlen=self.history_size) for phase in self.PHASES}
+        self.frame_samples = deque(maxlen=self.history_size)
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        self.frame_start = 0.0
+        self.last = 0.0
+
+    def toggle(self) -> None:
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.reset()
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the previous lap to phase"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self) -> None:
+        if not self.enabled:
+            return
+        current = self.current
+        for phase, samples in self.samples.items():
+            samples.append(current[phase] * 1000.0)
+            current[phase] = 0.0
+        self.frame_samples.append((self.last - self.frame_start) * 1000.0)
+
+    def stats(self, budget_ms: float) -> Dict[str, dict]:
+        """mean/p95/max in ms and share of the frame budget for every phase"""
+        result = {}
+        for phase, samples in self.samples.items():
+            result[phase] = self.summarize(samples, budget_ms)
+        result["frame"] = self.summarize(self.frame_samples, budget_ms)
+        return result
+
+    @staticmethod
+    def summarize(samples, budget_ms: float) -> dict:
+        if not samples:
+            return {"mean": 0.0, "p95": 0.0, "max": 0.0, "budget": 0.0}
+        ordered = sorted(samples)
+        mean = sum(ordered) / len(ordered)
+        return {
+            "mean": mean,
+            "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+            "max": ordered[-1],
+            "budget": mean / budget_ms if budget_ms else 0.0,
+        }
@@ -4,24 +4,41 @@ import pygame
 class Projectile(pygame.sprite.Sprite):
     def __init__(self, attack, weapon, target, damage):
         super().__init__()
+        self.pool = None  # ObjectPool this projectile is returned to on kill
+        self.reset(attack, weapon, target, damage)
+
+    def reset(self, attack, weapon, target, damage):
+        """(Re)initialise for a new shot; pooled projectiles are reset on reuse"""
         self.weapon = weapon
         self.target = target
         self.damage = damage
-        # Create a copy of the weapon's image so it stays visible when weapon is hidden
-        self.image = self.weapon.image.copy()
+        # The weapon's current rotation comes from its rotation cache and is
+        # never drawn onto, so image and mask can be shared instead of copied
+        self.image = self.weapon.image
         self.rect = self.image.get_rect()
-        # Create collision mask for pixel-perfect collision
-        self.mask = pygame.mask.from_surface(self.image)
+        # no render interpolation from where the previous shot ended
+        self.prev_center = None
+        self.mask = self.weapon.mask
         self.pos = pygame.Vector2(self.weapon.pos)
         self.attack = attack
         self.direction = self.weapon.direction
         # reach target in attack duration
-        self.speed = self.weapon.range / self.weapon.attack_duration
+        reach = self.weapon.range
+        if reach is None:  # unlimited range, fly as far as the target
+            reach = self.pos.distance_to(target.pos) if target is not None else 0.0
+        self.speed = reach / self.weapon.attack_duration
         # Give projectile its own timer
         self.timer = 0.0
 
         self.state = None
 
+    def kill(self):
+        """Remove from all groups and hand the projectile back to its pool"""
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
+
     def launch(self):
         if self.weapon.type == "melee":
             self.state = "melee_fired"
@@ -47,10 +64,18 @@ class Projectile(pygame.sprite.Sprite):
         if not self.weapon.player or not self.weapon.player.enemies:
             return
 
-        for enemy in self.weapon.player.enemies:
-            if self.rect.colliderect(enemy.rect):
-                self.on_hit(enemy)
-                break  # Hit first enemy, stop checking
+        # only enemies in the grid cells around the projectile are checked
+        enemy_grid = self.weapon.player.game.enemy_grid
+        overlapping = enemy_grid.query_rect(self.rect)
+        if not overlapping:
+            return
+        # Hit one enemy: the target if it is among them, else the oldest.
+        # The grid's bucket order differs between the object and the
+        # vectorized enemy update, so it must not decide.
+        if self.target in overlapping:
+            self.on_hit(self.target)
+        else:
+            self.on_hit(min(overlapping, key=lambda enemy: enemy.uid))
 
     def on_hit(self, enemy):
         """Handle projectile behavior when hitting an enemy"""
@@ -0,0 +1,119 @@
+import pygame
+from typing import List, Optional, Tuple
+
+
+class DirtyRectRenderer:
+    """Bookkeeping for redrawing only the screen areas that changed.
+
+    The world background is pre-rendered (World.background). Each frame the
+    areas covered by last frame's sprites are restored from it, the sprites are
+    drawn again, and only the union of old and new sprite/HUD areas is copied
+    to the screen and pushed with pygame.display.update(rects). When the dirty
+    area grows beyond full_redraw_ratio of the screen a full flip is cheaper.
+    """
+
+    def __init__(self, background_color: Tuple[int, int, int],
+                 full_redraw_ratio: float = 0.4):
+        self.background_color = background_color
+        self.full_redraw_ratio = full_redraw_ratio
+        self.world_rects: List[pygame.Rect] = []  # on the world surface
+        self.hud_rects: List[pygame.Rect] = []    # on the screen
+        self.needs_full_redraw = True
+
+    def invalidate(self) -> None:
+        """Force a full redraw next frame (resize, restart, overlays)"""
+        self.needs_full_redraw = True
+
+    def erase(self, world) -> None:
+        """Restore the world background under last frame's sprites"""
+        background = world.background
+        surface = world.surface
+        for rect in self.world_rects:
+            surface.blit(background, rect, rect)
+
+    def restore_screen(self, screen: pygame.Surface, world,
+                       world_rects: List[pygame.Rect]) -> List[pygame.Rect]:
+        """Copy changed world areas to the screen and clear last frame's HUD.
+
+        Returns the screen rects that were touched.
+        """
+        wx, wy = int(world.world_position[0]), int(world.world_position[1])
+        world_screen_rect = world.surface.get_rect(topleft=(wx, wy))
+        rects = [rect.move(wx, wy) for rect in self.world_rects]
+        rects += [rect.move(wx, wy) for rect in world_rects]
+        rects += self.hud_rects
+
+        for rect in rects:
+            if not world_screen_rect.contains(rect):
+                screen.fill(self.background_color, rect)
+            inside = rect.clip(world_screen_rect)
+            if inside.width and inside.height:
+                screen.blit(world.surface, inside, inside.move(-wx, -wy))
+        return rects
+
+    def finish(self, world_rects: List[pygame.Rect], hud_rects: List[pygame.Rect],
+               screen_rects: Optional[List[pygame.Rect]],
+               screen_size: Tuple[int, int]) -> Optional[List[pygame.Rect]]:
+        """Remember this frame's areas and return the rects to update.
+
+        screen_rects is None after a full redraw. Returns None when the whole
+        screen should be flipped.
+        """
+        self.world_rects = world_rects
+        self.hud_rects = hud_rects
+        if screen_rects is None:
+            self.needs_full_redraw = False
+            return None
+
+        dirty = screen_rects + hud_rects
+        area = sum(rect.width * rect.height for rect in dirty)
+        if area > self.full_redraw_ratio * screen_size[0] * screen_size[1]:
+            return None
+        return dirty
+
+
+class SpriteBatch:
+    """(image, dest) pairs collected over a frame and drawn with one blits call.
+
+    Sprites are added in draw order. The world offset is folded into the
+    destinations as they are collected, and positions are interpolated by alpha
+    between a sprite's prev_center (its center at the previous simulation tick)
+    and its current center, in add. The list is reused from frame to frame.
+    """
+
+    def __init__(self):
+        self.items: List[Tuple[pygame.Surface, Tuple[int, int]]] = []
+        self.offset = (0, 0)
+        self.alpha = 1.0
+
+    def begin(self, offset: Tuple[int, int], alpha: float) -> None:
+        self.items.clear()
+        self.offset = offset
+        self.alpha = alpha
+
+    def add(self, sprites) -> None:
+        """Queue sprites at their (interpolated) rect positions"""
+        append = self.items.append
+        ox, oy = self.offset
+        alpha = self.alpha
+        interpolate = alpha < 1.0
+        for sprite in sprites:
+            rect = sprite.rect
+            prev = getattr(sprite, "prev_center", None) if interpolate else None
+            if prev is None:
+                append((sprite.image, (rect.x + ox, rect.y + oy)))
+            else:
+                cx, cy = rect.center
+                x = int(prev[0] + (cx - prev[0]) * alpha + ox)
+                y = int(prev[1] + (cy - prev[1]) * alpha + oy)
+                append((sprite.image, (x - (rect.width >> 1), y - (rect.height >> 1))))
+
+    def add_sprite(self, sprite) -> None:
+        self.add((sprite,))
+
+    def flush(self, surface: pygame.Surface, want_rects: bool = False) -> List[pygame.Rect]:
+        """Draw everything queued, returning the drawn areas if asked for"""
+        if want_rects:
+            return surface.blits(self.items)
+        surface.blits(self.items, False)
+        return []
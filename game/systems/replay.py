@@ -0,0 +1,228 @@
+import json
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from game.systems.input import InputState
+
+# Replay file layout (little endian):
+#   magic, version (u16), config header (u32 length + JSON)
+#   ticks (u32), runs (u32) of [length (varint), one input byte per slot]
+#   events (u32) of [tick (varint), kind (u8), payload]
+#   checkpoints (u32) of [tick (varint), checksum (u32)], final checksum (u32)
+# Inputs are run-length encoded: a run holds the tick count for which the
+# inputs of all slots stayed the same, so idle or held keys cost a few bytes.
+MAGIC = b"RLRP"
+VERSION = 1
+
+# bit of every InputState field in an input byte
+INPUT_BITS = {"up": 1, "down": 2, "left": 4, "right": 8, "start": 16}
+
+# events between ticks that change the simulation besides the inputs
+RESIZE, RESTART = 1, 2
+
+
+def pack_input(state: Optional[InputState]) -> int:
+    if state is None:
+        return 0
+    return sum(bit for name, bit in INPUT_BITS.items() if getattr(state, name))
+
+
+def unpack_input(bits: int) -> InputState:
+    return InputState(**{name: bool(bits & bit) for name, bit in INPUT_BITS.items()})
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Replay:
+    """A recorded session: config header, input runs, events and checksums"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.slots = config["input_slots"]
+        self.ticks = 0
+        self.runs: List[list] = []  # [length, input bytes]
+        self.events: List[tuple] = []  # (tick, kind, payload tuple)
+        self.checkpoints: List[Tuple[int, int]] = []  # (tick, checksum)
+        self.final_checksum = 0
+
+    def inputs(self):
+        """Per tick input bytes, expanded from the runs"""
+        for length, record in self.runs:
+            for _ in range(length):
+                yield record
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(MAGIC)
+        header = json.dumps(self.config, sort_keys=True).encode()
+        out += struct.pack("<HI", VERSION, len(header)) + header
+        out += struct.pack("<II", self.ticks, len(self.runs))
+        for length, record in self.runs:
+            write_varint(out, length)
+            out += record
+        out += struct.pack("<I", len(self.events))
+        for tick, kind, payload in self.events:
+            write_varint(out, tick)
+            out.append(kind)
+            if kind == RESIZE:
+                out += struct.pack("<HH", *payload)
+        out += struct.pack("<I", len(self.checkpoints))
+        for tick, checksum in self.checkpoints:
+            write_varint(out, tick)
+            out += struct.pack("<I", checksum)
+        out += struct.pack("<I", self.final_checksum)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        version, header_size = struct.unpack_from("<HI", data, 4)
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        offset = 10
+        replay = cls(json.loads(data[offset:offset + header_size]))
+        offset += header_size
+        slots = replay.slots
+
+        replay.ticks, count = struct.unpack_from("<II", data, offset)
+        offset += 8
+        for _ in range(count):
+            length, offset = read_varint(data, offset)
+            replay.runs.append([length, data[offset:offset + slots]])
+            offset += slots
+        (count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        for _ in range(count):
+            tick, offset = read_varint(data, offset)
+            kind = data[offset]
+            offset += 1
+            payload = ()
+            if kind == RESIZE:
+                payload = struct.unpack_from("<HH", data, offset)
+                offset += 4
+            replay.events.append((tick, kind, payload))
+        (count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        for _ in range(count):
+            tick, offset = read_varint(data, offset)
+            (checksum,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+            replay.checkpoints.append((tick, checksum))
+        (replay.final_checksum,) = struct.unpack_from("<I", data, offset)
+        return replay
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class InputRecorder:
+    """Records the inputs of every simulation tick of a game.
+
+    Game.step calls record() with the tick's inputs before simulating it and
+    end_tick() afterwards, which stores a state checksum every
+    checkpoint_interval ticks so a replay can tell where it diverged.
+    """
+
+    def __init__(self, config: dict, checkpoint_interval: int = 600):
+        self.replay = Replay(dict(config, checkpoint_interval=checkpoint_interval))
+        self.checkpoint_interval = checkpoint_interval
+        self.last = None  # input bytes of the current run
+
+    @property
+    def ticks(self) -> int:
+        return self.replay.ticks
+
+    def record(self, per_player_states: Dict[int, InputState]) -> None:
+        replay = self.replay
+        record = bytes(pack_input(per_player_states.get(pid))
+                       for pid in range(replay.slots))
+        if record == self.last:
+            replay.runs[-1][0] += 1
+        else:
+            replay.runs.append([1, record])
+            self.last = record
+        replay.ticks += 1
+
+    def record_event(self, kind: int, *payload: int) -> None:
+        """Note a resize or restart, applied before the next recorded tick"""
+        self.replay.events.append((self.replay.ticks, kind, payload))
+
+    def end_tick(self, game) -> None:
+        if self.replay.ticks % self.checkpoint_interval == 0:
+            self.replay.checkpoints.append((self.replay.ticks, game.checksum()))
+
+    def save(self, path: str, game) -> int:
+        """Write the replay file, returns its size in bytes"""
+        self.replay.final_checksum = game.checksum()
+        data = self.replay.to_bytes()
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+
+def play_replay(path: str, draw: bool = False) -> dict:
+    """Re-simulate a recorded session headlessly as fast as possible.
+
+    Returns a report with the simulated and wall clock time, the first tick
+    whose checkpoint checksum did not match (None if all did) and whether the
+    final state matched the recording.
+    """
+    from game.game import Game  # the game module records through this one
+
+    replay = Replay.load(path)
+    config = replay.config
+    game = Game(size=tuple(config["size"]), headless=True, seed=config["seed"],
+                tick_rate=config["tick_rate"],
+                vectorized_enemies=config["vectorized_enemies"])
+    game.init_pygame()
+    dt = 1.0 / game.tick_rate
+    events = {}
+    for tick, kind, payload in replay.events:
+        events.setdefault(tick, []).append((kind, payload))
+    checkpoints = dict(replay.checkpoints)
+    states = {bits: unpack_input(bits) for bits in range(32)}
+    diverged = None
+
+    start = time.perf_counter()
+    for tick, record in enumerate(replay.inputs()):
+        for kind, payload in events.get(tick, ()):
+            if kind == RESIZE:
+                game.resize(payload)
+            elif kind == RESTART:
+                game.restart_game()
+        game.step({pid: states[bits] for pid, bits in enumerate(record)}, dt)
+        if draw:
+            game.draw()
+        expected = checkpoints.get(tick + 1)
+        if expected is not None and diverged is None and game.checksum() != expected:
+            diverged = tick + 1
+    wall = time.perf_counter() - start
+
+    return {
+        "ticks": replay.ticks,
+        "game_seconds": round(replay.ticks * dt, 3),
+        "wall_seconds": round(wall, 3),
+        "speedup": round(replay.ticks * dt / wall, 1) if wall else 0.0,
+        "diverged_at": diverged,
+        "ok": diverged is None and game.checksum() == replay.final_checksum,
+        "summary": game.summary(),
+    }
@@ -0,0 +1,324 @@
+import math
+import struct
+
+import pygame
+
+from game.systems.enemy_engine import STATES, STATE_CODES
+
+# A snapshot is the simulation state of a Game packed into bytes: counters and
+# the RNG, all enemies, the players with their weapons and projectiles, the
+# wave queue and the scheduled events. Surfaces, masks and rects are not
+# stored, restore looks them up again in the shared caches. References between
+# objects (projectile targets, owners of scheduled events) are stored as
+# indices, scheduled events as owner and method name. The world size is
+# configuration and not part of a snapshot.
+MAGIC = b"SNAP"
+VERSION = 3
+
+# magic, version, game time, frame counter, kill counter, wave counter, game over,
+# next enemy uid
+HEADER = struct.Struct("<4sHdIII?I")
+# random.Random state: version, 625 words of the Mersenne Twister, gauss_next
+RNG = struct.Struct("<I625I?d")
+# x, y, dx, dy, speed, health, max health, melee damage, last melee attack,
+# state, animation frame, animation timer, facing right, tinted, tint rgb,
+# engine slot, uid
+ENEMY = struct.Struct("<9dBBd??3BiI")
+# x, y, health, direction, moving, animation frame, animation timer, weapons
+PLAYER = struct.Struct("<3dBBBdI")
+# name length, damage, range (nan = unlimited), cooldown, state, attack timer,
+# cooldown timer, visible, piercing count, x, y, dx, dy, attacks, projectiles;
+# followed by the name
+WEAPON = struct.Struct("<B3dB2d?i4dII")
+# x, y, dx, dy, speed, damage, timer, state, target enemy (-1 = none)
+PROJECTILE = struct.Struct("<7dBi")
+# spawned, dropped, merged, peak live, pending strengths (u16 each follow)
+WAVES = struct.Struct("<5I")
+# now tick, counter, events
+SCHEDULER = struct.Struct("<qqI")
+# time, interval (nan = one-shot), seq, owner kind, owner index, name length;
+# followed by the method name
+EVENT = struct.Struct("<ddqBiB")
+COUNT = struct.Struct("<I")
+
+PLAYER_DIRECTIONS = ("down", "left", "right", "up")
+WEAPON_STATES = ("idle", "attacking", "cooldown")
+PROJECTILE_STATES = (None, "melee_fired")
+OWNER_DIRECTOR, OWNER_ENEMY = 0, 1
+# attribute of the owner that holds the handle of a scheduled method
+TIMER_ATTRIBUTES = {"next_wave": "timer", "kill": "despawn_timer"}
+
+
+def take_snapshot(game) -> bytes:
+    """Pack the simulation state of a game (between two ticks)"""
+    enemies = game.enemies.sprites()
+    index = {enemy: i for i, enemy in enumerate(enemies)}
+    parts = [HEADER.pack(MAGIC, VERSION, game.game_time, game.frame_counter,
+                         game.kill_counter, game.wave_counter, game.game_over,
+                         game.next_enemy_uid)]
+
+    version, key, gauss = game.rng.getstate()
+    parts.append(RNG.pack(version, *key, gauss is not None, gauss or 0.0))
+
+    parts.append(COUNT.pack(len(enemies)))
+    engine = game.enemy_engine
+    if engine is not None and enemies:
+        # attached enemies are views of the engine's arrays, read those in
+        # bulk instead of enemy by enemy
+        slots = [enemy.slot for enemy in enemies]
+        simulated = zip(engine.pos[slots].tolist(), engine.direction[slots].tolist(),
+                        engine.health[slots].tolist(), engine.state[slots].tolist(),
+                        engine.melee_last_attack[slots].tolist(),
+                        engine.anim_timer[slots].tolist())
+    else:
+        simulated = ((enemy.pos, enemy.direction, enemy.health, STATE_CODES[enemy.state],
+                      enemy.melee_last_attack_time, enemy.animation_timer if enemy.frames else 0.0)
+                     for enemy in enemies)
+    for enemy, (pos, direction, health, state, last_attack, timer) in zip(enemies, simulated):
+        frame, facing, tint = 0, False, None
+        if enemy.frames:
+            frame, facing, tint = enemy.current_frame, enemy.facing_right, enemy.color_filter
+        else:
+            timer = 0.0
+        parts.append(ENEMY.pack(
+            pos[0], pos[1], direction[0], direction[1], enemy.speed, health,
+            enemy.max_health, enemy.melee_damage, last_attack, state, frame, timer,
+            facing, tint is not None, *(tint or (0, 0, 0)), enemy.slot, enemy.uid))
+
+    players = game.players.sprites()
+    parts.append(COUNT.pack(len(players)))
+    for player in players:
+        weapons = player.weapons.weapons.sprites()
+        parts.append(PLAYER.pack(
+            player.pos.x, player.pos.y, player.health,
+            PLAYER_DIRECTIONS.index(player.direction), player.is_moving,
+            player.current_frame, player.animation_timer, len(weapons)))
+        for weapon in weapons:
+            name = weapon.name.encode()
+            projectiles = weapon.attack.projectiles.sprites()
+            parts.append(WEAPON.pack(
+                len(name), weapon.damage,
+                math.nan if weapon.range is None else weapon.range,
+                weapon.cooldown_duration, WEAPON_STATES.index(weapon.state), weapon.attack_timer,
+                weapon.cooldown_timer, weapon.visible, weapon.piercing_count,
+                weapon.pos.x, weapon.pos.y, weapon.direction.x, weapon.direction.y,
+                weapon.attack.attack_counter, len(projectiles)) + name)
+            for projectile in projectiles:
+                parts.append(PROJECTILE.pack(
+                    projectile.pos.x, projectile.pos.y, projectile.direction.x,
+                    projectile.direction.y, projectile.speed, projectile.damage,
+                    projectile.timer, PROJECTILE_STATES.index(projectile.state),
+                    index.get(projectile.target, -1)))
+
+    director = game.wave_director
+    pending = list(director.pending)
+    parts.append(WAVES.pack(director.spawned, director.dropped, director.merged,
+                            director.peak_live, len(pending)))
+    parts.append(struct.pack(f"<{len(pending)}H", *pending))
+
+    scheduler = game.event_scheduler
+    handles = scheduler.pending()
+    parts.append(SCHEDULER.pack(scheduler.now_tick, scheduler.counter, len(handles)))
+    for handle in handles:
+        owner = getattr(handle.event, "__self__", None)
+        if owner is director:
+            kind, owner_index = OWNER_DIRECTOR, 0
+        elif owner in index:
+            kind, owner_index = OWNER_ENEMY, index[owner]
+        else:
+            raise ValueError(f"can't snapshot scheduled event {handle.event!r}")
+        name = handle.event.__name__.encode()
+        parts.append(EVENT.pack(
+            handle.time, math.nan if handle.interval is None else handle.interval,
+            handle.seq, kind, owner_index, len(name)) + name)
+    return b"".join(parts)
+
+
+def restore_snapshot(game, data: bytes) -> None:
+    """Put a game back into the state of a snapshot.
+
+    Live enemies and projectiles are reused in place, missing ones come from
+    the pools and extra ones are killed back into them.
+    """
+    view = memoryview(data)
+    magic, version, game.game_time, game.frame_counter, game.kill_counter, \
+        game.wave_counter, game.game_over, game.next_enemy_uid = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("not a snapshot")
+    if version != VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+    offset = HEADER.size
+
+    rng = RNG.unpack_from(view, offset)
+    offset += RNG.size
+    game.rng.setstate((rng[0], rng[1:626], rng[627] if rng[626] else None))
+
+    enemies, offset = restore_enemies(game, view, offset)
+
+    players = game.players.sprites()
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    if count != len(players):
+        raise ValueError(f"snapshot of {count} players, the game has {len(players)}")
+    for player in players:
+        offset = restore_player(game, player, enemies, view, offset)
+
+    director = game.wave_director
+    director.spawned, director.dropped, director.merged, director.peak_live, \
+        count = WAVES.unpack_from(view, offset)
+    offset += WAVES.size
+    director.pending.clear()
+    director.pending.extend(struct.unpack_from(f"<{count}H", view, offset))
+    offset += 2 * count
+
+    now_tick, counter, count = SCHEDULER.unpack_from(view, offset)
+    offset += SCHEDULER.size
+    entries, owners = [], []
+    for _ in range(count):
+        time, interval, seq, kind, owner_index, size = EVENT.unpack_from(view, offset)
+        offset += EVENT.size
+        name = bytes(view[offset:offset + size]).decode()
+        offset += size
+        owner = director if kind == OWNER_DIRECTOR else enemies[owner_index]
+        entries.append((time, getattr(owner, name),
+                        None if math.isnan(interval) else interval, seq))
+        owners.append((owner, name))
+    handles = game.event_scheduler.restore(now_tick, counter, entries)
+    director.timer = None
+    for handle, (owner, name) in zip(handles, owners):
+        attribute = TIMER_ATTRIBUTES.get(name)
+        if attribute is not None:
+            setattr(owner, attribute, handle)
+
+    # per frame caches and indexes refer to the state before the restore
+    game.targeting.reset()
+    game.player_grid.rebuild(players)
+    engine = game.enemy_engine
+    if engine is not None:
+        game.enemy_grid.load_cells(engine.grid_cells(game.enemy_grid.cell_size),
+                                   len(engine), engine.max_extent())
+    else:
+        game.enemy_grid.rebuild(enemies)
+
+
+def restore_enemies(game, view, offset: int):
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    engine = game.enemy_engine
+    if engine is not None:
+        # all of the state is overwritten below, then re-attached in slot order
+        engine.clear(copy_back=False)
+
+    enemies = game.enemies.sprites()
+    for enemy in enemies[count:]:
+        enemy.kill()
+    del enemies[count:]
+    while len(enemies) < count:
+        enemy = game.enemy_pool.acquire()
+        game.enemies.add(enemy)
+        enemies.append(enemy)
+
+    end = offset + count * ENEMY.size
+    slots = []
+    for enemy, (x, y, dx, dy, speed, health, max_health, melee_damage, last_attack,
+                state, frame, timer, facing, tinted, red, green, blue, slot, uid) in zip(
+                    enemies, ENEMY.iter_unpack(view[offset:end])):
+        enemy.uid = uid
+        enemy.pos = pygame.Vector2(x, y)
+        enemy.direction = pygame.Vector2(dx, dy)
+        enemy.speed = speed
+        enemy.health = health
+        enemy.max_health = max_health
+        enemy.melee_damage = melee_damage
+        enemy.melee_last_attack_time = last_attack
+        enemy.state = STATES[state]
+        enemy.target_current = None
+        enemy.despawn_timer = None  # set again with the scheduled events
+        if enemy.frames:
+            enemy.current_frame = frame
+            enemy.animation_timer = timer
+            enemy.facing_right = facing
+            enemy.color_filter = (red, green, blue) if tinted else None
+            enemy.image, enemy.mask = enemy.variants.get(frame, facing, enemy.color_filter)
+        enemy.rect.center = (int(x), int(y))
+        enemy.prev_center = None
+        slots.append(slot)
+
+    if engine is not None:
+        engine.extend([enemy for _, enemy in sorted(zip(slots, enemies),
+                                                    key=lambda pair: pair[0])])
+    return enemies, end
+
+
+def restore_player(game, player, enemies, view, offset: int) -> int:
+    x, y, player.health, direction, moving, frame, timer, count = \
+        PLAYER.unpack_from(view, offset)
+    offset += PLAYER.size
+    player.pos = pygame.Vector2(x, y)
+    player.direction = PLAYER_DIRECTIONS[direction]
+    player.is_moving = bool(moving)
+    player.current_frame = frame
+    player.animation_timer = timer
+    player.image = player.frames[player.direction][frame]
+    player.mask, player.tight_rect = player.masks[player.direction][frame]
+    player.rect.center = (int(x), int(y))
+    player.prev_center = None
+
+    records = []
+    for _ in range(count):
+        record = WEAPON.unpack_from(view, offset)
+        offset += WEAPON.size
+        name = bytes(view[offset:offset + record[0]]).decode()
+        offset += record[0]
+        end = offset + record[-1] * PROJECTILE.size
+        records.append((name, record, view[offset:end]))
+        offset = end
+
+    manager = player.weapons
+    weapons = manager.weapons.sprites()
+    if [weapon.name for weapon in weapons] != [name for name, _, _ in records]:
+        # a different loadout, build the snapshot's weapons
+        for weapon in weapons:
+            for projectile in weapon.attack.projectiles.sprites():
+                projectile.kill()
+        manager.weapons.empty()
+        for name, record, _ in records:
+            manager.weapons.add(manager.create_weapon(name))
+        weapons = manager.weapons.sprites()
+    manager.weapon_count = len(weapons)
+
+    for weapon, (name, record, projectiles) in zip(weapons, records):
+        (_, weapon.damage, weapon_range, weapon.cooldown_duration, state,
+         weapon.attack_timer, weapon.cooldown_timer, weapon.visible, weapon.piercing_count,
+         x, y, dx, dy, weapon.attack.attack_counter, _) = record
+        weapon.range = None if math.isnan(weapon_range) else weapon_range
+        weapon.state = WEAPON_STATES[state]
+        weapon.pos = pygame.Vector2(x, y)
+        weapon.direction = pygame.Vector2(dx, dy)
+        weapon.targets = None  # assigned again at the start of the next update
+        weapon.targeted_enemy = None
+        weapon.image, weapon.mask = weapon.rotations.get(
+            weapon.direction.angle_to(pygame.Vector2(1, 0)))
+        weapon.rect = weapon.image.get_rect(center=(int(x), int(y)))
+        weapon.prev_center = None
+        restore_projectiles(game, weapon, enemies, projectiles)
+    return offset
+
+
+def restore_projectiles(game, weapon, enemies, view) -> None:
+    attack = weapon.attack
+    for projectile in attack.projectiles.sprites():
+        projectile.kill()
+    for x, y, dx, dy, speed, damage, timer, state, target in PROJECTILE.iter_unpack(view):
+        target = enemies[target] if target >= 0 else None
+        projectile = game.projectile_pool.acquire(attack, weapon, target, damage)
+        projectile.pos = pygame.Vector2(x, y)
+        projectile.direction = pygame.Vector2(dx, dy)
+        projectile.speed = speed
+        projectile.timer = timer
+        projectile.state = PROJECTILE_STATES[state]
+        # the image of the weapon's rotation when it was fired
+        projectile.image, projectile.mask = weapon.rotations.get(
+            projectile.direction.angle_to(pygame.Vector2(1, 0)))
+        projectile.rect = projectile.image.get_rect(center=(int(x), int(y)))
+        attack.projectiles.add(projectile)
@@ -0,0 +1,182 @@
+import heapq
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pygame
+
+
+class SpatialGrid:
+    """Uniform grid that buckets sprites by position for neighbourhood queries.
+
+    The grid is rebuilt once per frame from a sprite group; queries then only
+    look at the cells around the query area, so their cost depends on the local
+    density instead of the total number of sprites. Sprites need a ``pos``
+    vector and a ``rect``.
+    """
+
+    def __init__(self, cell_size: int = 64):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], list] = {}
+        self.count = 0
+        # largest half extent of any sprite rect, used to widen rect queries
+        self.max_extent = 0
+        # occupied cell bounds (min_x, min_y, max_x, max_y)
+        self.bounds = (0, 0, -1, -1)
+
+    def rebuild(self, sprites, positions=None, extent: Optional[int] = None) -> None:
+        """Re-bucket all sprites at their current positions.
+
+        positions can supply (x, y) pairs parallel to sprites (e.g. straight
+        from the EnemyEngine arrays) and extent the largest sprite width or
+        height, to skip reading them from every sprite.
+        """
+        sprites = list(sprites)
+        if positions is None:
+            positions = [(sprite.pos.x, sprite.pos.y) for sprite in sprites]
+        if extent is None:
+            extent = max((max(sprite.rect.width, sprite.rect.height)
+                          for sprite in sprites), default=0)
+
+        cell_size = self.cell_size
+        cells = {}
+        for sprite, (x, y) in zip(sprites, positions):
+            key = (int(x // cell_size), int(y // cell_size))
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [sprite]
+            else:
+                bucket.append(sprite)
+        self.load_cells(cells, len(sprites), extent)
+
+    def load_cells(self, cells: Dict[Tuple[int, int], list], count: int,
+                   extent: int) -> None:
+        """Install buckets computed elsewhere (see EnemyEngine.grid_cells)"""
+        self.cells = cells
+        self.count = count
+        self.max_extent = extent // 2 + 1
+        if cells:
+            xs = [key[0] for key in cells]
+            ys = [key[1] for key in cells]
+            self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self.bounds = (0, 0, -1, -1)
+
+    def clear(self) -> None:
+        self.cells = {}
+        self.count = 0
+        self.bounds = (0, 0, -1, -1)
+
+    def _cell_range(self, left: float, top: float, right: float, bottom: float):
+        """Cell index ranges covering a box, clamped to the occupied bounds"""
+        cell_size = self.cell_size
+        min_x, min_y, max_x, max_y = self.bounds
+        x0 = max(int(left // cell_size), min_x)
+        y0 = max(int(top // cell_size), min_y)
+        x1 = min(int(right // cell_size), max_x)
+        y1 = min(int(bottom // cell_size), max_y)
+        return range(x0, x1 + 1), range(y0, y1 + 1)
+
+    def query_radius(self, pos, radius: float,
+                     predicate: Optional[Callable] = None) -> List[tuple]:
+        """Return (distance, sprite) for all sprites within radius of pos"""
+        if not self.cells:
+            return []
+        px, py = pos[0], pos[1]
+        xs, ys = self._cell_range(px - radius, py - radius,
+                                  px + radius, py + radius)
+        radius_sq = radius * radius
+        cells = self.cells
+        result = []
+        for cx in xs:
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for sprite in bucket:
+                    dx = sprite.pos.x - px
+                    dy = sprite.pos.y - py
+                    dist_sq = dx * dx + dy * dy
+                    if dist_sq > radius_sq:
+                        continue
+                    if predicate is not None and not predicate(sprite):
+                        continue
+                    result.append((dist_sq ** 0.5, sprite))
+        return result
+
+    def k_nearest(self, pos, k: int, predicate: Optional[Callable] = None,
+                  max_distance: Optional[float] = None) -> List[tuple]:
+        """Return up to k (distance, sprite) pairs closest to pos, nearest first.
+
+        Cells are searched in growing square rings around pos; the search stops
+        once k candidates are known to be closer than anything in the next ring.
+        """
+        if not self.cells or k <= 0:
+            return []
+        cell_size = self.cell_size
+        px, py = pos[0], pos[1]
+        cx, cy = int(px // cell_size), int(py // cell_size)
+        min_x, min_y, max_x, max_y = self.bounds
+        max_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+        if max_distance is not None:
+            max_ring = min(max_ring, int(max_distance // cell_size) + 1)
+
+        cells = self.cells
+        found = []
+        for ring in range(max_ring + 1):
+            for key in self._ring_cells(cx, cy, ring):
+                bucket = cells.get(key)
+                if not bucket:
+                    continue
+                for sprite in bucket:
+                    if predicate is not None and not predicate(sprite):
+                        continue
+                    dx = sprite.pos.x - px
+                    dy = sprite.pos.y - py
+                    distance = (dx * dx + dy * dy) ** 0.5
+                    if max_distance is not None and distance > max_distance:
+                        continue
+                    found.append((distance, sprite))
+
+            # anything outside the rings searched so far is at least this far away
+            if len(found) >= k:
+                reach = ring * cell_size
+                if sum(1 for distance, _ in found if distance <= reach) >= k:
+                    break
+
+        return heapq.nsmallest(k, found, key=itemgetter(0))
+
+    @staticmethod
+    def _ring_cells(cx: int, cy: int, ring: int):
+        """Cells at exactly Chebyshev distance ring from (cx, cy)"""
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield (x, cy - ring)
+            yield (x, cy + ring)
+        for y in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, y)
+            yield (cx + ring, y)
+
+    def query_rect(self, rect: pygame.Rect,
+                   predicate: Optional[Callable] = None) -> list:
+        """Return all sprites whose rect overlaps rect"""
+        if not self.cells:
+            return []
+        extent = self.max_extent
+        xs, ys = self._cell_range(rect.left - extent, rect.top - extent,
+                                  rect.right + extent, rect.bottom + extent)
+        cells = self.cells
+        result = []
+        for cx in xs:
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for sprite in bucket:
+                    if not rect.colliderect(sprite.rect):
+                        continue
+                    if predicate is not None and not predicate(sprite):
+                        continue
+                    result.append(sprite)
+        return result
@@ -0,0 +1,98 @@
+class TargetingService:
+    """Per-frame nearest-enemy queries and weapon target assignment.
+
+    The k nearest live enemies of each player are computed once per frame and
+    memoized. Targets are then handed out across the weapons of all players:
+    weapons that are ready and have an enemy in range pick first, and an enemy
+    stops receiving weapons once their combined damage covers its health.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.frame = -1
+        self.nearest_cache = {}  # player -> (k, [(distance, enemy), ...])
+        self.assigned_frame = -1
+
+    def begin_frame(self, frame: int) -> None:
+        """Invalidate the memoized queries when a new frame starts"""
+        if frame != self.frame:
+            self.frame = frame
+            self.nearest_cache.clear()
+
+    def reset(self) -> None:
+        """Forget all memoized results (the frame counter went back)"""
+        self.frame = -1
+        self.nearest_cache.clear()
+        self.assigned_frame = -1
+
+    def nearest(self, player, k: int) -> list:
+        """Return up to k (distance, enemy) pairs for player, nearest first"""
+        cached = self.nearest_cache.get(player)
+        if cached is None or cached[0] < k:
+            cached = (k, player.get_closest_enemies(k))
+            self.nearest_cache[player] = cached
+        return cached[1][:k]
+
+    def assign_targets(self) -> None:
+        """Assign one target to every weapon of every player (once per frame)"""
+        if self.assigned_frame == self.frame:
+            return
+        self.assigned_frame = self.frame
+
+        weapons = []
+        for player in self.game.players:
+            for weapon in player.weapons.weapons:
+                weapons.append((weapon, player))
+        if not weapons:
+            return
+
+        # every weapon could need its own enemy, so look at that many per player
+        k = len(weapons)
+        candidates = {player: self.nearest(player, k)
+                      for player in self.game.players}
+
+        remaining = {}  # enemy -> health not yet covered by assigned weapons
+        assigned = {}   # weapon -> (distance, enemy)
+
+        # Pass 1: ready weapons with enemies in range, closest pairs first
+        pairs = []
+        for index, (weapon, player) in enumerate(weapons):
+            for distance, enemy in candidates[player]:
+                if weapon.range is None or distance <= weapon.range:
+                    not_ready = weapon.state != "idle"
+                    pairs.append((not_ready, distance, index, enemy))
+        pairs.sort(key=lambda pair: (pair[0], pair[1], pair[2]))
+        for not_ready, distance, index, enemy in pairs:
+            weapon = weapons[index][0]
+            if weapon in assigned:
+                continue
+            health = remaining.get(enemy, enemy.health)
+            if health <= 0:
+                continue  # already covered by other weapons
+            assigned[weapon] = (distance, enemy)
+            if not not_ready:
+                remaining[enemy] = health - weapon.damage
+
+        # Pass 2: everything else aims at the nearest enemy that is still
+        # uncovered, falling back to the nearest one overall
+        for weapon, player in weapons:
+            if weapon in assigned:
+                continue
+            options = candidates[player]
+            if not options:
+                weapon.targets = None
+                weapon.targeted_enemy = None
+                continue
+            target = options[0]
+            for option in options:
+                if remaining.get(option[1], option[1].health) > 0:
+                    target = option
+                    break
+            assigned[weapon] = target
+            if weapon.state == "idle":
+                remaining[target[1]] = remaining.get(
+                    target[1], target[1].health) - weapon.damage
+
+        for weapon, target in assigned.items():
+            weapon.targets = [target]
+            weapon.targeted_enemy = target[1]
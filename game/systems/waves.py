@@ -0,0 +1,176 @@
+import time
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+
+class SpawnCurve:
+    """Piecewise-linear value over the wave number, flat beyond its points"""
+
+    def __init__(self, points: Iterable[Tuple[float, float]]):
+        self.points = sorted(points)
+
+    def __call__(self, wave: float) -> float:
+        points = self.points
+        if wave <= points[0][0]:
+            return points[0][1]
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            if wave <= x1:
+                return y0 + (y1 - y0) * (wave - x0) / (x1 - x0)
+        return points[-1][1]
+
+
+# enemies per wave: the old wave * 2 + 3, levelling off at wave 50
+WAVE_SIZE = SpawnCurve([(0, 3), (50, 103)])
+# seconds between the start of two waves
+WAVE_INTERVAL = SpawnCurve([(0, 4.0)])
+
+OVERFLOW_POLICIES = ("delay", "merge", "drop")
+
+
+class WaveDirector:
+    """Queues wave spawns and works them off within a per-frame budget.
+
+    A wave only adds entries to the pending queue. Every frame update() spawns
+    at most spawns_per_frame of them (and stops early once budget_ms is used
+    up), never going past live_cap live enemies (dying ones, still shown for a
+    second before they despawn, don't count). What happens to spawns that
+    don't fit under the cap depends on overflow:
+
+    - "delay": they wait in the queue until enemies die
+    - "merge": queued spawns are folded into elites worth elite_size enemies
+    - "drop": they are discarded
+
+    The queue never holds more than max_pending entries, the newest spawns
+    beyond that are dropped. Pending entries are strengths, 1 for a regular
+    enemy. enemy_speed, enemy_health and enemy_damage are the stats of a
+    regular enemy, elites scale health and damage by their strength.
+    """
+
+    def __init__(self, game, size_curve: SpawnCurve = WAVE_SIZE,
+                 interval_curve: SpawnCurve = WAVE_INTERVAL,
+                 spawns_per_frame: int = 4, budget_ms: Optional[float] = None,
+                 live_cap: int = 300, overflow: str = "delay", elite_size: int = 4,
+                 max_pending: int = 1000, enemy_speed: float = 150.0,
+                 enemy_health: float = 30, enemy_damage: float = 1):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy {overflow!r}")
+        self.game = game
+        self.size_curve = size_curve
+        self.interval_curve = interval_curve
+        self.spawns_per_frame = spawns_per_frame
+        self.budget_ms = budget_ms
+        self.live_cap = live_cap
+        self.overflow = overflow
+        self.elite_size = elite_size
+        self.max_pending = max_pending
+        self.enemy_speed = enemy_speed
+        self.enemy_health = enemy_health
+        self.enemy_damage = enemy_damage
+
+        self.pending = deque()
+        self.timer = None  # handle of the next wave event
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.spawned = 0
+        self.dropped = 0
+        self.merged = 0  # elites created from merged spawns
+        self.peak_live = 0
+
+    def start(self, delay: float) -> None:
+        """Start the wave timer, first wave after delay seconds"""
+        scheduler = self.game.event_scheduler
+        if self.timer is not None:
+            scheduler.cancel(self.timer)
+        self.timer = scheduler.schedule_event(
+            self.game.game_time + delay, self.next_wave)
+
+    def reset(self) -> None:
+        """Forget pending spawns and stop the wave timer (restart)"""
+        if self.timer is not None:
+            self.game.event_scheduler.cancel(self.timer)
+            self.timer = None
+        self.pending.clear()
+        self.reset_stats()
+
+    def next_wave(self) -> None:
+        """Wave timer event: queue a wave and schedule the next one"""
+        due = self.timer.time  # keep the cadence exact
+        self.queue_wave()
+        self.timer = self.game.event_scheduler.schedule_event(
+            due + self.interval_curve(self.game.wave_counter), self.next_wave)
+
+    def queue_wave(self) -> int:
+        """Queue the spawns of the next wave, returns the wave size"""
+        count = int(self.size_curve(self.game.wave_counter))
+        self.game.wave_counter += 1
+        room = max(0, self.max_pending - len(self.pending))
+        self.pending.extend([1] * min(count, room))
+        self.dropped += max(0, count - room)
+        return count
+
+    def update(self) -> None:
+        """Spawn queued enemies within this frame's budget"""
+        if not self.pending:
+            return
+        free = self.live_cap - self.live_count()
+        if free <= 0:
+            self.handle_overflow()
+            return
+
+        start = time.perf_counter()
+        for _ in range(min(free, self.spawns_per_frame, len(self.pending))):
+            self.spawn(self.pending.popleft())
+            if (self.budget_ms is not None
+                    and (time.perf_counter() - start) * 1000.0 >= self.budget_ms):
+                break
+        self.peak_live = max(self.peak_live, self.live_count())
+
+    def live_count(self) -> int:
+        """Enemies counting toward live_cap, the ones not dying"""
+        return sum(1 for enemy in self.game.enemies if enemy.state != "dead")
+
+    def handle_overflow(self) -> None:
+        """Apply the overflow policy while the live cap is reached"""
+        if self.overflow == "drop":
+            self.dropped += len(self.pending)
+            self.pending.clear()
+        elif self.overflow == "merge":
+            # fold regular spawns into elites, the queue shrinks by a factor
+            # of elite_size while the total strength stays the same
+            regular = 0
+            while self.pending and self.pending[-1] == 1:
+                self.pending.pop()
+                regular += 1
+            elites, rest = divmod(regular, self.elite_size)
+            self.pending.extend([self.elite_size] * elites + [1] * rest)
+            self.merged += elites
+
+    def spawn(self, strength: int) -> None:
+        game = self.game
+        enemy = game.enemy_pool.acquire()
+        enemy.speed = self.enemy_speed
+        enemy.max_health = enemy.health = self.enemy_health
+        enemy.melee_damage = self.enemy_damage
+        if strength > 1:
+            enemy.make_elite(strength)
+        enemy.spawn(game.world)
+        game.add_enemy(enemy)
+        self.spawned += 1
+
+    def flush(self) -> None:
+        """Spawn everything that fits under the cap right away (no budget)"""
+        live = self.live_count()
+        while self.pending and live < self.live_cap:
+            self.spawn(self.pending.popleft())
+            live += 1
+        self.peak_live = max(self.peak_live, live)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "spawned": self.spawned,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "peak_live": self.peak_live,
+        }
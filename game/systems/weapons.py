@@ -1,58 +1,160 @@
+import json
+from typing import Dict, List, Optional
+
 import pygame
 
+from game.systems.assets import RotationCache, asset_cache
 from game.systems.attack import Attack
 
+WEAPONS_PATH = "game/data/weapons.json"
+
+
+class WeaponArchetype:
+    """What all weapons of a kind share: the stats of their definition in the
+    weapon data file and the sprite with its pre-rotated variants and masks.
+
+    Weapons refer to their archetype instead of holding copies, so a player
+    stacking dozens of daggers holds one sprite set and one set of stats.
+    Damage, range and cooldown start out as the archetype's and are kept per
+    weapon, they are tuned and upgraded per weapon (and saved in snapshots).
+    """
+
+    # angular resolution of the pre-rotated sprites (steps per full turn)
+    rotation_steps = 64
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.type = data.get("type", "melee")
+        self.damage = data.get("damage", 20)
+        self.range = data.get("range", 300)  # None (null) = unlimited
+        self.attack_duration = data.get("attack_duration", 0.2)  # seconds
+        self.cooldown = data.get("cooldown", 1.0)  # seconds
+        self.max_targets = data.get("max_targets", 1)
+        self.piercing = data.get("piercing", 0)  # targets a projectile passes through
+        self.hold_distance = data.get("hold_distance", 30)  # px from the player
+        self.sprite = data.get("sprite")  # None = plain rectangle
+        self.size = tuple(data.get("size", (20, 10)))
+        self.color = tuple(data.get("color", (0, 255, 0)))
+        self.image_orig: Optional[pygame.Surface] = None
+        self.rotations: Optional[RotationCache] = None
+
+    def load_sprites(self) -> None:
+        """Load the sprite scaled to size and its rotation cache (needs the
+        display), a rectangle of color if there is no sprite"""
+        if self.sprite:
+            try:
+                self.image_orig = asset_cache.get_image(self.sprite, self.size)
+                self.rotations = asset_cache.get_rotations(
+                    self.sprite, self.size, self.rotation_steps)
+                return
+            except Exception:
+                pass  # Fallback to a rectangle if the sprite can't be loaded
+        self.image_orig = pygame.Surface(self.size)
+        self.image_orig.set_colorkey((0, 0, 0))
+        self.image_orig.fill(self.color)
+        self.rotations = RotationCache(self.image_orig, self.rotation_steps)
+
+
+class WeaponRegistry:
+    """Weapon archetypes by name, defined in a JSON file read on first use"""
+
+    def __init__(self, path: str = WEAPONS_PATH):
+        self.path = path
+        self.archetypes: Optional[Dict[str, WeaponArchetype]] = None
+
+    def load(self) -> Dict[str, WeaponArchetype]:
+        if self.archetypes is None:
+            with open(self.path) as f:
+                definitions = json.load(f)
+            self.archetypes = {name: WeaponArchetype(name, data)
+                               for name, data in definitions.items()}
+        return self.archetypes
+
+    def names(self) -> List[str]:
+        return list(self.load())
+
+    def get(self, name: str) -> WeaponArchetype:
+        """The archetype of a weapon name, its sprites loaded"""
+        archetype = self.load().get(name)
+        if archetype is None:
+            raise KeyError(f"unknown weapon {name!r} (defined in {self.path}: "
+                           f"{', '.join(self.load())})")
+        if archetype.rotations is None:
+            archetype.load_sprites()
+        return archetype
+
+
+# shared instance the weapon managers create weapons from
+weapon_registry = WeaponRegistry()
+
 
 class Weapon(pygame.sprite.Sprite):
-    def __init__(self, name, damage, range, player=None, slot=0):
+    """A weapon of a player: its archetype plus the state of this instance.
+
+    Only the attributes listed in __slots__ are slot-backed. pygame's Sprite
+    base has no __slots__, so every weapon still has a __dict__ (holding the
+    sprite's group set) and accepts other attributes; the weapon managers keep
+    weapons in a sprite Group, which needs that base.
+    """
+
+    __slots__ = ("archetype", "player", "damage", "range", "cooldown_duration",
+                 "piercing_count", "targets", "targeted_enemy", "pos", "direction",
+                 "image", "mask", "rect", "visible", "state", "attack", "attack_timer",
+                 "cooldown_timer", "prev_center")
+
+    def __init__(self, archetype: WeaponArchetype, player=None,
+                 damage: Optional[float] = None, range: Optional[float] = None):
         super().__init__()
-        self.name = name
+        self.archetype = archetype
         self.player = player
-        self.damage = damage
-        self.range = range
-        self.type = "melee"
-        self.max_targets = 1
+        self.damage = archetype.damage if damage is None else damage
+        self.range = archetype.range if range is None else range
+        self.cooldown_duration = archetype.cooldown
+        self.piercing_count = archetype.piercing  # targets the projectile can pierce through
         self.targets = None
         self.targeted_enemy = None
 
         self.pos = pygame.Vector2(0, 0)
         self.direction = pygame.Vector2(0, 0)
 
-        # Load weapon sprite based on weapon name
-        if name == "dagger":
-            try:
-                # Load dagger sprite
-                dagger_sprite = pygame.image.load("game/assets/dagger.png").convert_alpha()
-                # Scale to desired weapon size (20x10 was the original rectangle size)
-                self.image_orig = pygame.transform.scale(dagger_sprite, (20, 10))
-            except Exception:
-                # Fallback to green rectangle if sprite can't be loaded
-                self.image_orig = pygame.Surface((20, 10))
-                self.image_orig.set_colorkey((0, 0, 0))
-                self.image_orig.fill((0, 255, 0))
-        else:
-            # Default weapon appearance for other weapons
-            self.image_orig = pygame.Surface((20, 10))
-            self.image_orig.set_colorkey((0, 0, 0))
-            self.image_orig.fill((0, 255, 0))
-        
-        # create working copy
-        self.image = self.image_orig.copy()
+        # current rotation, shared with the archetype so never draw onto it
+        self.image, self.mask = archetype.rotations.get(0)
         self.rect = self.image.get_rect()
         self.visible = True
+        self.prev_center = None
 
         # states that a attack circle will give the weapon
         # idle, cooling down, fired, returning
         self.state = "idle"
 
-        self.attack_duration = 0.2  # seconds
         self.attack = Attack(self)
         self.attack_timer = 0.0  # separate attack timer for weapon
-
-        self.cooldown_duration = 1  # seconds
         self.cooldown_timer = 0.0
 
-        self.piercing_count = 0  # number of targets the projectile can pierce through
+    # fixed per kind, read from the archetype
+    @property
+    def name(self) -> str:
+        return self.archetype.name
+
+    @property
+    def type(self) -> str:
+        return self.archetype.type
+
+    @property
+    def max_targets(self) -> int:
+        return self.archetype.max_targets
+
+    @property
+    def attack_duration(self) -> float:
+        return self.archetype.attack_duration
+
+    @property
+    def rotations(self) -> RotationCache:
+        return self.archetype.rotations
+
+    @property
+    def image_orig(self) -> pygame.Surface:
+        return self.archetype.image_orig
 
     def update(self, dt: float):
         self.update_position()
@@ -112,8 +214,8 @@ class Weapon(pygame.sprite.Sprite):
         # Store the old center position
         old_center = self.rect.center
 
-        # Rotate the original image (always from original to avoid cumulative distortion)
-        self.image = pygame.transform.rotate(self.image_orig, angle)
+        # Look up the pre-rotated image for the nearest quantized angle
+        self.image, self.mask = self.rotations.get(angle)
 
         # Get new rect from rotated image
         self.rect = self.image.get_rect()
@@ -136,9 +238,10 @@ class Weapon(pygame.sprite.Sprite):
 
         # update weapon position based on player position and direction to target with offset in that direction
         if self.player:
+            distance = self.archetype.hold_distance
             self.pos = pygame.Vector2(
-                self.player.pos.x + self.direction.x * 30,
-                self.player.pos.y + self.direction.y * 30
+                self.player.pos.x + self.direction.x * distance,
+                self.player.pos.y + self.direction.y * distance
             )
             self.rect.center = (int(self.pos.x), int(self.pos.y))
 
@@ -153,11 +256,15 @@ class WeaponManager:
 
     def create_starting_weapons(self, weapon_name: str, count: int):
         for i in range(count):
-            weapon = Weapon(weapon_name, damage=20,
-                            range=300, player=self.player)
-            self.weapons.add(weapon)
+            self.weapons.add(self.create_weapon(weapon_name))
             self.weapon_count += 1
 
+    def create_weapon(self, weapon_name: str, damage=None, range=None) -> Weapon:
+        """New weapon of an archetype from the registry, damage and range
+        default to the archetype's"""
+        return Weapon(weapon_registry.get(weapon_name), player=self.player,
+                      damage=damage, range=range)
+
     def update(self, dt: float):
         # First, distribute targets among all weapons
         self.distribute_targets()
@@ -168,58 +275,19 @@ class WeaponManager:
             weapon.attack.projectiles.update(dt)
 
     def distribute_targets(self):
-        """Distribute targets among weapons to avoid duplicates"""
-        if not self.player or not self.player.enemies:
-            # No enemies available, clear all targets
-            for weapon in self.weapons:
-                weapon.targets = None
-                weapon.targeted_enemy = None
+        """Distribute targets among weapons to avoid duplicates and overkill"""
+        if not self.player:
             return
+        # Targets are assigned for the weapons of all players at once, the
+        # first manager to ask in a frame triggers it
+        self.player.game.targeting.assign_targets()
 
-        # Get all available enemies sorted by distance
-        all_enemies = self.player.get_closest_enemies(len(self.player.enemies))
-
-        if not all_enemies:
-            # No enemies found
-            for weapon in self.weapons:
-                weapon.targets = None
-                weapon.targeted_enemy = None
-            return
-
-        # Assign targets to weapons
-        weapon_list = list(self.weapons)
-        for i, weapon in enumerate(weapon_list):
-            if len(all_enemies) > 0:
-                # Cycle through enemies if more weapons than enemies
-                enemy_index = i % len(all_enemies)
-                target_enemy = all_enemies[enemy_index]
-                weapon.targets = [target_enemy]
-                # Extract enemy from (distance, enemy) tuple
-                weapon.targeted_enemy = target_enemy[1]
-            else:
-                weapon.targets = None
-                weapon.targeted_enemy = None
-
-    def draw(self, surface, world_offset=(0, 0)):
-        # Draw each weapon with the world offset
+    def queue_draw(self, batch):
+        """Queue visible weapons and all projectiles for the sprite batch"""
         for weapon in self.weapons:
             # Draw weapon only if visible
             if weapon.visible:
-                offset_pos = (
-                    int(weapon.rect.centerx + world_offset[0]),
-                    int(weapon.rect.centery + world_offset[1])
-                )
-                draw_rect = weapon.rect.copy()
-                draw_rect.center = offset_pos
-                surface.blit(weapon.image, draw_rect)
+                batch.add_sprite(weapon)
 
             # Always draw projectiles regardless of weapon visibility
-
-            for projectile in weapon.attack.projectiles:
-                proj_offset_pos = (
-                    int(projectile.rect.centerx + world_offset[0]),
-                    int(projectile.rect.centery + world_offset[1])
-                )
-                proj_draw_rect = projectile.rect.copy()
-                proj_draw_rect.center = proj_offset_pos
-                surface.blit(projectile.image, proj_draw_rect)
+            batch.add(weapon.attack.projectiles)
@@ -1,14 +1,108 @@
+import argparse
+import contextlib
+import os
 import sys
 import asyncio
 
 from game.game import Game
+from game.systems.replay import play_replay
 
 
-async def main():
+async def main(record_path=None):
     """Main entry point for pygbag"""
-    game = Game()
+    # in the browser (pygbag) fill and flip bandwidth dominate, so only
+    # redraw the parts of the screen that changed
+    render_mode = "dirty" if sys.platform == "emscripten" else "full"
+    game = Game(render_mode=render_mode, record_path=record_path)
     await game.run()
 
 
+def replay(path: str) -> int:
+    """Re-simulate a recording at full speed, exit code 1 if it diverged"""
+    # the game prints gameplay events, thousands of them in a long session
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = play_replay(path)
+    print(f"{result['ticks']} ticks ({result['game_seconds']} s of game time) "
+          f"in {result['wall_seconds']} s, {result['speedup']}x real time")
+    if result["ok"]:
+        print("final state matches the recording")
+        return 0
+    if result["diverged_at"] is not None:
+        print(f"DIVERGED: checksum mismatch at tick {result['diverged_at']}")
+    else:
+        print("DIVERGED: final state does not match the recording")
+    return 1
+
+
+def parse_address(text: str):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def serve(address) -> int:
+    """Run an authoritative server until interrupted"""
+    from game.net.server import GameServer
+
+    server = GameServer(*address)
+    print(f"serving on {server.address[0]}:{server.address[1]}")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def bots(address, count: int, seconds: float) -> int:
+    """Connect headless clients to a server and report their bandwidth"""
+    from game.net.client import run_bots
+
+    for report in run_bots(address, count, seconds):
+        print(report)
+    return 0
+
+
+def bake() -> int:
+    """Bake the sprite frames into the atlas the game loads at startup"""
+    import pygame
+    from game.systems.atlas import ATLAS_PATH, bake_atlas
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    result = bake_atlas()
+    print(f"{result['frames']} frames of {result['entries']} asset sets in a "
+          f"{result['size'][0]}x{result['size'][1]} atlas, {result['bytes']} bytes "
+          f"({ATLAS_PATH}.bgra/.idx)")
+    return 0
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Rougelite")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the session's inputs to a replay file")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="re-simulate a recording headlessly and verify it")
+    parser.add_argument("--server", metavar="[HOST:]PORT",
+                        help="run a headless multiplayer server")
+    parser.add_argument("--connect", metavar="[HOST:]PORT",
+                        help="join a multiplayer server")
+    parser.add_argument("--bots", type=int, metavar="N",
+                        help="with --connect: join N headless test clients instead")
+    parser.add_argument("--seconds", type=float, default=30.0,
+                        help="how long --bots stay connected")
+    parser.add_argument("--bake-atlas", action="store_true",
+                        help="bake the sprite frames into game/assets/atlas.*")
+    args, _ = parser.parse_known_args()
+    if args.bake_atlas:
+        sys.exit(bake())
+    if args.replay:
+        sys.exit(replay(args.replay))
+    if args.server:
+        sys.exit(serve(parse_address(args.server)))
+    if args.connect and args.bots:
+        sys.exit(bots(parse_address(args.connect), args.bots, args.seconds))
+    if args.connect:
+        from game.net.client import play
+        asyncio.run(play(parse_address(args.connect)))
+        sys.exit(0)
+    asyncio.run(main(args.record))